@@ -0,0 +1,97 @@
+'''
+Benchmark for the running-total aggregates on CombatSession, Character and Ability. Builds a synthetic session through the same calls
+the parser makes, then times the getters the UI calls for every row on a refresh against recalculating the same numbers by looping
+through every ability and damage component. tests/test_aggregates.py checks the running totals against a full recalculation.
+
+Usage (from the repo root):
+    python benchmarks/bench_aggregates.py [targets] [abilities] [hits]
+'''
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from combat.CombatParser import CombatSession, Ability, DamageComponent
+
+DAMAGE_TYPES = ["Fire", "Smashing", "Negative Energy", "Toxic"]
+
+
+def build_session(targets, abilities, hits):
+    '''Builds a session where the player and a pet hit every target with every ability, some hits carrying a proc'''
+    random.seed(1)
+    session = CombatSession(0, "Benchmark 1")
+    session.duration = 600
+    session.check_in_char("Player", "player")
+    session.check_in_char("Pet", "pet")
+    for t in range(targets):
+        session.check_in_char("Target " + str(t), "enemy")
+
+    for i in range(hits):
+        caster = session.chars["Player" if i % 4 else "Pet"]
+        target = session.targets["Target " + str(random.randrange(targets))]
+        name = "Ability " + str(random.randrange(abilities))
+        for char in [caster, target]:
+            if name not in char.abilities:
+                char.add_ability(name, Ability(name))
+            ability = char.abilities[name]
+            ability.ability_used()
+            ability.ability_hit(random.random() < 0.9)
+            ability.add_damage(DamageComponent(random.choice(DAMAGE_TYPES)), random.uniform(10, 300))
+            if random.random() < 0.1:
+                ability.add_damage(DamageComponent("Proc", is_proc=True), 107.1)
+    return session
+
+
+def refresh_running(session):
+    '''The numbers the UI asks for on a refresh, read from the running totals'''
+    values = [session.get_total_damage(), session.get_dps(), session.get_highest_damaged_enemy()]
+    for group in [session.chars, session.targets]:
+        for char in group.values():
+            values.append((char.get_dps(session.duration), char.get_accuracy(), char.get_average_damage(), char.get_count(),
+                           char.get_total_damage(), char.get_hits(), char.get_tries()))
+    return values
+
+
+def refresh_recalculated(session):
+    '''The same numbers recalculated by looping through every ability and damage component, as the getters used to'''
+    def total(char):
+        return sum(sum(component.total_damage for component in ability.damage) for ability in char.abilities.values())
+
+    values = [sum(total(char) for char in session.chars.values()), None, None]
+    for group in [session.chars, session.targets]:
+        for char in group.values():
+            abilities = char.abilities.values()
+            hits = sum(ability.hits for ability in abilities)
+            tries = sum(ability.tries for ability in abilities)
+            values.append((total(char) / session.duration, hits / tries if tries else 0, sum(ability.average_damage for ability in abilities),
+                           sum(ability.count for ability in abilities), total(char), hits, tries))
+    return values
+
+
+def time_it(function, session, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(session)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    targets = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    abilities = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    hits = int(sys.argv[3]) if len(sys.argv) > 3 else 200000
+
+    start = time.perf_counter()
+    session = build_session(targets, abilities, hits)
+    build_time = time.perf_counter() - start
+    print("Built session with", targets, "targets,", abilities, "abilities,", hits, "hits in", round(build_time, 2), "s")
+
+    running = time_it(refresh_running, session, 20)
+    recalculated = time_it(refresh_recalculated, session, 5)
+    print("Refresh from running totals:", round(running * 1000, 2), "ms")
+    print("Refresh by recalculating:   ", round(recalculated * 1000, 2), "ms (" + str(round(recalculated / running, 1)) + "x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+'''
+Benchmark for bytes-mode ingestion of existing logs (Parser.BYTES_INGESTION). Writes a large synthetic log with chat and foe attack lines
+(which the parser discards) mixed in between the player's combat events, and parses it serially with text-mode and bytes-mode ingestion.
+Each parse runs in its own process, so the CPU time and peak RSS reported are of that parse alone. Checks both give identical results,
+and that bytes mode parses the log after an invalid UTF-8 byte has been written into a chat line with a ## command, where text mode
+raises. The parallel parse and parsing a time range, which read the command lines on their own, have to parse that log too.
+
+Peak RSS comes from the resource module, so this runs on Linux and macOS.
+
+Usage (from the repo root):
+    python benchmarks/bench_bytes_ingestion.py [events] [noise lines per event]
+'''
+import os
+import sys
+import io
+import json
+import random
+import resource
+import subprocess
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from bench_memory import write_synthetic_log
+
+NOISE = [
+    "{stamp}[Local] Someone: anyone for a task force?",
+    "{stamp}Target {index} hits you with their Bash for 23.5 points of Smashing damage.",
+    "{stamp}Target {index} MISSES! Bash power had a 50.00% chance to hit, but rolled a 77.12.",
+    "{stamp}Someone heals you with their Healing Aura for 40.2 health points.",
+    "{stamp}[Broadcast] Ещё один игрок: все на Атлас-парк!",
+]
+
+
+def write_noisy_log(path, events, noise):
+    '''Writes the synthetic combat log with noise lines (on average) after each of its lines'''
+    source_path = path + ".source"
+    write_synthetic_log(source_path, events)
+    random.seed(20)
+    with open(source_path, "r", encoding="utf-8") as source, open(path, "w", encoding="utf-8") as file:
+        for line in source:
+            file.write(line)
+            stamp = line[:20]
+            for _ in range(int(noise) + (random.random() < noise % 1)):
+                file.write(random.choice(NOISE).format(stamp=stamp, index=random.randrange(2000)) + "\n")
+    os.remove(source_path)
+
+
+def get_range_start(log_path):
+    '''Returns the timestamp of the first line in the last quarter of the log, after the line corrupted by main'''
+    from combat.Timestamp import convert_timestamp
+    with open(log_path, "rb") as file:
+        file.seek(os.path.getsize(log_path) * 3 // 4)
+        file.readline()
+        line = file.readline().decode("utf-8")
+    return convert_timestamp(line[0:10], line[11:19])
+
+
+def child(log_path, bytes_ingestion, mode="serial"):
+    '''Parses the log in this process (serially, in worker processes or just its last quarter with process_log_range) and prints the
+    CPU time, peak RSS and a summary of the result as JSON'''
+    from combat.CombatParser import Parser
+    from bench_parallel import summarize
+    Parser.BYTES_INGESTION = bytes_ingestion
+    parser = Parser()
+    parser.PARSE_WORKERS = 2 if mode == "parallel" else 1
+    parser.PARALLEL_MIN_BYTES = 0
+    parser.PARSE_CACHE_SIZE = 0
+    before = resource.getrusage(resource.RUSAGE_SELF)
+    error = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            if mode == "range":
+                parser.process_log_range(log_path, get_range_start(log_path))
+            else:
+                parser.process_existing_log(log_path)
+        except UnicodeDecodeError as e:
+            error = str(e)
+    after = resource.getrusage(resource.RUSAGE_SELF)
+    peak = after.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    print(json.dumps({"cpu": after.ru_utime + after.ru_stime - before.ru_utime - before.ru_stime, "peak_rss": peak, "error": error,
+                      "lines": parser.line_count, "summary": repr(summarize(parser))}))
+
+
+def run(log_path, bytes_ingestion, mode="serial"):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", log_path, str(int(bytes_ingestion)), mode],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    noise = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, "chatlog.txt")
+        write_noisy_log(log_path, events, noise)
+        print("Log size:", round(os.path.getsize(log_path) / 1024 / 1024, 1), "MB,", noise, "noise lines per combat line")
+
+        text = run(log_path, False)
+        binary = run(log_path, True)
+        identical = text["summary"] == binary["summary"] and text["lines"] == binary["lines"]
+        print(f"  {'ingestion':>9} {'CPU s':>7} {'peak RSS MB':>12}")
+        for name, result in (("text", text), ("bytes", binary)):
+            print(f"  {name:>9} {result['cpu']:>7.2f} {result['peak_rss'] / 1024 / 1024:>12.1f}")
+        print("Identical results:", identical)
+
+        with open(log_path, "r+b") as file: # Corrupt a chat line in the middle of the log
+            file.seek(os.path.getsize(log_path) // 2)
+            file.readline()
+            position = file.tell()
+            file.write(b"2024-03-02 00:00:00 [Local] Someone: hi \xff\xfe ##SET_NAME x\n")
+        text = run(log_path, False)
+        binary = run(log_path, True)
+        parallel = run(log_path, True, "parallel")
+        time_range = run(log_path, True, "range")
+        print("Invalid UTF-8: text mode", "raised " + text["error"] if text["error"] else "parsed it",
+              "- bytes mode", "raised " + binary["error"] if binary["error"] else "parsed it")
+        for name, result in (("parallel", parallel), ("time range", time_range)):
+            print(f"  {name} parse:", "raised " + result["error"] if result["error"] else "parsed it")
+        parallel_identical = parallel["summary"] == binary["summary"]
+        print("  parallel parse identical to serial:", parallel_identical)
+    if not identical or binary["error"] or parallel["error"] or time_range["error"] or not parallel_identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3] == "1", sys.argv[4] if len(sys.argv) > 4 else "serial")
+    else:
+        main()
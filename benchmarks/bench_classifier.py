@@ -0,0 +1,82 @@
+'''
+Benchmark for Parser.extract_from_line - compares the old sequential regex loop against the EventClassifier.
+
+Usage (from the repo root):
+    python benchmarks/bench_classifier.py [path/to/chatlog.txt]
+
+With no log file a fixed mix of combat lines and chat noise is used. Both paths are checked to give identical results before timing.
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from combat.EventClassifier import EventClassifier
+from data.LogPatterns import PATTERNS
+
+SAMPLE_LINES = [
+    "2024-03-02 21:14:05 Welcome to City of Heroes, Tenkay!\n",
+    "2024-03-02 21:14:06 You activated the Fire Blast power.\n",
+    "2024-03-02 21:14:06 HIT Hellion Gunner! Your Fire Blast power had a 95.00% chance to hit, you rolled a 12.34.\n",
+    "2024-03-02 21:14:06 You hit Hellion Gunner with your Fire Blast for 62.56 points of Fire damage.\n",
+    "2024-03-02 21:14:06 You hit Hellion Gunner with your Fire Blast for 20.1 points of Fire damage over time.\n",
+    "2024-03-02 21:14:07 You hit Hellion Gunner with your Apocalypse: Chance for Negative Energy Damage for 107.1 points of Negative Energy damage.\n",
+    "2024-03-02 21:14:07 MISSED Hellion Blaster!! Your Fire Blast power had a 95.00% chance to hit, you rolled a 96.12.\n",
+    "2024-03-02 21:14:07 Fire Imp:  HIT Hellion Gunner! Your Brimstone power had a 75.00% chance to hit, you rolled a 10.00.\n",
+    "2024-03-02 21:14:07 Fire Imp:  You hit Hellion Gunner with your Brimstone for 21.4 points of Fire damage.\n",
+    "2024-03-02 21:14:08 You gain 1,234 experience and 567 influence.\n",
+    "2024-03-02 21:14:08 HIT Tenkay! Your Stamina power is autohit.\n",
+    "2024-03-02 21:14:09 [Local] Tenkay: ##SET_NAME Hellions\n",
+    "2024-03-02 21:14:09 [Local] Somebody: anyone for a Posi TF?\n",
+    "2024-03-02 21:14:09 [Broadcast] Seller: WTS purple recipes, send me a tell\n",
+    "2024-03-02 21:14:10 Hellion Gunner hits you with their Pistol for 12.5 points of Lethal damage.\n",
+    "2024-03-02 21:14:10 Hellion Gunner MISSES! Pistol power had a 50.00% chance to hit and rolled a 77.21.\n",
+    "2024-03-02 21:14:10 You are healed by your Health for 4.01 health points.\n",
+    "2024-03-02 21:14:11 [Tell] -->Friend: brb\n",
+    "2024-03-02 21:14:11 Your Stamina power is active.\n",
+    "2024-03-02 21:14:12 You have defeated Hellion Gunner\n",
+]
+
+
+def sequential_extract(patterns, log_line):
+    '''The original extract_from_line loop'''
+    for key, regex in patterns.items():
+        match = regex.match(log_line)
+        if match:
+            return (key, match.groupdict())
+    return '', []
+
+
+def bench(name, func, lines, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            func(line)
+    elapsed = time.perf_counter() - start
+    rate = len(lines) * repeat / elapsed
+    print(f"  {name:<24} {rate:>12,.0f} lines/sec")
+    return rate
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'r', encoding='utf-8', errors='replace') as file:
+            lines = file.readlines()
+        repeat = 1
+    else:
+        lines = SAMPLE_LINES
+        repeat = 20000
+
+    classifier = EventClassifier(PATTERNS)
+    for line in lines:
+        assert sequential_extract(PATTERNS, line) == classifier.classify(line), line
+
+    print(f"{len(lines) * repeat:,} lines")
+    before = bench("sequential regex loop", lambda line: sequential_extract(PATTERNS, line), lines, repeat)
+    after = bench("EventClassifier", classifier.classify, lines, repeat)
+    print(f"  speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
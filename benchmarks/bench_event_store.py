@@ -0,0 +1,107 @@
+'''
+Benchmark for the columnar EventStore (Parser.RECORD_EVENTS). Parses a large synthetic log with and without recording events, checks the
+store's vectorized aggregations against the combat model's running totals, and reports:
+    - the extra parse time for recording the events
+    - the memory used per recorded event, against the traced memory of the combat model per event
+    - the time for per-ability, per-target and DPS-over-time aggregations across every session, against looping through the model
+
+Usage (from the repo root):
+    python benchmarks/bench_event_store.py [events]
+'''
+import os
+import sys
+import io
+import gc
+import math
+import time
+import tempfile
+import contextlib
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from combat.CombatParser import Parser
+from combat.ParserConfig import ParserConfig
+from bench_memory import write_synthetic_log
+
+
+def parse(log_path, record, trace=False):
+    '''Parses the log with procs as separate abilities (so ability names match the store), returns (parser, seconds, traced bytes)'''
+    Parser.RECORD_EVENTS = record
+    parser = Parser(ParserConfig(ASSOCIATE_PROCS_TO_POWERS=False, PARSE_WORKERS=1, PARSE_CACHE_SIZE=0))
+    gc.collect()
+    if trace: tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser.process_existing_log(log_path)
+    seconds = time.perf_counter() - start
+    traced = 0
+    if trace:
+        traced = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    return parser, seconds, traced
+
+
+def model_aggregates(parser):
+    '''Per-ability and per-target damage across every session by looping through the combat model'''
+    abilities = defaultdict(float)
+    targets = defaultdict(float)
+    for session in parser.combat_session_data:
+        for character in session.chars.values():
+            for name, ability in character.abilities.items():
+                abilities[name] += ability.total_damage
+        for name, target in session.targets.items():
+            targets[name] += target.total_damage
+    return abilities, targets
+
+
+def store_aggregates(store):
+    return store.damage_totals("ability"), store.damage_totals("target"), store.dps_over_time(interval=60)
+
+
+def matches(expected, actual):
+    return expected.keys() == actual.keys() and all(math.isclose(expected[key], actual[key], rel_tol=1e-9, abs_tol=1e-6) for key in expected)
+
+
+def time_it(function, argument, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(argument)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = os.path.join(directory, "chatlog.txt")
+            write_synthetic_log(log_path, events)
+            model_bytes = parse(log_path, False, trace=True)[2]
+            plain_time = parse(log_path, False)[1]
+            parser, record_time = parse(log_path, True)[:2]
+    finally:
+        Parser.RECORD_EVENTS = False
+
+    store = parser.event_store
+    rows = len(store)
+    print("Recorded", rows, "events from", parser.line_count, "lines in", len(parser.combat_session_data), "sessions")
+    print("Parse time:", round(plain_time, 2), "s without recording,", round(record_time, 2), "s with (+" + str(round((record_time / plain_time - 1) * 100, 1)) + "%)")
+    print("Memory per event:", round(store.nbytes() / rows, 1), "bytes in the store, against", round(model_bytes / rows), "bytes for the combat model (traced memory divided by the same events)")
+
+    abilities, targets = model_aggregates(parser)
+    store_abilities, store_targets, dps = store_aggregates(store)
+    sessions = {index: session.total_damage for index, session in enumerate(parser.combat_session_data) if session.total_damage}
+    consistent = matches(abilities, store_abilities) and matches(targets, store_targets) and matches(sessions, store.session_totals())
+    print("Store aggregates match the combat model:", consistent)
+    if not consistent:
+        sys.exit(1)
+
+    model = time_it(model_aggregates, parser)
+    vectorized = time_it(store_aggregates, store)
+    print("Per-ability and per-target totals across every session:", round(model * 1000, 2), "ms from the model,",
+          round(vectorized * 1000, 2), "ms from the store (including DPS over time)")
+
+
+if __name__ == "__main__":
+    main()
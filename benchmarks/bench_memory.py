@@ -0,0 +1,130 @@
+'''
+Memory benchmark for the combat data model - parses a large synthetic log with the plain __slots__ model classes and again with
+QObject-based copies of the same classes (how the model used to be defined), and reports for each:
+    - the tracemalloc peak while parsing, and the traced memory still held by the finished sessions per event
+    - how many model objects (sessions, characters, abilities, damage components) were created per event
+    - the growth in peak RSS, which also includes the C++ side of each QObject that tracemalloc can't see
+
+Each model is run in a fresh interpreter so they don't share any memory.
+
+Usage (from the repo root):
+    python benchmarks/bench_memory.py [events]
+'''
+import os
+import sys
+import io
+import gc
+import json
+import random
+import resource
+import tempfile
+import contextlib
+import subprocess
+import tracemalloc
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+DAMAGE_TYPES = ["Fire", "Smashing", "Negative Energy", "Toxic", "Cold"]
+PROCS = ["Apocalypse: Chance for Negative Energy Damage", "Bombardment: Chance for Fire Damage"]
+
+
+def write_synthetic_log(path, events, targets=2000, abilities=30, fight_length=400):
+    '''Writes a log of power activations, hit rolls, damage and procs spread across many targets, with a quiet gap after every fight'''
+    random.seed(10)
+    time = 0
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("2024-03-02 00:00:00 Welcome to City of Heroes, Benchmark!\n")
+        written = 0
+        while written < events:
+            time += 1
+            stamp = "2024-03-{:02d} {:02d}:{:02d}:{:02d} ".format(2 + time // 86400, time // 3600 % 24, time // 60 % 60, time % 60)
+            target = "Target " + str(random.randrange(targets))
+            index = random.randrange(abilities)
+            ability = "Ability " + str(index)
+            damage_type = DAMAGE_TYPES[index % len(DAMAGE_TYPES)]
+            file.write(stamp + "You activated the " + ability + " power.\n")
+            file.write(stamp + "HIT " + target + "! Your " + ability + " power had a 95.00% chance to hit, you rolled a 12.34.\n")
+            file.write(stamp + "You hit " + target + " with your " + ability + " for " + str(round(random.uniform(10, 300), 2))
+                       + " points of " + damage_type + " damage.\n")
+            written += 3
+            if random.random() < 0.1:
+                file.write(stamp + "You hit " + target + " with your " + random.choice(PROCS) + " for 107.1 points of Negative Energy damage.\n")
+                written += 1
+            if written % fight_length < 4:
+                time += 60 # Longer than the session timeout, so a new session starts
+
+
+def legacy_model(cls):
+    '''Returns a QObject subclass with the same methods as one of the __slots__ model classes, like the model was before'''
+    from PyQt5.QtCore import QObject
+    namespace = {key: value for key, value in vars(cls).items() if key not in cls.__slots__ and key not in ("__slots__", "__dict__", "__weakref__")}
+    init = cls.__init__
+
+    def __init__(self, *args, **kwargs):
+        QObject.__init__(self)
+        init(self, *args, **kwargs)
+
+    namespace["__init__"] = __init__
+    return type(cls.__name__, (QObject,), namespace)
+
+
+def run_model(model, log_path):
+    '''Parses the log with one of the models and returns the measurements as a dict, run in its own process'''
+    from PyQt5.QtCore import QCoreApplication
+    import combat.CombatParser as CombatParser
+    import combat.CombatSession as CombatSession
+    app = QCoreApplication([])
+
+    classes = [CombatParser.CombatSession, CombatParser.Character, CombatParser.Ability, CombatParser.DamageComponent]
+    if model == "qobject":
+        classes = [legacy_model(cls) for cls in classes]
+        CombatParser.CombatSession, CombatParser.Character, CombatParser.Ability, CombatParser.DamageComponent = classes
+        CombatSession.Character = classes[1]
+
+    parser = CombatParser.Parser()
+    parser.PARSE_CACHE_SIZE = 0
+    gc.collect()
+    rss_start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser.process_existing_log(log_path)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_start
+
+    gc.collect()
+    objects = sum(1 for obj in gc.get_objects() if type(obj) in classes)
+    events = parser.line_count
+    return {
+        "events": events,
+        "sessions": len(parser.combat_session_data),
+        "peak_mb": round(peak / 1024 / 1024, 1),
+        "bytes_per_event": round(current / events),
+        "objects_per_event": round(objects / events, 2),
+        "rss_growth_mb": round(rss_growth / 1024, 1),
+    }
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--run":
+        print(json.dumps(run_model(sys.argv[2], sys.argv[3])))
+        return
+
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, "chatlog.txt")
+        write_synthetic_log(log_path, events)
+        results = {}
+        for model in ["qobject", "slots"]:
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--run", model, log_path], capture_output=True, text=True, check=True)
+            results[model] = json.loads(output.stdout.strip().splitlines()[-1])
+
+    print("Parsed", results["slots"]["events"], "events into", results["slots"]["sessions"], "sessions")
+    print(f"  {'':<24} {'QObject':>10} {'__slots__':>10}")
+    for key in ["peak_mb", "bytes_per_event", "objects_per_event", "rss_growth_mb"]:
+        print(f"  {key:<24} {results['qobject'][key]:>10} {results['slots'][key]:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+'''
+Benchmark for merging combat aggregates (CombatSession.merge and merge_sessions). Splits a log into parts at random session
+boundaries (gaps longer than the session timeout), parses each part on its own, then times merging the parts' aggregates against
+parsing the whole log again. tests/test_merge.py checks the merged statistics are the same as the whole log's.
+
+Usage (from the repo root):
+    python benchmarks/bench_merge.py [events] [trials]
+'''
+import os
+import sys
+import io
+import time
+import random
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from combat.CombatParser import Parser
+from combat.CombatSession import merge_sessions
+from combat import LogChunks
+from bench_memory import write_synthetic_log
+
+
+def parse(log_path, player_name):
+    parser = Parser()
+    parser.PARSE_WORKERS = 1
+    parser.PARSE_CACHE_SIZE = 0
+    parser.PLAYER_NAME = player_name # Parts after the first don't have the welcome message
+    if player_name: parser.PATTERNS = parser.update_regex_player_name(player_name)
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser.process_existing_log(log_path)
+    return parser
+
+
+def write_parts(log_path, offsets, directory):
+    '''Writes the log split at the given byte offsets into separate files, returns their paths'''
+    with open(log_path, "rb") as file:
+        data = file.read()
+    bounds = [0] + offsets + [len(data)]
+    paths = []
+    for index, (start, end) in enumerate(zip(bounds, bounds[1:])):
+        path = os.path.join(directory, "part" + str(index) + ".txt")
+        with open(path, "wb") as part:
+            part.write(data[start:end])
+        paths.append(path)
+    return paths
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    trials = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    random.seed(13)
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, "chatlog.txt")
+        write_synthetic_log(log_path, events)
+
+        start = time.perf_counter()
+        whole = parse(log_path, "")
+        parse_time = time.perf_counter() - start
+        boundaries = [start for start, end in LogChunks.find_chunk_boundaries(log_path, whole.COMBAT_SESSION_TIMEOUT, 64)][1:]
+        print("Parsed", whole.line_count, "lines into", len(whole.combat_session_data), "sessions in", round(parse_time, 2), "s,",
+              len(boundaries), "session boundaries to split at")
+
+        for trial in range(trials):
+            offsets = sorted(random.sample(boundaries, random.randint(1, min(6, len(boundaries)))))
+            parts = [parse(path, whole.PLAYER_NAME) for path in write_parts(log_path, offsets, directory)]
+            aggregates = [merge_sessions(part.combat_session_data) for part in parts]
+
+            start = time.perf_counter()
+            merge_sessions(aggregates)
+            merge_time = time.perf_counter() - start
+            print(f"  split into {len(parts)} parts: merged in {merge_time * 1000:.2f} ms"
+                  f" ({parse_time / merge_time:.0f}x faster than parsing again)")
+
+
+if __name__ == "__main__":
+    main()
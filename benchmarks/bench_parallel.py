@@ -0,0 +1,69 @@
+'''
+Scaling benchmark for parsing an existing log in worker processes - parses a large synthetic log serially and then with 2, 4 and 8
+workers, checks every parallel result is identical to the serial one, and reports the wall time and speedup of each.
+The speedup is limited by the number of CPU cores, which is printed first.
+
+Usage (from the repo root):
+    python benchmarks/bench_parallel.py [events] [log file]
+'''
+import os
+import sys
+import io
+import time
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from combat.CombatParser import Parser
+from bench_memory import write_synthetic_log
+
+WORKERS = [1, 2, 4, 8]
+
+
+def summarize(parser):
+    '''Returns everything parsed from the log as plain values, for comparing the serial and parallel results'''
+    sessions = []
+    for session in parser.combat_session_data:
+        characters = []
+        for character in list(session.chars.values()) + list(session.targets.values()):
+            abilities = [(ability.name, ability.count, ability.hits, ability.tries, ability.total_damage,
+                          [(component.name, component.count, component.total_damage, component.parent_hits) for component in ability.damage])
+                         for ability in character.abilities.values()]
+            characters.append((character.name, character.total_damage, character.hits, character.tries, abilities))
+        sessions.append((session.name, session.start_time, session.end_time, session.duration, session.exp_value, session.inf_value, characters))
+    totals = (parser.line_count, parser.EXP_VALUE, parser.INF_VALUE, parser.global_combat_duration, parser.session_name_count, parser.PLAYER_NAME)
+    return sessions, totals
+
+
+def parse(log_path, workers):
+    '''Parses the log with the given number of workers, returns (seconds, summary)'''
+    parser = Parser()
+    parser.PARSE_WORKERS = workers
+    parser.PARSE_CACHE_SIZE = 0
+    parser.PARALLEL_MIN_BYTES = 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser.process_existing_log(log_path)
+    return time.perf_counter() - start, summarize(parser)
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 400000
+    print("CPU cores:", os.cpu_count())
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(directory, "chatlog.txt")
+        if len(sys.argv) <= 2:
+            write_synthetic_log(log_path, events)
+        print("Log size:", round(os.path.getsize(log_path) / 1024 / 1024, 1), "MB")
+
+        serial_time, expected = parse(log_path, 1)
+        print(f"  {'workers':>8} {'seconds':>10} {'speedup':>10}  identical")
+        print(f"  {1:>8} {serial_time:>10.2f} {1:>10.2f}  -")
+        for workers in WORKERS[1:]:
+            seconds, result = parse(log_path, workers)
+            print(f"  {workers:>8} {seconds:>10.2f} {serial_time / seconds:>10.2f}  {result == expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+'''
+Benchmark for the on-disk parse cache (combat.ParseCache). Writes the first part of a large synthetic log and parses it, then reopens it
+unchanged, reopens it after the rest of the log has been appended, and reopens it after it has been truncated. Checks each result is
+identical to parsing the log from scratch, and reports the time of each against a full parse along with the size of the cache entry.
+Also checks an entry too large for the cache isn't written, and that making room for a new entry never removes that entry.
+
+Usage (from the repo root):
+    python benchmarks/bench_parse_cache.py [events]
+'''
+import os
+import sys
+import io
+import time
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from combat.CombatParser import Parser
+from combat.ParseCache import ParseCache, ENTRY_EXTENSION
+from bench_memory import write_synthetic_log
+from bench_parallel import summarize
+
+CACHE_SIZE = 1024 # MB
+
+
+def parse(log_path, cache_directory=None):
+    '''Parses the log serially, using the cache in the given directory (or none), returns (seconds, summary)'''
+    parser = Parser()
+    parser.PARSE_WORKERS = 1
+    parser.PARSE_CACHE_SIZE = CACHE_SIZE if cache_directory else 0
+    if cache_directory: parser.get_parse_cache = lambda: ParseCache(cache_directory, CACHE_SIZE * 1024 * 1024)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser.process_existing_log(log_path)
+    return time.perf_counter() - start, summarize(parser)
+
+
+def check_size_limit(log_path, directory):
+    '''Stores a state of 1 MB of random bytes for two logs in a cache only large enough for one entry, returns True if the second entry
+    evicts the first rather than itself, and a state larger than the cache is skipped and removes the log's old entry'''
+    state = os.urandom(1024 * 1024) # Doesn't compress
+    other_path = log_path + ".other"
+    with open(other_path, "wb") as file:
+        file.write(b"2024-03-01 00:00:00 Welcome to City of Heroes, Other!\n")
+    cache = ParseCache(os.path.join(directory, "small cache"), len(state) * 3 // 2)
+    cache.store(log_path, 1, state)
+    cache.store(other_path, 1, state)
+    evicted = cache.load(log_path) is None and cache.load(other_path) is not None
+    cache.store(other_path, 1, state * 2)
+    skipped = not os.path.exists(cache.get_entry_path(other_path))
+    print("Newest entry kept when evicting:", evicted, "- entry too large for the cache skipped:", skipped)
+    return evicted and skipped
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, "source.txt")
+        log_path = os.path.join(directory, "chatlog.txt")
+        cache_directory = os.path.join(directory, "cache")
+        write_synthetic_log(source_path, events)
+        with open(source_path, "rb") as file:
+            data = file.read()
+        split = data.index(b"\n", len(data) * 3 // 4) + 1 # The first three quarters were parsed earlier in the day
+
+        with open(log_path, "wb") as file:
+            file.write(data[:split])
+        first_time = parse(log_path, cache_directory)[0]
+        entry_bytes = sum(os.path.getsize(os.path.join(cache_directory, name)) for name in os.listdir(cache_directory)
+                          if name.endswith(ENTRY_EXTENSION))
+        print("Parsed", round(split / 1024 / 1024, 1), "MB in", round(first_time, 2), "s, cache entry of", round(entry_bytes / 1024 / 1024, 1), "MB")
+
+        print(f"  {'reopened':>24} {'seconds':>8} {'full parse s':>13}  identical")
+        identical = True
+        steps = [("unchanged", "ab", b""), ("with a quarter appended", "ab", data[split:]), ("after being truncated", "wb", data[:split // 2])]
+        for name, mode, written in steps:
+            if written:
+                with open(log_path, mode) as file:
+                    file.write(written)
+            seconds, result = parse(log_path, cache_directory)
+            full_time, expected = parse(log_path)
+            identical = identical and result == expected
+            print(f"  {name:>24} {seconds:>8.2f} {full_time:>13.2f}  {result == expected}")
+        limited = check_size_limit(log_path, directory)
+    if not identical or not limited:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+'''
+Benchmark for Parser.find_player_name, which runs before live monitoring starts. Writes synthetic logs of increasing size where the player
+logged in again as another character near the end, and checks the name found is that last one. Reports the time to find it, and the time
+when the only welcome message is the first line (the whole log is searched), against reading every line of the log.
+
+Usage (from the repo root):
+    python benchmarks/bench_player_name.py [events...]
+'''
+import os
+import sys
+import io
+import time
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from combat.CombatParser import Parser
+from bench_memory import write_synthetic_log
+
+RELOG = "2024-03-03 00:00:00 Welcome to City of Heroes, Relogged!\n"
+TAIL_LINES = 1000 # Lines written after the relog
+
+
+def find(log_path):
+    '''Returns (seconds, player name) for find_player_name on the log'''
+    parser = Parser()
+    parser.LOG_FILE_PATH = log_path
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        name = parser.find_player_name()
+    return time.perf_counter() - start, name
+
+
+def read_every_line(log_path):
+    start = time.perf_counter()
+    with open(log_path, "r", encoding="utf-8") as file:
+        for line in file:
+            pass
+    return time.perf_counter() - start
+
+
+def main():
+    sizes = [int(value) for value in sys.argv[1:]] or [100000, 400000, 1600000]
+    found = True
+    print(f"  {'MB':>6} {'relogged ms':>12} {'top only ms':>12} {'read lines ms':>14}  found")
+    with tempfile.TemporaryDirectory() as directory:
+        for events in sizes:
+            log_path = os.path.join(directory, "chatlog.txt")
+            write_synthetic_log(log_path, events)
+            top_time, top_name = find(log_path)
+            with open(log_path, "r", encoding="utf-8") as file:
+                tail = [line for _, line in zip(range(TAIL_LINES), file)][1:]
+            with open(log_path, "a", encoding="utf-8") as file:
+                file.write(RELOG)
+                file.writelines(tail)
+            relog_time, relog_name = find(log_path)
+            read_time = read_every_line(log_path)
+            correct = top_name == "Benchmark" and relog_name == "Relogged"
+            found = found and correct
+            megabytes = os.path.getsize(log_path) / 1024 / 1024
+            print(f"  {megabytes:>6.1f} {relog_time * 1000:>12.2f} {top_time * 1000:>12.2f} {read_time * 1000:>14.2f}  {correct}")
+    if not found:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
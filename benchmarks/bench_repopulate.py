@@ -0,0 +1,71 @@
+'''
+Benchmark for MainUI.repopulate - fills the ability trees from a synthetic session with many targets, then times the periodic refreshes
+that follow, which is what runs every 250 ms during live monitoring. The refreshes are timed with the enemies collapsed and then with
+every enemy expanded.
+
+Usage (from the repo root, no display needed):
+    python benchmarks/bench_repopulate.py [targets] [abilities]
+'''
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from PyQt5.QtWidgets import QApplication
+from combat.CombatParser import CombatSession, Character, Ability, DamageComponent
+from ui.MainUI import MainUI
+
+DAMAGE_TYPES = ["Fire", "Smashing", "Negative Energy"]
+
+
+def build_session(targets, abilities):
+    '''Builds a session where the player has used every ability on every target'''
+    session = CombatSession(0, "Benchmark 1")
+    session.duration = 600
+    player = Character("Player", "player")
+    session.add_character(player)
+    for t in range(targets):
+        target = Character("Target " + str(t), "enemy")
+        session.targets[target.name] = target
+        for a in range(abilities):
+            for char in [player, target]:
+                name = "Ability " + str(a)
+                if name not in char.abilities:
+                    char.add_ability(name, Ability(name, True))
+                ability = char.abilities[name]
+                ability.ability_used()
+                ability.add_damage(DamageComponent(DAMAGE_TYPES[a % len(DAMAGE_TYPES)]), 10.0 + a)
+    return session
+
+
+def main():
+    targets = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    abilities = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    refreshes = 5
+
+    app = QApplication(sys.argv)
+    ui = MainUI()
+    session = build_session(targets, abilities)
+    print(f"{targets} targets x {abilities} abilities")
+
+    start = time.perf_counter()
+    ui.repopulate(session)
+    print(f"  first populate      {time.perf_counter() - start:8.3f} s")
+
+    start = time.perf_counter()
+    for _ in range(refreshes):
+        ui.repopulate(session)
+    print(f"  refresh (average)   {(time.perf_counter() - start) / refreshes:8.3f} s")
+
+    # Worst case, every enemy expanded so all of their rows have been fetched by the view
+    ui.ability_tree_display_enemies.expandAll()
+    start = time.perf_counter()
+    for _ in range(refreshes):
+        ui.repopulate(session)
+    print(f"  expanded refresh    {(time.perf_counter() - start) / refreshes:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
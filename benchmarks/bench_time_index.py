@@ -0,0 +1,87 @@
+'''
+Benchmark for the TimeIndex and parsing a time range of a log (Parser.process_log_range). Writes a large synthetic log and reports:
+    - the time to sample the index from scratch, and its size
+    - the time to parse an hour from the middle of the log, against parsing the whole log
+    - the time to find the parallel parse split points with and without the index, and whether they are the same
+Checks the range parse gives the same sessions as parsing a copy of just those lines.
+
+Usage (from the repo root):
+    python benchmarks/bench_time_index.py [events]
+'''
+import os
+import sys
+import io
+import time
+import pickle
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from combat.CombatParser import Parser
+from combat.TimeIndex import TimeIndex
+from combat import LogChunks
+from bench_memory import write_synthetic_log
+from bench_parallel import summarize
+
+RANGE_SECONDS = 3600
+
+
+def parse(log_path, time_range=None, player_name=None):
+    '''Parses the log (or a time range of it) serially, returns (seconds, parser)'''
+    parser = Parser()
+    parser.PARSE_WORKERS = 1
+    parser.PARSE_CACHE_SIZE = 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if player_name is not None: parser.set_player_name(player_name) # A copy of part of the log doesn't have the welcome message
+        if time_range is None: parser.process_existing_log(log_path)
+        else: parser.process_log_range(log_path, *time_range)
+    return time.perf_counter() - start, parser
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, "chatlog.txt")
+        write_synthetic_log(log_path, events)
+        size = os.path.getsize(log_path)
+        print("Log size:", round(size / 1024 / 1024, 1), "MB")
+
+        start = time.perf_counter()
+        index = TimeIndex()
+        index.update(log_path)
+        index_time = time.perf_counter() - start
+        print("Sampled", len(index), "index entries in", round(index_time * 1000, 1), "ms,", round(len(pickle.dumps(index)) / 1024, 1), "KB pickled")
+
+        middle = index.timestamps[len(index) // 2]
+        time_range = (middle, middle + RANGE_SECONDS)
+        range_time, ranged = parse(log_path, time_range)
+        full_time = parse(log_path)[0]
+        print("Parsed an hour of the log in", round(range_time, 2), "s, against", round(full_time, 2), "s for the whole log")
+
+        copy_path = os.path.join(directory, "range.txt")
+        with open(log_path, "rb") as file, open(copy_path, "wb") as copy:
+            file.seek(index.find_offset(log_path, time_range[0]))
+            copy.write(file.read(index.find_offset(log_path, time_range[1]) - file.tell()))
+        copied = parse(copy_path, player_name=ranged.PLAYER_NAME)[1]
+        identical = summarize(ranged)[0] == summarize(copied)[0]
+        print("Same sessions as parsing a copy of the range:", identical)
+
+        print(f"  {'timeout':>7} {'chunks':>6} {'scan ms':>8} {'indexed ms':>11}  same")
+        for timeout in (15, 60):
+            for chunks in (8, 32):
+                start = time.perf_counter()
+                scanned = LogChunks.find_chunk_boundaries(log_path, timeout, chunks)
+                scan_time = time.perf_counter() - start
+                start = time.perf_counter()
+                indexed = LogChunks.find_chunk_boundaries(log_path, timeout, chunks, time_index=index)
+                indexed_time = time.perf_counter() - start
+                identical = identical and scanned == indexed
+                print(f"  {timeout:>7} {chunks:>6} {scan_time * 1000:>8.1f} {indexed_time * 1000:>11.1f}  {scanned == indexed}")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
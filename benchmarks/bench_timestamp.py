@@ -0,0 +1,46 @@
+'''
+Micro-benchmark for Parser.convert_timestamp - compares the old strptime conversion against combat.Timestamp.
+
+Usage (from the repo root):
+    python benchmarks/bench_timestamp.py
+
+tests/test_timestamp.py checks both give the same time of day.
+'''
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from combat import Timestamp
+
+
+def strptime_convert_timestamp(date, time):
+    '''The original Parser.convert_timestamp'''
+    timestamp = datetime.strptime(date + " " + time, "%Y-%m-%d %H:%M:%S")
+    return timestamp.hour * 3600 + timestamp.minute * 60 + timestamp.second
+
+
+def bench(name, func, samples, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for date, time_str in samples:
+            func(date, time_str)
+    elapsed = time.perf_counter() - start
+    rate = len(samples) * repeat / elapsed
+    print(f"  {name:<28} {rate:>12,.0f} calls/sec")
+    return rate
+
+
+def main():
+    samples = [("2024-03-02", "{:02}:{:02}:{:02}".format(h, m, s)) for h in range(21, 24) for m in range(60) for s in range(0, 60, 7)]
+    repeat = 50
+    print(f"{len(samples) * repeat:,} conversions")
+    before = bench("datetime.strptime", strptime_convert_timestamp, samples, repeat)
+    after = bench("Timestamp.convert_timestamp", Timestamp.convert_timestamp, samples, repeat)
+    print(f"  speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
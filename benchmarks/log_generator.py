@@ -0,0 +1,370 @@
+'''
+Deterministic generator of synthetic City of Heroes chat logs, for load testing the parser and the UI at production volumes. The lines
+are written the way the game writes them, and cover every event in PATTERNS: power activations, hit rolls (with streakbreaker hits),
+damage (with flairs and damage over time), procs, the player's pets and pseudopets (data/pseudopets.py), rewards, welcome messages,
+autohit lines and ## chat commands, mixed with chat and other lines that aren't events. How often each kind of line appears is set by
+the proportions given (DEFAULT_PROPORTIONS by default).
+
+Combat comes in fights of fight_lines lines, each followed by a quiet gap longer than the default session timeout, so the log splits
+into many sessions. The same seed, proportions and start time always give the same log, byte for byte.
+
+Usage (from the repo root):
+    python benchmarks/log_generator.py OUTPUT --size 1G [--seed N] [--proportion KIND=WEIGHT ...]
+    python benchmarks/log_generator.py OUTPUT --live RATE [--duration SECONDS]   appends RATE lines per second, to simulate live play
+    python benchmarks/log_generator.py --check                                   checks every kind of line is classified as expected
+'''
+import os
+import re
+import sys
+import time
+import random
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from combat.EventClassifier import EventClassifier
+from combat.Timestamp import convert_timestamp, format_timestamp
+from data.LogPatterns import PATTERNS
+from data.pseudopets import PSEUDOPETS
+
+DEFAULT_PLAYER_NAME = "Benchmark"
+DEFAULT_START_TIME = convert_timestamp("2024-03-02", "18:00:00")
+BATCH_LINES = 4096 # Lines generated between writes
+
+# The kinds of line the generator writes and the event each is classified as, None for lines that aren't events
+KIND_EVENTS = {
+    "activate": "player_ability_activate",
+    "hit_roll": "player_hit_roll",
+    "miss_roll": "player_hit_roll",
+    "streakbreaker": "player_hit_roll",
+    "damage": "player_damage",
+    "damage_flair": "player_damage",
+    "damage_over_time": "player_damage",
+    "proc": "player_damage",
+    "pet_hit_roll": "player_pet_hit_roll",
+    "pet_damage": "player_pet_damage",
+    "pseudopet_damage": "player_pet_damage",
+    "reward_both": "reward_gain_both",
+    "reward_exp": "reward_gain_exp",
+    "reward_inf": "reward_gain_inf",
+    "welcome": "player_name",
+    "autohit": "player_name_backup",
+    "command": "command",
+    "chat": None,
+    "noise": None,
+}
+
+# Relative weights of each kind of line, roughly those of a log of a player with pets farming
+DEFAULT_PROPORTIONS = {
+    "activate": 12, "hit_roll": 14, "miss_roll": 4, "streakbreaker": 0.3, "damage": 30, "damage_flair": 3, "damage_over_time": 4,
+    "proc": 3, "pet_hit_roll": 5, "pet_damage": 7, "pseudopet_damage": 4, "reward_both": 1, "reward_exp": 0.2, "reward_inf": 0.2,
+    "welcome": 0.01, "autohit": 0.5, "command": 0.02, "chat": 5, "noise": 8,
+}
+
+POWERS = (("Fire Blast", "Fire"), ("Fire Ball", "Fire"), ("Blaze", "Fire"), ("Blazing Bolt", "Fire"), ("Inferno", "Fire"),
+          ("Char", "Fire"), ("Ice Blast", "Cold"), ("Bitter Ice Blast", "Cold"), ("Frost Breath", "Cold"), ("Brawl", "Smashing"),
+          ("Moonbeam", "Negative Energy"), ("Life Drain", "Negative Energy"), ("Psionic Lance", "Psionic"), ("Sting of the Manticore", "Toxic"))
+PETS = (("Fire Imp", (("Brimstone", "Fire"), ("Scorch", "Fire"))), ("Phantasm", (("Energy Blast", "Energy"), ("Power Bolt", "Energy"))),
+        ("Zombie", (("Grave Claws", "Lethal"), ("Vomit", "Toxic"))), ("Battle Drone", (("Pulse Rifle Blast", "Energy"),)),
+        ("Animated Stone", (("Hurl Boulder", "Smashing"), ("Stone Fist", "Smashing"))))
+PROCS = (("Apocalypse: Chance for Negative Energy Damage", "Negative Energy"), ("Gladiator's Javelin: Chance for Toxic Damage", "Toxic"),
+         ("Shield Breaker: Chance for Lethal Damage", "Lethal"), ("Positron's Blast: Chance of Damage(Energy)", "Energy"),
+         ("Doublehit", "Smashing"))
+PSEUDOPET_TYPES = ("Fire", "Lethal", "Cold", "Energy", "Toxic", "Smashing")
+FLAIRS = ("CRITICAL", "SCOURGE", "ASSASSINATION")
+ENEMIES = ("Hellion Blaster", "Hellion Gunner", "Skull Bonebreaker", "Skull Painbringer", "Hamidon", "Freak Tank", "Rikti Drone",
+           "Rikti Chief Soldier", "Council Galaxy", "Carnival Illusionist", "Crey Tank", "Malta Gunslinger", "Nemesis Lance",
+           "Arachnos Mu Guardian", "Devouring Earth Quartz Emanator", "Knives of Artemis Dart Man", "Sky Raider Engineer", "Vahzilok Reaper")
+ENEMY_POWERS = (("Pistol", "Lethal"), ("Punch", "Smashing"), ("Fire Blast", "Fire"), ("Slash", "Lethal"), ("Dark Blast", "Negative Energy"))
+CHAT = (("[Local]", "Someone", "anyone for a task force?"), ("[Broadcast]", "Trader", "WTS Luck of the Gambler: Recharge Speed, PST"),
+        ("[Help]", "Newbie", "how do I get to Atlas Park?"), ("[LookingForGroup]", "Leader", "LF3M ITF, need tank"),
+        ("[Team]", "Friend", "pulling the next group"), ("[Broadcast]", "Ещё один игрок", "все на Атлас-парк!"),
+        ("[Local]", "Someone", "## not a command, just chatting"), ("[Tell]", "-->Friend", "brb"))
+SESSION_NAMES = ("Farm", "Task Force", "Trial", "Pylon", "Arena")
+
+
+class LogGenerator:
+    '''Generates the lines of a synthetic log. Every random choice comes from its own random.Random, so the lines only depend on the
+    arguments. The log's clock starts at start_time (seconds since the epoch, as from convert_timestamp) and advances by a second for
+    about every lines_per_second lines, so fights run at the pace of real combat.'''
+
+    def __init__(self, seed=0, proportions=None, player_name=DEFAULT_PLAYER_NAME, start_time=DEFAULT_START_TIME, fight_lines=400,
+                 gap_seconds=(30, 180), lines_per_second=3):
+        proportions = DEFAULT_PROPORTIONS if proportions is None else proportions
+        unknown = [kind for kind in proportions if kind not in KIND_EVENTS]
+        if unknown:
+            raise ValueError("Unknown kind of line: " + ", ".join(unknown))
+        self.kinds = [kind for kind in KIND_EVENTS if proportions.get(kind, 0) > 0]
+        if not self.kinds:
+            raise ValueError("Every proportion is 0")
+        self.cumulative_weights = []
+        total = 0
+        for kind in self.kinds:
+            total += proportions[kind]
+            self.cumulative_weights.append(total)
+        self.random = random.Random(seed)
+        self.player_name = player_name
+        self.time = start_time
+        self.fight_lines = fight_lines
+        self.gap_seconds = gap_seconds
+        self.tick_chance = 1 / lines_per_second
+        self.line_number = 0
+        self.stamp_time = None # The timestamp formatted for the last line, most lines share it with the one before
+        self.stamp = ""
+        self.writers = {kind: getattr(self, "write_" + kind) for kind in self.kinds}
+
+    def get_stamp(self):
+        if self.time != self.stamp_time:
+            self.stamp_time = self.time
+            self.stamp = format_timestamp(self.time) + " "
+        return self.stamp
+
+    def first_line(self):
+        '''Returns the welcome message a log starts with, which gives the parser the player name'''
+        return self.get_stamp() + "Welcome to City of Heroes, " + self.player_name + "!\n"
+
+    def generate(self, count):
+        '''Returns a list of (kind, line) for the next count lines, each line ending with a newline'''
+        random_value = self.random.random
+        lines = []
+        for kind in self.random.choices(self.kinds, cum_weights=self.cumulative_weights, k=count):
+            self.line_number += 1
+            if self.line_number % self.fight_lines == 0:
+                self.time += self.random.randint(*self.gap_seconds) # Longer than the session timeout, the next line starts a new session
+            elif random_value() < self.tick_chance:
+                self.time += 1
+            lines.append((kind, self.get_stamp() + self.writers[kind]() + "\n"))
+        return lines
+
+    def lines(self, count):
+        '''Returns the next count lines as one string'''
+        return "".join(line for kind, line in self.generate(count))
+
+    def damage_value(self, low=5, high=400):
+        return str(round(self.random.uniform(low, high), 2))
+
+    def hit_roll_text(self, hit=True):
+        chance = self.random.uniform(5, 95)
+        roll = self.random.uniform(0, chance) if hit else self.random.uniform(chance, 100)
+        return "power had a " + format(chance, ".2f") + "% chance to hit, you rolled a " + format(roll, ".2f") + "."
+
+    def write_activate(self):
+        return "You activated the " + self.random.choice(POWERS)[0] + " power."
+
+    def write_hit_roll(self):
+        return "HIT " + self.random.choice(ENEMIES) + "! Your " + self.random.choice(POWERS)[0] + " " + self.hit_roll_text()
+
+    def write_miss_roll(self):
+        return "MISSED " + self.random.choice(ENEMIES) + "!! Your " + self.random.choice(POWERS)[0] + " " + self.hit_roll_text(False)
+
+    def write_streakbreaker(self):
+        return "HIT " + self.random.choice(ENEMIES) + "! Your " + self.random.choice(POWERS)[0] + " power was forced to hit by streakbreaker."
+
+    def write_damage(self):
+        power, damage_type = self.random.choice(POWERS)
+        return "You hit " + self.random.choice(ENEMIES) + " with your " + power + " for " + self.damage_value() + " points of " + damage_type + " damage."
+
+    def write_damage_flair(self):
+        power, damage_type = self.random.choice(POWERS)
+        return ("You hit " + self.random.choice(ENEMIES) + " with your " + power + " for " + self.damage_value(100, 800) + " points of "
+                + damage_type + " damage (" + self.random.choice(FLAIRS) + ").")
+
+    def write_damage_over_time(self):
+        power, damage_type = self.random.choice(POWERS)
+        return ("You hit " + self.random.choice(ENEMIES) + " with your " + power + " for " + self.damage_value(5, 60) + " points of "
+                + damage_type + " damage over time.")
+
+    def write_proc(self):
+        proc, damage_type = self.random.choice(PROCS)
+        return "You hit " + self.random.choice(ENEMIES) + " with your " + proc + " for 107.1 points of " + damage_type + " damage."
+
+    def write_pet_hit_roll(self):
+        pet, powers = self.random.choice(PETS)
+        hit = self.random.random() < 0.8
+        return (pet + ":  " + ("HIT " if hit else "MISSED ") + self.random.choice(ENEMIES) + "! Your " + self.random.choice(powers)[0] + " "
+                + self.hit_roll_text(hit))
+
+    def write_pet_damage(self):
+        pet, powers = self.random.choice(PETS)
+        power, damage_type = self.random.choice(powers)
+        return pet + ":  You hit " + self.random.choice(ENEMIES) + " with your " + power + " for " + self.damage_value(5, 120) + " points of " + damage_type + " damage."
+
+    def write_pseudopet_damage(self):
+        pseudopet = self.random.choice(PSEUDOPETS)
+        return (pseudopet + ":  You hit " + self.random.choice(ENEMIES) + " with your " + pseudopet.strip() + " for " + self.damage_value(5, 80)
+                + " points of " + self.random.choice(PSEUDOPET_TYPES) + " damage.")
+
+    def write_reward_both(self):
+        return ("You gain " + format(self.random.randint(50, 40000), ",") + " experience and " + format(self.random.randint(10, 20000), ",")
+                + " " + self.random.choice(("influence", "infamy", "information")) + ".")
+
+    def write_reward_exp(self):
+        return "You gain " + format(self.random.randint(50, 40000), ",") + " experience."
+
+    def write_reward_inf(self):
+        return "You gain " + format(self.random.randint(10, 200000), ",") + " influence."
+
+    def write_welcome(self):
+        if self.random.random() < 0.5:
+            return "Welcome to City of Heroes, " + self.player_name + "!"
+        return "Now entering the Rogue Isles, " + self.player_name + "!"
+
+    def write_autohit(self):
+        return "HIT " + self.player_name + "! Your " + self.random.choice(("Stamina", "Health")) + " power is autohit."
+
+    def write_command(self):
+        channel = self.random.choice(("[Local]", "[SuperGroup]"))
+        player = self.player_name if self.random.random() < 0.8 else self.random.choice(CHAT)[1] # Commands from others are ignored
+        name = self.random.choice(SESSION_NAMES) + " " + str(self.random.randint(1, 20))
+        if self.random.random() < 0.5:
+            return channel + " " + player + ": ##SET_NAME " + name
+        return channel + " " + player + ": ##START_SESSION " + name
+
+    def write_chat(self):
+        channel, speaker, text = self.random.choice(CHAT)
+        return channel + " " + speaker + ": " + text
+
+    def write_noise(self):
+        '''Lines that aren't events, some of which start like one'''
+        choice = self.random.randrange(8)
+        enemy = self.random.choice(ENEMIES)
+        if choice == 0:
+            return "You are healed by your Health for " + self.damage_value(1, 10) + " health points."
+        if choice == 1:
+            power, damage_type = self.random.choice(ENEMY_POWERS)
+            return enemy + " hits you with their " + power + " for " + self.damage_value(5, 90) + " points of " + damage_type + " damage."
+        if choice == 2:
+            return enemy + " MISSES! " + self.random.choice(ENEMY_POWERS)[0] + " power had a 75.00% chance to hit, but rolled a 91.37."
+        if choice == 3:
+            return "You have defeated " + enemy
+        if choice == 4:
+            return "You gain " + str(self.random.randint(1, 5)) + " Reward Merits."
+        if choice == 5:
+            return "You activated the Sprint power" # No full stop, not an activation
+        if choice == 6:
+            return "Someone heals you with their Healing Aura for " + self.damage_value(20, 60) + " health points."
+        return "You received Invention: Luck of the Gambler: Defense/Recharge (Recipe)."
+
+
+def parse_size(text):
+    '''Returns the bytes in a size like 1G, 100M, 512K or 1000'''
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([KMG]?)B?", text.strip(), re.IGNORECASE)
+    if not match:
+        raise argparse.ArgumentTypeError("not a size: " + text)
+    return int(float(match.group(1)) * 1024 ** " KMG".index(match.group(2).upper() or " "))
+
+
+def write_log(path, size, seed=0, proportions=None, **options):
+    '''Writes a log of at least size bytes (it stops after the line that reaches it) and returns (bytes, lines).
+    options are passed on to the LogGenerator.'''
+    generator = LogGenerator(seed, proportions, **options)
+    with open(path, "wb") as file:
+        data = generator.first_line().encode("utf-8")
+        written, line_count = len(data), 1
+        file.write(data)
+        while written < size:
+            lines = generator.generate(BATCH_LINES)
+            batch = []
+            for kind, line in lines:
+                batch.append(line)
+                written += len(line.encode("utf-8")) if not line.isascii() else len(line)
+                if written >= size: break
+            file.write("".join(batch).encode("utf-8"))
+            line_count += len(batch)
+    return written, line_count
+
+
+def append_live(path, rate, duration=None, seed=0, proportions=None, **options):
+    '''Appends rate lines per second to a log, flushing every tick, until duration seconds have passed (or forever). The log's clock
+    starts at the current time and runs at the generator's lines_per_second pace, so rates above that play the log faster than real
+    time. A new log starts with the welcome message. Returns the lines written.'''
+    now = datetime.now()
+    options.setdefault("start_time", convert_timestamp(now.strftime("%Y-%m-%d"), now.strftime("%H:%M:%S")))
+    generator = LogGenerator(seed, proportions, **options)
+    tick = max(1 / rate, 0.01)
+    written = 0
+    start = time.perf_counter()
+    with open(path, "a", encoding="utf-8", newline="") as file:
+        if file.tell() == 0:
+            file.write(generator.first_line())
+        while duration is None or time.perf_counter() - start < duration:
+            due = int((time.perf_counter() - start) * rate) + 1 - written
+            if due > 0:
+                file.write(generator.lines(due))
+                file.flush()
+                written += due
+            time.sleep(tick)
+    return written
+
+
+def check(lines=200000, seed=0):
+    '''Classifies lines of every kind and returns a list of problems: kinds whose lines aren't the event they should be, and PATTERNS
+    events that no kind of line covers'''
+    name = DEFAULT_PLAYER_NAME
+    classifier = EventClassifier({key: re.compile(regex.pattern.replace("PLAYER_NAME", name)) for key, regex in PATTERNS.items()})
+    proportions = {kind: 1 for kind in KIND_EVENTS}
+    problems = ["no kind of line for the " + event + " event" for event in PATTERNS if event not in KIND_EVENTS.values()]
+    counts = {kind: 0 for kind in KIND_EVENTS}
+    for kind, line in LogGenerator(seed, proportions, player_name=name).generate(lines):
+        event = classifier.classify(line.rstrip("\n"))[0] or None
+        counts[kind] += 1
+        if event != KIND_EVENTS[kind]:
+            problems.append(kind + " line classified as " + str(event) + ": " + line.rstrip("\n"))
+    problems.extend("no " + kind + " lines generated" for kind, count in counts.items() if count == 0)
+    return problems
+
+
+def parse_proportions(values):
+    proportions = dict(DEFAULT_PROPORTIONS)
+    for value in values:
+        kind, _, weight = value.partition("=")
+        if kind not in KIND_EVENTS:
+            raise argparse.ArgumentTypeError("unknown kind of line: " + kind + " (one of " + ", ".join(KIND_EVENTS) + ")")
+        proportions[kind] = float(weight)
+    return proportions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Writes a synthetic City of Heroes chat log.")
+    parser.add_argument("output", nargs="?", help="log file to write (or append to with --live)")
+    parser.add_argument("--size", type=parse_size, default=parse_size("100M"), help="size of the log, e.g. 10M or 1G (default: 100M)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed, the same seed gives the same log (default: 0)")
+    parser.add_argument("--proportion", action="append", default=[], metavar="KIND=WEIGHT",
+                        help="weight of a kind of line, one of: " + ", ".join(KIND_EVENTS))
+    parser.add_argument("--fight-lines", type=int, default=400, help="lines in each fight before a gap that ends the session (default: 400)")
+    parser.add_argument("--player-name", default=DEFAULT_PLAYER_NAME)
+    parser.add_argument("--live", type=float, metavar="RATE", help="append RATE lines per second instead of writing --size")
+    parser.add_argument("--duration", type=float, help="seconds to append for with --live (default: until interrupted)")
+    parser.add_argument("--check", action="store_true", help="check every kind of line is classified as the event it should be")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        problems = check(seed=args.seed)
+        for problem in problems[:20]:
+            print(problem)
+        print("OK" if not problems else str(len(problems)) + " problems")
+        return 1 if problems else 0
+    if args.output is None:
+        parser.error("no output file given")
+    try:
+        proportions = parse_proportions(args.proportion)
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error(str(e))
+    options = {"fight_lines": args.fight_lines, "player_name": args.player_name}
+    start = time.perf_counter()
+    if args.live:
+        try:
+            written = append_live(args.output, args.live, args.duration, args.seed, proportions, **options)
+        except KeyboardInterrupt:
+            return 0
+        print("Appended", written, "lines in", round(time.perf_counter() - start, 2), "seconds")
+    else:
+        written, lines = write_log(args.output, args.size, args.seed, proportions, **options)
+        seconds = time.perf_counter() - start
+        print("Wrote", lines, "lines,", written, "bytes in", round(seconds, 2), "seconds (" + str(round(written / seconds / 1024 / 1024, 1)), "MB/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+'''
+Benchmark suite for the parser, aggregation and UI refresh hot paths, run on fixed inputs so results can be compared between changes:
+    - extract:    Parser.extract_from_line for each kind of line of the log generator (each event type, and chat and other noise)
+    - interpret:  Parser.interpret_event throughput, on the events of a fixed mix of lines
+    - process:    Parser.process_existing_log on 10 MB and 100 MB synthetic logs, and 1 GB with --sizes 10M,100M,1G (serial, no parse
+                  cache and without keeping the events for re-aggregation; the sessions of a 1 GB log still take over 6 GB of memory)
+    - live:       live-tail latency of follow_live_log, from a line being appended to it being parsed, and to the update that sends it
+    - repopulate: MainUI.repopulate on offscreen Qt, with a small and a huge session (skipped if PyQt5 isn't installed)
+
+The logs are made by log_generator.py with a fixed seed, and kept in the data directory for the next run (they are made again whenever
+the generator changes). Each result is the median of several samples, and quick functions are called many times in a row for each
+sample. A fixed piece of pure Python work is timed right after each sample of a CPU bound benchmark, so a machine that has slowed down
+(e.g. a busy host) can be told from slower code, and the spread of the samples relative to it is kept with the result as its noise. The results are written as JSON, and
+compared with a baseline saved by an earlier run with --save-baseline, scaled by how much faster or slower the machine work ran: any
+result worse than the baseline by more than the threshold is a regression, and the exit status is 1. The threshold is raised to the
+noise of the two results where that is larger, and to MICRO_THRESHOLD for the benchmarks of a single line or event.
+
+Usage (from the repo root):
+    python benchmarks/run_benchmarks.py [--only extract,interpret,...] [--sizes 10M,100M,1G] [--save-baseline] [--threshold 0.15]
+                                        [--repeat 5]
+'''
+import os
+import io
+import sys
+import json
+import math
+import time
+import shutil
+import hashlib
+import platform
+import argparse
+import threading
+import statistics
+import contextlib
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import log_generator
+from log_generator import LogGenerator, KIND_EVENTS, DEFAULT_PLAYER_NAME, write_log, parse_size
+from combat.CombatParser import Parser
+from combat.ParserConfig import ParserConfig
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+GROUPS = ("extract", "interpret", "process", "live", "repopulate")
+LOG_SIZES = ("10M", "100M") # 1G is left out by default, it takes most of an hour and more memory than many machines have
+SEED = 1
+DEFAULT_THRESHOLD = 0.15 # Results more than this fraction worse than the baseline are regressions
+MICRO_THRESHOLD = 0.3 # The lowest threshold of the extract and interpret benchmarks
+DEFAULT_REPEAT = 5 # Samples of each benchmark, the median is kept
+MIN_SAMPLE_SECONDS = 0.5 # Quick functions are called as many times in a row as it takes for each sample to last this long
+MACHINE_SAMPLE_SECONDS = 0.05 # Length of each of the 3 samples of machine_work taken after every sample of a CPU bound benchmark
+EXTRACT_LINES = 2000 # Lines of each kind timed by the extract benchmark
+INTERPRET_LINES = 200000
+LIVE_SAMPLES = 40
+LIVE_BATCH_LINES = 20 # Lines appended at once by the live benchmark, about what the game writes for a power hitting a few targets
+LIVE_WRITE_INTERVAL = 0.2 # Seconds between appends
+REPOPULATE_SESSIONS = {"small": (10, 5), "huge": (2000, 30)} # Targets x abilities
+
+
+class Results:
+    '''The results of a run: name -> {"value", "unit", "higher_is_better", "noise", "micro", "machine"}, each printed as it is added.
+    noise is the spread of the samples the value was taken from as a fraction of it, micro is set for the benchmarks of a single line or
+    event, and machine is the median time machine_work took after each sample (None for results that don't depend on the speed of the
+    CPU). Samples are the (times, machine times) returned by time_samples.'''
+
+    def __init__(self):
+        self.values = {}
+
+    def add(self, name, value, unit, higher_is_better, noise=0.0, micro=False, machine=None):
+        self.values[name] = {"value": value, "unit": unit, "higher_is_better": higher_is_better, "noise": noise, "micro": micro,
+                             "machine": machine}
+        print(f"  {name:<44} {value:>14,.3f} {unit:<8} ±{noise:.1%}")
+
+    def add_rate(self, name, amount, samples, unit, micro=False):
+        '''Adds amount / the median time of the samples as a result'''
+        times, machine = samples
+        self.add(name, amount / statistics.median(times), unit, True, get_noise(times, machine), micro, statistics.median(machine))
+
+    def add_time(self, name, samples, micro=False):
+        '''Adds the median time of the samples as a result in ms'''
+        times, machine = samples
+        self.add(name, statistics.median(times) * 1000, "ms", False, get_noise(times, machine), micro, statistics.median(machine))
+
+
+def quiet_parser(config=None):
+    '''Returns a Parser with the parse cache and workers off, created without its console output'''
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Parser(config or ParserConfig(PARSE_WORKERS=1, PARSE_CACHE_SIZE=0, CONSOLE_VERBOSITY=0))
+
+
+def named_parser():
+    '''Returns a quiet_parser that already knows the player name of the generated logs, as it would after the welcome message'''
+    parser = quiet_parser()
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser.set_player_name(DEFAULT_PLAYER_NAME)
+    parser.PATTERNS = parser.update_regex_player_name(DEFAULT_PLAYER_NAME)
+    return parser
+
+
+def get_noise(times, machine=None):
+    '''Returns the range of the times as a fraction of their median, each divided by the machine time taken after it if given'''
+    if machine is not None:
+        times = [seconds / machine_seconds for seconds, machine_seconds in zip(times, machine)]
+    median = statistics.median(times)
+    return (max(times) - min(times)) / median if median else 0.0
+
+
+def time_samples(func, repeat, min_seconds=MIN_SAMPLE_SECONDS, machine=True):
+    '''Returns (times, machine times): repeat samples of the time func takes, each followed by the time machine_work takes right after
+    it (or only the times if machine is False). A func quicker than min_seconds is called as many times in a row as it takes to last that
+    long and the time is divided between them, so a sample isn't mostly timer resolution and scheduling'''
+    times, machine_times = [], []
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    if first >= min_seconds:
+        calls = 1
+        times.append(first)
+        if machine: machine_times.append(get_machine_time())
+    else:
+        calls = math.ceil(min_seconds / max(first, 1e-6)) # The first call only warms up
+    while len(times) < repeat:
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        times.append((time.perf_counter() - start) / calls)
+        if machine: machine_times.append(get_machine_time())
+    return (times, machine_times) if machine else times
+
+
+def machine_work():
+    '''A fixed piece of pure Python work much like the parser's (splitting lines, converting numbers and adding them up in a dict) that
+    doesn't use any of the code being benchmarked'''
+    totals = {}
+    for i in range(2000):
+        words = f"2024-03-01 12:00:{i % 60:02} Target {i % 97} hits you for {i * 0.25} points".split()
+        totals[words[3]] = totals.get(words[3], 0) + float(words[-2])
+    return totals
+
+
+def get_machine_time():
+    '''Returns the median time machine_work takes, how fast the machine is running Python right now'''
+    return statistics.median(time_samples(machine_work, 3, MACHINE_SAMPLE_SECONDS, machine=False))
+
+
+def get_generator_version():
+    with open(log_generator.__file__, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()[:8]
+
+
+def get_log(data_dir, size):
+    '''Returns the path of the synthetic log of the given size (e.g. "100M"), writing it first if this version of the generator hasn't'''
+    path = os.path.join(data_dir, f"synthetic-{size}-seed{SEED}-{get_generator_version()}.txt")
+    if not os.path.isfile(path):
+        os.makedirs(data_dir, exist_ok=True)
+        print(f"  writing the {size} log to {path}...")
+        write_log(path + ".tmp", parse_size(size), SEED)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def bench_extract(results, repeat):
+    parser = named_parser()
+    for kind in KIND_EVENTS:
+        lines = [line.rstrip("\n") for _, line in LogGenerator(SEED, {kind: 1}).generate(EXTRACT_LINES)]
+        def run():
+            for line in lines:
+                parser.extract_from_line(line)
+        results.add_rate("extract_from_line." + kind, len(lines), time_samples(run, repeat), "lines/s", micro=True)
+
+
+def bench_interpret(results, repeat):
+    parser = named_parser()
+    events = []
+    for _, line in LogGenerator(SEED).generate(INTERPRET_LINES):
+        event, data = parser.extract_from_line(line.rstrip("\n"))
+        if event != "":
+            events.append((event, data))
+    times, machine = [], []
+    for _ in range(repeat):
+        parser = named_parser()
+        batch = [(event, dict(data)) for event, data in events] # interpret_event changes the data it is given
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            for event, data in batch:
+                parser.interpret_event(event, data)
+            times.append(time.perf_counter() - start)
+        machine.append(get_machine_time())
+    results.add_rate("interpret_event", len(events), (times, machine), "events/s", micro=True)
+
+
+def bench_process(results, repeat, sizes, data_dir):
+    for size in sizes:
+        path = get_log(data_dir, size)
+        megabytes = os.path.getsize(path) / 1024 / 1024
+        def run():
+            parser = quiet_parser()
+            with contextlib.redirect_stdout(io.StringIO()):
+                parser.process_existing_log(path)
+        runs = repeat if megabytes < 512 else 1 # A single pass over a 1 GB log is long enough to be steady
+        results.add_rate("process_existing_log." + size, megabytes, time_samples(run, runs), "MB/s")
+
+
+def bench_live(results, data_dir):
+    '''Appends batches of lines to a log followed by follow_live_log in another thread, timing how long each batch takes to be parsed,
+    and to be sent by the next on_delta_update. This is the polling path used without an event loop, the UI's file watcher can only
+    make the first shorter.'''
+    path = os.path.join(data_dir, "live.txt")
+    os.makedirs(data_dir, exist_ok=True)
+    generator = LogGenerator(SEED, fight_lines=10 ** 9) # One long fight, so every batch has an update to send
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(generator.first_line() + generator.lines(100))
+    updates = []
+    parser = quiet_parser()
+    parser.set_callbacks(on_delta_update=lambda changes: updates.append(time.perf_counter()))
+    with contextlib.redirect_stdout(io.StringIO()):
+        thread = threading.Thread(target=parser.follow_live_log, args=(path,))
+        thread.start()
+        ingest, update = [], []
+        try:
+            while not parser.monitoring_live: time.sleep(0.001)
+            with open(path, "a", encoding="utf-8") as file:
+                for _ in range(LIVE_SAMPLES):
+                    time.sleep(LIVE_WRITE_INTERVAL)
+                    lines = generator.lines(LIVE_BATCH_LINES)
+                    expected = parser.line_count + LIVE_BATCH_LINES
+                    updates_before = len(updates)
+                    start = time.perf_counter()
+                    file.write(lines)
+                    file.flush()
+                    while parser.line_count < expected: time.sleep(0.0005)
+                    ingest.append(time.perf_counter() - start)
+                    deadline = start + 5
+                    while len(updates) == updates_before and time.perf_counter() < deadline: time.sleep(0.0005)
+                    if len(updates) > updates_before:
+                        update.append(updates[updates_before] - start)
+        finally:
+            parser.stop_monitoring()
+            thread.join()
+    os.remove(path)
+    for name, times in (("ingest", ingest), ("update", update)):
+        if not times: continue
+        times.sort()
+        # Mostly the polling interval, so not scaled by the speed of the machine
+        results.add(f"live_tail.{name}_latency.median", statistics.median(times) * 1000, "ms", False, get_noise(times))
+        p95_noise = get_noise(times[len(times) // 2:]) # The spread of the slower half, which the p95 is taken from
+        results.add(f"live_tail.{name}_latency.p95", times[int(len(times) * 0.95) - 1] * 1000, "ms", False, p95_noise)
+
+
+def bench_repopulate(results, repeat):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt5.QtWidgets import QApplication
+    except ImportError:
+        print("  PyQt5 isn't installed, skipping")
+        return
+    from ui.MainUI import MainUI
+    from bench_repopulate import build_session
+    app = QApplication.instance() or QApplication([])
+    with contextlib.redirect_stdout(io.StringIO()):
+        ui = MainUI()
+    for name, (targets, abilities) in REPOPULATE_SESSIONS.items():
+        session = build_session(targets, abilities)
+        ui.clear_ability_trees()
+        start = time.perf_counter()
+        ui.repopulate(session)
+        results.add(f"repopulate.{name}.first", (time.perf_counter() - start) * 1000, "ms", False, machine=get_machine_time())
+        results.add_time(f"repopulate.{name}.refresh", time_samples(lambda: ui.repopulate(session), repeat))
+        ui.ability_tree_display_enemies.expandAll()
+        results.add_time(f"repopulate.{name}.expanded_refresh", time_samples(lambda: ui.repopulate(session), repeat))
+    app.processEvents()
+
+
+def compare(values, baseline, threshold):
+    '''Prints each result against the baseline, returns the names of those worse than it by more than they are allowed to be: the
+    threshold, or MICRO_THRESHOLD for micro-benchmarks, raised to the noise of the baseline and current results added together.
+    The baseline of a CPU bound result is first scaled by how much slower or faster the machine work ran (the "machine" column).'''
+    regressions = []
+    print(f"\n  {'benchmark':<44} {'baseline':>14} {'current':>14} {'machine':>8} {'change':>8} {'allowed':>8}")
+    for name, result in values.items():
+        if name not in baseline:
+            print(f"  {name:<44} {'':>14} {result['value']:>14,.3f} {'':>8} {'new':>8}")
+            continue
+        before, after = baseline[name]["value"], result["value"]
+        slowdown = 1.0 # How many times longer the machine work takes now than it did for the baseline
+        if result.get("machine") and baseline[name].get("machine"):
+            slowdown = result["machine"] / baseline[name]["machine"]
+        expected = before / slowdown if result["higher_is_better"] else before * slowdown
+        change = (after - expected) / expected if expected else 0
+        worse = -change if result["higher_is_better"] else change
+        allowed = max(max(threshold, MICRO_THRESHOLD) if result["micro"] else threshold, baseline[name].get("noise", 0) + result["noise"])
+        status = ""
+        if worse > allowed:
+            regressions.append(name)
+            status = "  REGRESSION"
+        print(f"  {name:<44} {before:>14,.3f} {after:>14,.3f} {slowdown - 1:>+8.1%} {change:>+8.1%} {allowed:>8.1%}{status}")
+    return regressions
+
+
+def get_metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARKS_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"time": time.strftime("%Y-%m-%d %H:%M:%S"), "commit": commit, "python": platform.python_version(),
+            "platform": platform.platform(), "cpus": os.cpu_count(), "generator": get_generator_version(), "seed": SEED}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runs the parser, aggregation and UI benchmarks and compares them with a baseline.")
+    parser.add_argument("--only", default=",".join(GROUPS), help="comma separated groups to run (default: " + ",".join(GROUPS) + ")")
+    parser.add_argument("--sizes", default=",".join(LOG_SIZES), help="log sizes for process_existing_log (default: " + ",".join(LOG_SIZES) + ")")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="samples taken of each benchmark, the median is kept (default: " + str(DEFAULT_REPEAT) + ")")
+    parser.add_argument("--data-dir", default=os.path.join(RESULTS_DIR, "data"), help="where the synthetic logs are kept")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "latest.json"), help="JSON file to write the results to")
+    parser.add_argument("--baseline", default=os.path.join(RESULTS_DIR, "baseline.json"), help="JSON results to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="save these results as the baseline for later runs")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fraction a result can be worse than the baseline by before it is a regression (default: " + str(DEFAULT_THRESHOLD) + ")")
+    args = parser.parse_args(argv)
+    groups = [group.strip() for group in args.only.split(",") if group.strip()]
+    unknown = [group for group in groups if group not in GROUPS]
+    if unknown:
+        parser.error("unknown benchmark group: " + ", ".join(unknown))
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    for size in sizes:
+        try:
+            parse_size(size)
+        except argparse.ArgumentTypeError as e:
+            parser.error(str(e))
+
+    results = Results()
+    for group in groups:
+        print(group)
+        if group == "extract": bench_extract(results, args.repeat)
+        elif group == "interpret": bench_interpret(results, args.repeat)
+        elif group == "process": bench_process(results, args.repeat, sizes, args.data_dir)
+        elif group == "live": bench_live(results, args.data_dir)
+        elif group == "repopulate": bench_repopulate(results, args.repeat)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump({"metadata": get_metadata(), "results": results.values}, file, indent=1)
+    print("\nResults written to", args.output)
+
+    regressions = []
+    if os.path.isfile(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(results.values, json.load(file)["results"], args.threshold)
+        print(f"\n{len(regressions)} regressions beyond the threshold of {args.threshold:.0%} (or the noise) against {args.baseline}")
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print("Saved as the baseline:", args.baseline)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+@echo off
+REM City of Heroes Combat Parser - command line tool, see: coh-parse --help
+python "%~dp0src\coh_parse.py" %*
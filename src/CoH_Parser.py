@@ -33,4 +33,6 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support() # Lets the packaged .exe start the worker processes used to parse large logs
     main()
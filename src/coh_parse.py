@@ -0,0 +1,323 @@
+'''
+coh-parse: parses City of Heroes chat logs without the UI and writes the stats of every combat session as JSON Lines or CSV.
+
+    coh-parse [options] PATH [PATH ...]
+
+Each PATH is a log file, or a directory whose logs (*.txt, including subdirectories) are all parsed. A record is written for each
+session, and for each character (the player and their pets), ability and damage type in it, as soon as the session has ended.
+With --workers, files are parsed in parallel worker processes and their records are written as they arrive. Only the pure-Python
+parsing engine is loaded, so this runs on a machine without a display or Qt.
+
+With --report, every log is summarized instead and a single report of them all is written, as text or JSON (--report-format): the
+totals of every ability, the DPS of each day and the exp and inf gained in each hour. Summaries are kept in the parse cache, so running
+it again over the same directory only parses the logs that are new or have been written to since.
+'''
+import argparse
+import contextlib
+import csv
+import fnmatch
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from combat import CombatParser
+from combat.BatchAnalysis import BatchReport, summarize_log_file, get_summary_settings, load_cached_summary, store_summary
+from combat.CombatParser import Parser
+from combat.ParseCache import ParseCache
+from combat.ParserConfig import ParserConfig
+from combat.SessionRecords import get_session_records, RECORD_TYPES, COLUMNS
+from data.Globals import Globals
+
+NAMING_MODES = ("Custom Name", "First Enemy Damaged", "Highest Enemy Damaged")
+MAX_AUTO_WORKERS = 8
+QUEUE_POLL_INTERVAL = 0.1 # Seconds, how often the main process checks for workers that died while waiting for records
+
+
+def find_log_files(paths, pattern="*.txt"):
+    '''Returns the log files given on the command line, directories are searched (in name order) for files matching the pattern.
+    A file found more than once is only returned the first time.'''
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, subdirectories, names in os.walk(path):
+                subdirectories.sort()
+                files.extend(os.path.join(directory, name) for name in sorted(names) if fnmatch.fnmatch(name, pattern))
+        else:
+            files.append(path)
+    return list(dict.fromkeys(files))
+
+
+class RecordWriter:
+    '''Writes records to a text stream as JSON Lines or CSV, flushing after each batch so they can be read while parsing carries on'''
+
+    def __init__(self, stream, format):
+        self.stream = stream
+        self.csv_writer = None
+        if format == "csv":
+            self.csv_writer = csv.DictWriter(stream, COLUMNS, restval="", lineterminator="\n")
+            self.csv_writer.writeheader()
+        self.records = 0
+
+    def write(self, records):
+        if self.csv_writer is not None:
+            self.csv_writer.writerows(records)
+        else:
+            self.stream.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        self.stream.flush()
+        self.records += len(records)
+
+
+def parse_log_file(file_path, config, types, send, stopped=None):
+    '''Parses one log file, calling send with the records of each session as it ends. Parsing stops early once stopped() returns True.
+    Returns (lines, sessions)'''
+    sessions = [0]
+    def on_session_ended(session):
+        sessions[0] += 1
+        send(get_session_records(session, file_path, types))
+    def on_progress():
+        if stopped is not None and stopped(): parser.processing_live = False
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull): # The parser reports its progress on stdout
+        parser = Parser(config, on_session_ended=on_session_ended, on_progress=on_progress)
+        if not parser.process_existing_log(file_path):
+            raise OSError("Not a log file: " + file_path)
+        if parser.combat_session_live and parser.processing_live:
+            parser.time_out_session() # Nothing comes after the last line to time the last session out
+    return parser.line_count, sessions[0]
+
+
+worker_queue = None # Where a worker process sends its records, set by init_worker
+worker_stop = None # Set by the main process when it won't read any more records
+
+
+def init_worker(records_queue, stop_event):
+    global worker_queue, worker_stop
+    worker_queue = records_queue
+    worker_stop = stop_event
+    # Exiting doesn't wait for records nobody will read, the main process has read them all when it finishes normally
+    worker_queue.cancel_join_thread()
+
+
+def parse_log_file_in_worker(file_path, config, types):
+    '''Worker process entry point, sends (file path, records) for each session and (file path, None) once the file is done'''
+    try:
+        return parse_log_file(file_path, config, types, lambda records: worker_queue.put((file_path, records)), worker_stop.is_set)
+    finally:
+        worker_queue.put((file_path, None))
+
+
+def run_serial(files, config, types, writer, report):
+    failed = 0
+    for file_path in files:
+        try:
+            report(file_path, *parse_log_file(file_path, config, types, writer.write))
+        except BrokenPipeError:
+            raise
+        except Exception as e:
+            failed += 1
+            report(file_path, error=e)
+    return failed
+
+
+def run_parallel(files, config, types, writer, report, workers):
+    '''Parses the files in worker processes, writing each batch of records as it arrives. A file's records stay in session order,
+    records of different files are interleaved.'''
+    context = multiprocessing.get_context("spawn")
+    records_queue = context.Queue()
+    stop_event = context.Event()
+    failed = 0
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker, initargs=(records_queue, stop_event))
+    try:
+        futures = {file_path: executor.submit(parse_log_file_in_worker, file_path, config, types) for file_path in files}
+        pending = set(files)
+        while pending:
+            try:
+                file_path, records = records_queue.get(timeout=QUEUE_POLL_INTERVAL)
+            except queue.Empty:
+                for file_path in list(pending): # A worker that died can't send its (file path, None)
+                    future = futures[file_path]
+                    if future.done() and future.exception() is not None and records_queue.empty():
+                        pending.discard(file_path)
+                        failed += 1
+                        report(file_path, error=future.exception())
+                continue
+            if records is not None:
+                writer.write(records)
+                continue
+            pending.discard(file_path)
+            future = futures[file_path]
+            error = future.exception()
+            if error is not None:
+                failed += 1
+                report(file_path, error=error)
+            else:
+                report(file_path, *future.result())
+    finally:
+        stop_event.set() # Stops the files still being parsed if writing the output failed, those that haven't started are cancelled
+        executor.shutdown(wait=False, cancel_futures=True)
+    return failed
+
+
+def run_report(files, config, cache, report, workers):
+    '''Adds the LogSummary of every file to a BatchReport and returns (BatchReport, failed files). Summaries are loaded from the cache when the log
+    hasn't changed since, the rest are made in worker processes, and stored in the cache by this process as they arrive.'''
+    batch = BatchReport()
+    settings = get_summary_settings(config)
+    failed = 0
+    files_to_parse = []
+    for file_path in files:
+        try:
+            summary = load_cached_summary(cache, file_path, settings) if cache is not None else None
+        except OSError:
+            summary = None # Reported when it fails to parse
+        if summary is None:
+            files_to_parse.append(file_path)
+        else:
+            batch.add(summary)
+            report(file_path, summary, cached=True)
+
+    def add(file_path, summary=None, error=None):
+        nonlocal failed
+        if error is not None:
+            failed += 1
+            report(file_path, error=error)
+            return
+        batch.add(summary)
+        if cache is not None:
+            store_summary(cache, summary)
+        report(file_path, summary)
+
+    if workers > 1 and len(files_to_parse) > 1:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(files_to_parse)), mp_context=context) as executor:
+            futures = {executor.submit(summarize_log_file, file_path, config): file_path for file_path in files_to_parse}
+            for future in as_completed(futures):
+                if future.exception() is not None:
+                    add(futures[future], error=future.exception())
+                else:
+                    add(futures[future], future.result())
+    else:
+        for file_path in files_to_parse:
+            try:
+                add(file_path, summarize_log_file(file_path, config))
+            except Exception as e:
+                add(file_path, error=e)
+    return batch, failed
+
+
+def get_parser_config(args):
+    config = ParserConfig(PARSE_WORKERS=1, PARSE_CACHE_SIZE=0, CONSOLE_VERBOSITY=0) # Every session has to be parsed to be written
+    if args.timeout is not None: config.COMBAT_SESSION_TIMEOUT = args.timeout
+    if args.session_name is not None: config.COMBAT_SESSION_NAME = args.session_name
+    if args.naming_mode is not None: config.COMBAT_SESSION_NAMING_MODE = args.naming_mode
+    if args.separate_procs: config.ASSOCIATE_PROCS_TO_POWERS = False
+    return config
+
+
+def get_argument_parser():
+    parser = argparse.ArgumentParser(prog="coh-parse", description="Parses City of Heroes chat logs and writes the stats of every combat "
+                                     "session, character, ability and damage type as JSON Lines or CSV.")
+    parser.add_argument("paths", nargs="+", metavar="PATH", help="log file, or directory of log files")
+    parser.add_argument("-f", "--format", choices=("jsonl", "csv"), default="jsonl", help="output format (default: jsonl)")
+    parser.add_argument("-o", "--output", default="-", help="file to write to (default: standard output)")
+    parser.add_argument("-r", "--records", default=",".join(RECORD_TYPES),
+                        help="comma separated record types to write (default: " + ",".join(RECORD_TYPES) + ")")
+    parser.add_argument("-w", "--workers", type=int, default=0, help="worker processes to parse files in parallel, 0 = one per CPU core "
+                        "(up to " + str(MAX_AUTO_WORKERS) + "), 1 = parse in this process (default: 0)")
+    parser.add_argument("--pattern", default="*.txt", help="file name pattern of the logs in directories (default: *.txt)")
+    parser.add_argument("--timeout", type=int, help="seconds without activity before a combat session ends")
+    parser.add_argument("--session-name", help="name given to sessions in the Custom Name naming mode")
+    parser.add_argument("--naming-mode", choices=NAMING_MODES, help="how sessions are named")
+    parser.add_argument("--separate-procs", action="store_true", help="count procs as abilities of their own, not of the power that caused them")
+    parser.add_argument("--report", action="store_true", help="write one report of all the logs instead of their records")
+    parser.add_argument("--report-format", choices=("text", "json"), default="text", help="format of the --report (default: text)")
+    parser.add_argument("--cache-size", type=int, default=Globals.DEFAULT_PARSE_CACHE_SIZE, metavar="MB", help="MB of log summaries kept "
+                        "for --report, so unchanged logs aren't parsed again, 0 = off (default: " + str(Globals.DEFAULT_PARSE_CACHE_SIZE) + ")")
+    parser.add_argument("-q", "--quiet", action="store_true", help="don't report each file parsed on standard error")
+    return parser
+
+
+def write_report(files, config, args, workers):
+    '''Writes the BatchReport of the files, reporting the progress and throughput on standard error'''
+    cache = ParseCache(config.PARSE_CACHE_DIR, args.cache_size * 1024 * 1024) if args.cache_size > 0 else None
+    start = time.perf_counter()
+    done = [0, 0, 0] # Files, of those from the cache, bytes
+    def report(file_path, summary=None, cached=False, error=None):
+        done[0] += 1
+        if error is not None:
+            print("coh-parse: error:", file_path + ":", error, file=sys.stderr)
+            return
+        done[1] += cached
+        done[2] += summary.offset
+        if not args.quiet:
+            elapsed = max(time.perf_counter() - start, 1e-9)
+            print(f"coh-parse: [{done[0]}/{len(files)}] {file_path}: {summary.line_count} lines, {len(summary.sessions)} sessions"
+                  f"{' (cached)' if cached else ''}, {done[0] / elapsed:.1f} files/s, {done[2] / elapsed / 1024 / 1024:.1f} MB/s", file=sys.stderr)
+
+    batch, failed = run_report(files, config, cache, report, workers)
+    with contextlib.ExitStack() as stack:
+        stream = sys.stdout if args.output == "-" else stack.enter_context(open(args.output, "w", encoding="utf-8", newline=""))
+        try:
+            if args.report_format == "json":
+                json.dump(batch.to_dict(), stream, ensure_ascii=False, indent=1)
+                stream.write("\n")
+            else:
+                stream.write(batch.format_text())
+            stream.flush()
+        except BrokenPipeError:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return 1
+    if not args.quiet:
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        print("coh-parse:", len(files) - failed, "of", len(files), "files summarized (" + str(done[1]), "from the cache) in", round(elapsed, 2),
+              f"seconds, {len(files) / elapsed:.1f} files/s, {done[2] / elapsed / 1024 / 1024:.1f} MB/s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    CombatParser.CLI_MODE = True
+    args = get_argument_parser().parse_args(argv)
+    types = tuple(record_type.strip() for record_type in args.records.split(",") if record_type.strip())
+    unknown = [record_type for record_type in types if record_type not in RECORD_TYPES]
+    if unknown or not types:
+        get_argument_parser().error("unknown record type: " + ", ".join(unknown) if unknown else "no record types given")
+    files = find_log_files(args.paths, args.pattern)
+    if not files:
+        get_argument_parser().error("no log files found")
+    workers = args.workers if args.workers > 0 else min(os.cpu_count() or 1, MAX_AUTO_WORKERS)
+    workers = min(workers, len(files))
+    config = get_parser_config(args)
+
+    if args.report:
+        return write_report(files, config, args, workers)
+
+    start = time.perf_counter()
+    def report(file_path, lines=0, sessions=0, error=None):
+        if error is not None:
+            print("coh-parse: error:", file_path + ":", error, file=sys.stderr)
+        elif not args.quiet:
+            print("coh-parse:", file_path + ":", lines, "lines,", sessions, "sessions", file=sys.stderr)
+
+    with contextlib.ExitStack() as stack:
+        stream = sys.stdout if args.output == "-" else stack.enter_context(open(args.output, "w", encoding="utf-8", newline=""))
+        writer = RecordWriter(stream, args.format)
+        try:
+            if workers > 1:
+                failed = run_parallel(files, config, types, writer, report, workers)
+            else:
+                failed = run_serial(files, config, types, writer, report)
+        except BrokenPipeError: # The output was closed early, e.g. piped into head
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno()) # Python would report the error again flushing stdout on exit
+            return 1
+    if not args.quiet:
+        print("coh-parse:", len(files) - failed, "of", len(files), "files parsed,", writer.records, "records written in",
+              round(time.perf_counter() - start, 2), "seconds", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
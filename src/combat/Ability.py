@@ -1,37 +1,92 @@
-from PyQt5.QtCore import QObject
+import math
+from combat.DamageComponent import DamageComponent
+
+class Ability:
+    '''Stores data about an ability used.
+    Totals are kept up to date as damage, hits and uses are added, and passed up to the Character that owns the ability, so the getters
+    never have to loop through the damage components'''
+    __slots__ = ("name", "count", "tries", "hits", "damage", "damage_types", "proc", "pet", "pet_name", "total_damage", "max_damage",
+                 "average_damage", "character")
 
-class Ability(QObject):
-    '''Stores data about an ability used'''
     def __init__(self, name, hit=None, proc=False):
-        super().__init__()
         self.name = name
         self.count = 0
         self.tries = 0 if hit is None else 1
         self.hits = 1 if hit is True else 0
-        self.damage = []
+        self.damage = [] # Damage components in the order they were first seen
+        self.damage_types = {} # Damage type -> its component in self.damage
         self.proc = proc
         self.pet = False
         self.pet_name = "" # If ability came from a pet, store the pet name
+        self.total_damage = 0 # Running totals, see update_totals()
+        self.max_damage = 0
+        self.average_damage = 0
+        self.character = None # The Character this ability was added to with add_ability
+
+    def accumulate_damage(self, type, value = 0, is_proc=False):
+        '''Adds damage of the given type to the ability, a DamageComponent is only created the first time the type is seen.
+        A new proc component starts counting its proc rate from the ability's current hits. Returns the component.'''
+        component = self.damage_types.get(type)
+        if component is None:
+            component = DamageComponent(type, is_proc=is_proc)
+            if is_proc: component.parent_hits = self.hits
+            self.damage.append(component)
+            self.damage_types[type] = component
+            highest = 0
+        else:
+            highest = component.highest_damage
+        component.add_damage(type, value)
+        self.update_totals(value, component.highest_damage - highest)
+        if self.proc:
+            self.ability_used()
+        return component
 
     def add_damage(self, damage_component, value = 0):
-        '''Adds a damage component to the ability'''
-        # Check if damage type is already in the ability, if it is, add the damage to the existing component
+        '''Adds damage using an existing damage component, which is kept if its type hasn't been seen before (including any value it
+        was created with). Prefer accumulate_damage, which doesn't need a component to be created for every hit.'''
+        if damage_component.type not in self.damage_types:
+            self.damage.append(damage_component)
+            self.damage_types[damage_component.type] = damage_component
+            self.update_totals(damage_component.total_damage, damage_component.highest_damage)
+        self.accumulate_damage(damage_component.type, value)
+    
+    def merge(self, other):
+        '''Adds the uses, hit rolls and damage of another ability to this one, as if they had all been added here. Returns self.
+
+        Damage components are merged by type. A proc's parent_hits also counts the hits of the other ability when only one of them has
+        the proc, the same as if the proc had been seen across both. Other is left unchanged, and the running totals of the character
+        this ability belongs to are updated.'''
+        character = self.character
+        if character is not None: # Take the old totals out of the character's, the merged ones are added back below
+            character.update_totals(-self.total_damage, -self.hits, -self.tries, -self.count, -round(self.average_damage * 100))
+
         for component in self.damage:
-            if component.type == damage_component.type:
-                component.add_damage(damage_component.type, value)
-                if self.proc: 
-                    self.ability_used()
-                    
-                #print ('Added to existing damage component to ', self.name, ' | ', damage_component.type, ' | ', self.get_total_damage(), ' | ', self.damage[-1].get_count())
-                return
-            
-        self.damage.append(damage_component)
-        self.damage[-1].add_damage(damage_component.type, value)
-        #print ('Added new damage component to ', self.name, ' | ', damage_component.type, ' | ', self.get_total_damage(), ' | ', self.damage[-1].get_count())
+            if component.is_proc and component.type not in other.damage_types:
+                component.parent_hits += other.hits
+        for component in other.damage:
+            mine = self.damage_types.get(component.type)
+            if mine is None:
+                mine = DamageComponent(component.type, is_proc=component.is_proc)
+                if component.is_proc: mine.parent_hits = self.hits
+                self.damage.append(mine)
+                self.damage_types[component.type] = mine
+            mine.merge(component)
+
+        self.count += other.count
+        self.tries += other.tries
+        self.hits += other.hits
+        self.proc = self.proc or other.proc
+        if other.pet and not self.pet:
+            self.pet = True
+            self.pet_name = other.pet_name
+        self.total_damage = sum(component.total_damage for component in self.damage)
+        self.max_damage = sum(component.highest_damage for component in self.damage)
+        self.average_damage = self.calculate_average_damage()
+
+        if character is not None:
+            character.update_totals(self.total_damage, self.hits, self.tries, self.count, round(self.average_damage * 100))
+        return self
 
-        if self.proc:
-            self.ability_used() 
-    
     def ability_used(self):
         '''
         This is called upon every time an ability is used to track the number of times used. This should be incremented regardless of hit or miss.
@@ -39,6 +94,7 @@ class Ability(QObject):
         :param self: Ability object
         '''
         self.count += 1
+        self.update_totals(0, 0, 0, 0, 1)
     def ability_hit(self, hit):
         """"
         This is called when an ability successfully hits an enemy to track the number of hits.
@@ -48,40 +104,56 @@ class Ability(QObject):
         """
         self.tries += 1
         if hit: self.hits += 1
+        if self.count and self.character is not None: # The average is based on the count, so only the character's totals change
+            self.character.update_totals(0, 1 if hit else 0, 1, 0, 0)
+        else:
+            self.update_totals(0, 0, 1 if hit else 0, 1)
+
+    def update_totals(self, damage=0, highest=0, hits=0, tries=0, count=0):
+        '''Updates the running totals after damage, a hit roll or a use was added (hits, tries and count have already been incremented)
+        and passes the change on to the owning character'''
+        self.total_damage += damage
+        self.max_damage += highest
+        uses = self.count or self.hits
+        average = round(self.total_damage / uses, 2) if uses and self.total_damage else 0 # Same as calculate_average_damage
+        if self.character is not None:
+            # Averages are rounded to 2 decimal places, so the character can keep their sum in hundredths without any float drift
+            average_change = 0 if average == self.average_damage else round((average - self.average_damage) * 100)
+            self.character.update_totals(damage, hits, tries, count, average_change)
+        self.average_damage = average
+
+    def calculate_average_damage(self):
+        count = self.hits if self.count == 0 else self.count
+        if count == 0 or self.total_damage == 0:
+            return 0
+        return round(self.total_damage / count, 2)
+
+    def verify_totals(self):
+        '''Consistency check, recalculates every running total from the damage components and raises an AssertionError if any have drifted'''
+        total = sum(component.get_damage() for component in self.damage)
+        highest = sum(component.get_highest_damage() for component in self.damage)
+        assert math.isclose(self.total_damage, total, abs_tol=1e-6), f"{self.name}: total damage {self.total_damage} != {total}"
+        assert math.isclose(self.max_damage, highest, abs_tol=1e-6), f"{self.name}: max damage {self.max_damage} != {highest}"
+        assert self.average_damage == self.calculate_average_damage(), f"{self.name}: average damage {self.average_damage} is stale"
+
     def get_name(self):
         '''Returns the name of the ability'''
         return self.name
     
     def get_total_damage(self):
-        '''Calculates the total damage for the ability'''
-        damage_sum = 0
-        for component in self.damage:
-            damage_sum += component.get_damage()
-            #print('Damage Component for ', self.name,': ', component.type,'|', component.total_damage,'|', component.count)
-        return damage_sum  # Return raw value, rounding should only happen at display layer
+        '''Returns the total damage for the ability'''
+        return self.total_damage  # Return raw value, rounding should only happen at display layer
     def get_max_damage(self):
-        '''Returns the highest damage for the ability'''
-        highest = 0
-        for component in self.damage:
-            highest += component.get_highest_damage()
-        return highest
+        '''Returns the highest damage for the ability (the sum of each component's highest hit)'''
+        return self.max_damage
     def get_min_damage(self):
-        '''Returns the lowest damage for the ability'''
-        lowest = 0
-        for component in self.damage:
-            lowest = component.get_lowest_damage()
-        return lowest
+        '''Returns the lowest damage for the ability (of the last damage component)'''
+        if not self.damage: return 0
+        return self.damage[-1].get_lowest_damage()
     def get_average_damage(self):
         '''Divides total damage by the number of hits to get the average damage for the ability.
         Will fall back to using the count if no hits are recorded, and return 0 if no damage or activations have been recorded.'''
-        average = 0
-        count = self.hits if self.count == 0 else self.count
-        total = self.get_total_damage()
-        if  count == 0 or total == 0:
-            return 0
-        average = total / count
-
-        return round(average,2)
+        return self.average_damage
     
     def get_accuracy(self):
         '''Calculates the accuracy for the ability'''
@@ -94,11 +166,9 @@ class Ability(QObject):
         return self.count
     
     def get_dps(self, duration):
-        '''Calculates the DPS for the ability based off of the damage components'''
-        dps = 0
-        for component in self.damage:
-            dps += component.get_dps(duration)
-        return round(dps,2)
+        '''Calculates the DPS for the ability from the running total damage'''
+        if duration == 0: return round(self.total_damage, 2)
+        return round(self.total_damage / duration, 2)
 
     def get_hits(self):
         '''Returns the number of times the ability has hit'''
@@ -0,0 +1,183 @@
+import contextlib
+import os
+from combat.CombatParser import Parser
+from combat.ParseCache import SUMMARY_EXTENSION
+from combat.Timestamp import format_timestamp
+
+SECONDS_PER_HOUR = 3600
+
+
+class SessionSummary:
+    '''The totals of one combat session that the batch report needs, small enough to keep for every session of months of logs.
+    abilities is a tuple of (pet name, ability name, damage, count, hits, tries) for every ability of the player and their pets,
+    the pet name is "" for the player's own abilities.'''
+    __slots__ = ("name", "start_time", "end_time", "duration", "damage", "exp_value", "inf_value", "abilities")
+
+    def __init__(self, session):
+        self.name = session.get_name()
+        self.start_time = session.start_time
+        self.end_time = session.end_time
+        self.duration = session.get_duration()
+        self.damage = session.get_total_damage()
+        self.exp_value = session.get_exp()
+        self.inf_value = session.get_inf()
+        self.abilities = tuple((character.get_name() if character.get_type() == "pet" else "", ability.get_name(), ability.get_total_damage(),
+                                ability.get_count(), ability.get_hits(), ability.get_tries())
+                               for character in session.chars.values() for ability in character.abilities.values())
+
+
+class LogSummary:
+    '''The SessionSummary of every session in a log file, and the exp and inf it gained in each hour (rewards outside of combat sessions
+    count too). offset is the number of bytes of the log summarized, settings the parser settings the sessions were made under.'''
+    __slots__ = ("file_path", "offset", "settings", "line_count", "player_name", "start_time", "end_time", "sessions", "hourly_rewards")
+
+    def __init__(self, file_path, offset, settings):
+        self.file_path = file_path
+        self.offset = offset
+        self.settings = settings
+        self.line_count = 0
+        self.player_name = ""
+        self.start_time = 0 # Timestamps of the first and last events of the log
+        self.end_time = 0
+        self.sessions = []
+        self.hourly_rewards = {} # Timestamp of the start of the hour -> [exp, inf]
+
+
+class SummaryParser(Parser):
+    '''Parser that also adds up the rewards gained in each hour of the log, for summarize_log_file'''
+
+    def clean_variables(self):
+        super().clean_variables()
+        self.hourly_rewards = {}
+
+    def handle_event_reward_gain(self, data):
+        exp_value, inf_value = self.EXP_VALUE, self.INF_VALUE
+        super().handle_event_reward_gain(data)
+        hour = self.GLOBAL_CURRENT_TIME - self.GLOBAL_CURRENT_TIME % SECONDS_PER_HOUR
+        rewards = self.hourly_rewards.setdefault(hour, [0, 0])
+        rewards[0] += self.EXP_VALUE - exp_value
+        rewards[1] += self.INF_VALUE - inf_value
+
+
+def summarize_log_file(file_path, config):
+    '''Parses a whole log file in this process under the given ParserConfig and returns its LogSummary. The session still live at the
+    end of the log is ended there, as if it had timed out. Raises OSError if the file can't be parsed.'''
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull): # The parser reports its progress on stdout
+        parser = SummaryParser(config.copy(PARSE_WORKERS=1, PARSE_CACHE_SIZE=0))
+        if not parser.process_existing_log(file_path):
+            raise OSError("Not a log file: " + file_path)
+        if parser.combat_session_live:
+            parser.time_out_session()
+    summary = LogSummary(file_path, parser.parsed_offset, parser.get_aggregation_settings())
+    summary.line_count = parser.line_count
+    summary.player_name = parser.PLAYER_NAME
+    summary.start_time = parser.GOBAL_START_TIME
+    summary.end_time = parser.GLOBAL_CURRENT_TIME
+    summary.sessions = [SessionSummary(session) for session in parser.combat_session_data]
+    summary.hourly_rewards = parser.hourly_rewards
+    return summary
+
+
+def get_summary_settings(config):
+    '''Returns the settings a LogSummary made under the given ParserConfig has, the same as Parser.get_aggregation_settings'''
+    return (config.COMBAT_SESSION_TIMEOUT, config.COMBAT_SESSION_NAME, config.COMBAT_SESSION_NAMING_MODE, bool(config.ASSOCIATE_PROCS_TO_POWERS))
+
+
+def load_cached_summary(cache, file_path, settings):
+    '''Returns the LogSummary of a log file from the ParseCache, or None if it has none made under these settings, or the log has been
+    written to since it was made'''
+    entry = cache.load(file_path, SUMMARY_EXTENSION, settings)
+    if entry is None or entry[0] != os.path.getsize(file_path):
+        return None
+    return entry[1]
+
+
+def store_summary(cache, summary):
+    '''Saves a LogSummary to the ParseCache, so the log isn't parsed again by the next batch analysis unless it changes'''
+    try:
+        cache.store(summary.file_path, summary.offset, summary, SUMMARY_EXTENSION, summary.settings)
+    except OSError as e:
+        print('WARNING     Could not save the log summary:', e)
+
+
+class BatchReport:
+    '''Combines the LogSummary of many logs (e.g. months of daily logs) into totals for every ability, the DPS of each day and the exp
+    and inf gained in each hour. Summaries can be added in any order.'''
+
+    def __init__(self):
+        self.files = 0
+        self.line_count = 0
+        self.logged_seconds = 0 # Time between the first and last events of each log, added up
+        self.sessions = 0
+        self.abilities = {} # (pet name, ability name) -> [damage, count, hits, tries, sessions]
+        self.days = {} # "YYYY-MM-DD" -> [sessions, combat seconds, damage]
+        self.hourly_rewards = {} # Timestamp of the start of the hour -> [exp, inf]
+
+    def add(self, summary):
+        self.files += 1
+        self.line_count += summary.line_count
+        self.logged_seconds += summary.end_time - summary.start_time
+        self.sessions += len(summary.sessions)
+        for session in summary.sessions:
+            day = self.days.setdefault(format_timestamp(session.start_time)[:10], [0, 0, 0])
+            day[0] += 1
+            day[1] += session.duration
+            day[2] += session.damage
+            for pet_name, name, damage, count, hits, tries in session.abilities:
+                totals = self.abilities.get((pet_name, name))
+                if totals is None:
+                    totals = self.abilities[(pet_name, name)] = [0, 0, 0, 0, 0]
+                totals[0] += damage
+                totals[1] += count
+                totals[2] += hits
+                totals[3] += tries
+                totals[4] += 1
+        for hour, (exp_value, inf_value) in summary.hourly_rewards.items():
+            rewards = self.hourly_rewards.setdefault(hour, [0, 0])
+            rewards[0] += exp_value
+            rewards[1] += inf_value
+
+    def to_dict(self):
+        '''Returns the report as plain values (e.g. to write as JSON): the totals, the abilities by damage, and the days and hours in order'''
+        combat_seconds = sum(day[1] for day in self.days.values())
+        damage = sum(day[2] for day in self.days.values())
+        exp_value = sum(rewards[0] for rewards in self.hourly_rewards.values())
+        inf_value = sum(rewards[1] for rewards in self.hourly_rewards.values())
+        logged_hours = self.logged_seconds / SECONDS_PER_HOUR
+        return {
+            "totals": {
+                "files": self.files, "lines": self.line_count, "sessions": self.sessions, "combat_seconds": combat_seconds,
+                "damage": round(damage, 2), "dps": round(damage / combat_seconds, 2) if combat_seconds else 0,
+                "exp": exp_value, "inf": inf_value, "logged_hours": round(logged_hours, 2),
+                "exp_per_hour": round(exp_value / logged_hours) if logged_hours else 0,
+                "inf_per_hour": round(inf_value / logged_hours) if logged_hours else 0,
+            },
+            "abilities": [{"pet": pet_name, "ability": name, "damage": round(totals[0], 2), "count": totals[1], "hits": totals[2],
+                           "tries": totals[3], "accuracy": round(totals[2] / totals[3] * 100, 2) if totals[3] else 0, "sessions": totals[4]}
+                          for (pet_name, name), totals in sorted(self.abilities.items(), key=lambda item: -item[1][0])],
+            "days": [{"day": day, "sessions": totals[0], "combat_seconds": totals[1], "damage": round(totals[2], 2),
+                      "dps": round(totals[2] / totals[1], 2) if totals[1] else 0}
+                     for day, totals in sorted(self.days.items())],
+            "hours": [{"hour": format_timestamp(hour)[:13] + ":00", "exp": rewards[0], "inf": rewards[1]}
+                      for hour, rewards in sorted(self.hourly_rewards.items())],
+        }
+
+    def format_text(self):
+        '''Returns the report as a text table for the console'''
+        report = self.to_dict()
+        totals = report["totals"]
+        lines = [f"{totals['files']} logs, {totals['sessions']} sessions, {totals['combat_seconds']} s in combat, "
+                 f"{totals['damage']:,.2f} damage ({totals['dps']} DPS)",
+                 f"{totals['exp']:,} exp and {totals['inf']:,} inf over {totals['logged_hours']} logged hours "
+                 f"({totals['exp_per_hour']:,} exp/h, {totals['inf_per_hour']:,} inf/h)", "",
+                 "Abilities", f"  {'ability':<40} {'damage':>14} {'count':>8} {'accuracy':>9} {'sessions':>9}"]
+        for ability in report["abilities"]:
+            name = ability["ability"] + (" (" + ability["pet"] + ")" if ability["pet"] else "")
+            lines.append(f"  {name:<40} {ability['damage']:>14,.2f} {ability['count']:>8} {ability['accuracy']:>9} {ability['sessions']:>9}")
+        lines += ["", "DPS per day", f"  {'day':<10} {'sessions':>9} {'combat s':>9} {'damage':>14} {'DPS':>9}"]
+        for day in report["days"]:
+            lines.append(f"  {day['day']:<10} {day['sessions']:>9} {day['combat_seconds']:>9} {day['damage']:>14,.2f} {day['dps']:>9}")
+        lines += ["", "Exp and inf per hour", f"  {'hour':<16} {'exp':>12} {'inf':>12}"]
+        for hour in report["hours"]:
+            lines.append(f"  {hour['hour']:<16} {hour['exp']:>12,} {hour['inf']:>12,}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,51 @@
+def session_aggregates(session):
+    '''Returns the values shown for a session in the session list: (name, duration, dps, exp, inf)'''
+    return (session.get_name(), session.duration, session.get_dps(), session.get_exp(), session.get_inf())
+
+
+class ChangeSet:
+    '''Records which sessions, characters, abilities and damage components were touched since the last periodic update, so the UI only
+    has to redraw those instead of walking every session.
+
+    Paths are (group, character name, ability name, damage type) tuples, where group is "chars" or "targets" and the trailing levels
+    are None when the change is further up the tree. Touching a path means that row, its parents and its children may have changed.
+
+    The assumption is that this class will be under a mutex lock when it is being accessed.'''
+    def __init__(self):
+        self.paths = {} # Session index -> set of touched paths
+        self.untracked = set() # Session indexes that changed without recording which rows, these have to be copied in full
+        self.session_values = {} # Session index -> (name, duration, dps, exp, inf), filled in by finalize()
+        self.session_count = 0
+        self.session_data = [] # The published SessionSnapshot list, for looking up the touched sessions
+
+    def touch_session(self, index, tracked=True):
+        '''Marks the session itself (name, duration, rewards) as changed.
+        Pass tracked=False when the rows that changed aren't being recorded, so the whole session is treated as touched'''
+        if index not in self.paths:
+            self.paths[index] = set()
+        if not tracked:
+            self.untracked.add(index)
+
+    def touch(self, index, group, character, ability=None, damage=None):
+        '''Marks a character, ability or damage component row of a session as changed'''
+        self.touch_session(index)
+        self.paths[index].add((group, character, ability, damage))
+
+    def discard_session(self, index):
+        '''Forgets any changes to a session that has been removed'''
+        self.paths.pop(index, None)
+        self.untracked.discard(index)
+
+    def is_empty(self):
+        return not self.paths
+
+    def finalize(self, session_data):
+        '''Calculates the new aggregate values of every touched session, ready to be sent to the UI'''
+        self.session_data = session_data
+        self.session_count = len(session_data)
+        for index in list(self.paths):
+            if index >= self.session_count:
+                del self.paths[index]
+                continue
+            self.session_values[index] = session_aggregates(session_data[index])
+        return self
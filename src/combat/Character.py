@@ -1,17 +1,63 @@
-from  PyQt5.QtCore import QObject
+import math
+from combat.Ability import Ability
+
+class Character:
+    '''Stores data about a character, this can be the Player, pets or enemies.
+    Totals across the abilities are kept up to date by the abilities themselves, so abilities must be added with add_ability'''
+    __slots__ = ("name", "type", "abilities", "last_ability", "total_damage", "hits", "tries", "count", "average_sum", "session")
 
-class Character(QObject):
-    '''Stores data about a character, this can be the Player, pets or enemies'''
     def __init__(self, name="", type="") -> None:
-        super().__init__()
         self.name = name
         self.type = type #player, pet, enemy
         self.abilities = {}
-        self.is_pet = False
         self.last_ability = None # For the purposes of associating proc to powers
+        self.total_damage = 0 # Running totals of every ability, see update_totals()
+        self.hits = 0
+        self.tries = 0
+        self.count = 0
+        self.average_sum = 0 # Sum of each ability's average damage, in hundredths
+        self.session = None # The CombatSession this character is one of the chars of, which keeps a running total of their damage
 
     def add_ability(self, ability_name, ability):
+        if ability_name in self.abilities:
+            old = self.abilities[ability_name]
+            old.character = None
+            self.update_totals(-old.total_damage, -old.hits, -old.tries, -old.count, -round(old.average_damage * 100))
         self.abilities[ability_name] = ability
+        ability.character = self
+        self.update_totals(ability.total_damage, ability.hits, ability.tries, ability.count, round(ability.average_damage * 100))
+
+    def update_totals(self, damage=0, hits=0, tries=0, count=0, average=0):
+        '''Applies a change in one of the abilities to the running totals, called by Ability.update_totals'''
+        self.total_damage += damage
+        self.hits += hits
+        self.tries += tries
+        self.count += count
+        self.average_sum += average
+        if damage and self.session is not None:
+            self.session.update_totals(damage)
+
+    def verify_totals(self):
+        '''Consistency check, recalculates every running total from the abilities and raises an AssertionError if any have drifted'''
+        for ability in self.abilities.values():
+            assert ability.character is self, f"{self.name}: {ability.name} was not added with add_ability"
+            ability.verify_totals()
+        abilities = self.abilities.values()
+        assert math.isclose(self.total_damage, sum(a.total_damage for a in abilities), abs_tol=1e-6), f"{self.name}: total damage has drifted"
+        assert self.average_sum == sum(round(a.average_damage * 100) for a in abilities), f"{self.name}: average damage has drifted"
+        assert self.hits == sum(a.hits for a in abilities), f"{self.name}: hits {self.hits} has drifted"
+        assert self.tries == sum(a.tries for a in abilities), f"{self.name}: tries {self.tries} has drifted"
+        assert self.count == sum(a.count for a in abilities), f"{self.name}: count {self.count} has drifted"
+
+    def merge(self, other):
+        '''Adds the abilities of another character to this one, merging any ability they both have. Returns self.
+        Other is left unchanged, its abilities are copied rather than shared'''
+        for name, ability in other.abilities.items():
+            if name in self.abilities:
+                self.abilities[name].merge(ability)
+            else:
+                self.add_ability(name, Ability(ability.name).merge(ability))
+        return self
 
     def set_type(self, type):
         self.type = type
@@ -25,67 +71,36 @@ class Character(QObject):
         return self.name
     
     def get_total_damage(self):
-        '''Calculates the total damage for the character'''
-        sum = 0
-        if self.abilities == {}: return sum
-        for ability in self.abilities:
-            sum += self.abilities[ability].get_total_damage()
-        return sum  # Return raw value, rounding should only happen at display layer
+        '''Returns the total damage for the character'''
+        return self.total_damage  # Return raw value, rounding should only happen at display layer
     
     def get_average_damage(self):
-        '''Calculates the overall average damage per hit for the character by looping through all abilities' average damage and returning the sum'''
-        average = 0
-        ability_count = 0
-        if self.abilities == {}: return average
-        for ability in self.abilities:
-            average += self.abilities[ability].get_average_damage()
-            ability_count += 1
-        if ability_count  > 0 and average > 0:
-            return round(average / ability_count,2)
-        return average
+        '''Returns the overall average damage per hit for the character, which is the mean of all abilities' average damage'''
+        if self.abilities and self.average_sum > 0:
+            return round(self.average_sum / 100 / len(self.abilities),2)
+        return 0
 
     def get_accuracy(self):
         '''Calculates the accuracy for the character'''
-        if self.abilities == {}: return 0
-        hits = 0
-        tries = 0
-        for ability in self.abilities:
-            hits += self.abilities[ability].get_hits()
-            tries += self.abilities[ability].get_tries()
-        if tries == 0: return 0
-        return round((hits / tries) * 100,2)
+        if self.tries == 0: return 0
+        return round((self.hits / self.tries) * 100,2)
     
     def get_hits(self):
         '''Returns the number of times the character has hit'''
-        hits = 0
-        if self.abilities == {}: return hits
-        for ability in self.abilities:
-            hits += self.abilities[ability].get_hits()
-        return hits
+        return self.hits
     
     def get_tries(self):
         '''Returns the number of times the character has been used'''
-        tries = 0
-        if self.abilities == {}: return tries
-        for ability in self.abilities:
-            tries += self.abilities[ability].get_tries()
-        return tries
+        return self.tries
     
     def get_dps(self, duration):
-        '''Calculates the DPS for the character based off of the damage components'''
-        dps = 0
-        if self.abilities == {}: return dps
-        for ability in self.abilities:
-            dps += self.abilities[ability].get_dps(duration)
-        return round(dps,2)
+        '''Calculates the DPS for the character from the running total damage'''
+        if duration == 0: return round(self.total_damage, 2)
+        return round(self.total_damage / duration, 2)
     
     def get_count(self):
         '''Returns the number of times the character has been used'''
-        count = 0
-        if self.abilities == {}: return count
-        for ability in self.abilities:
-            count += self.abilities[ability].get_count()
-        return count
+        return self.count
     
     def get_type(self):
         return self.type
\ No newline at end of file
@@ -1,22 +1,57 @@
 
 import os.path
+import mmap
+import contextlib
 import re
 import time
-from datetime import datetime
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
 from combat.Ability import Ability
 from combat.Character import Character
 from combat.DamageComponent import DamageComponent
 from combat.CombatSession import CombatSession
-from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot, QMutex, QMutexLocker, QTimer, QCoreApplication, QSettings
-from data.Globals import Globals
+from combat.EventClassifier import EventClassifier, BytesEventClassifier
+from combat.ChangeSet import ChangeSet
+from combat.Snapshot import SessionSnapshot
+from combat.MutexWaitTimer import MutexWaitTimer
+from combat.ParseCache import ParseCache, INDEX_EXTENSION
+from combat.ParserConfig import ParserConfig
+from combat.TimeIndex import TimeIndex
+from combat.EventStore import EventStore, is_available as is_event_store_available
+from combat import Timestamp
+from combat import LogChunks
 from data.pseudopets import is_pseudopet
 from data.no_hit_abilities import is_no_hit_ability
-from data.LogPatterns import PATTERNS, PATTERN_DATETIME
-CLI_MODE = False # Flipped to True if this .py file is launched directly instead of through the UI
+from data.LogPatterns import PATTERNS, PATTERN_DATETIME, PATTERN_GATES
+CLI_MODE = False # Flipped to True by the coh-parse command line tool (coh_parse.py), which parses logs without the UI
 
-class Parser(QObject):
+# Substrings that every line able to change the player name or the user session name must contain, taken from the PATTERN_GATES of those
+# events (the last required substring, or else the leading tokens). Used to find the state carried across chunks of a parallel parse.
+STATE_MARKERS = tuple(marker.encode("utf-8") for key in ("player_name", "player_name_backup", "command")
+                      for marker in (PATTERN_GATES[key][1][-1:] or PATTERN_GATES[key][0]))
+
+# Substrings that every line able to give the player name must contain, used by find_player_name to search the log from the bottom up
+PLAYER_NAME_EVENTS = ("player_name", "player_name_backup")
+PLAYER_NAME_MARKERS = tuple(marker.encode("utf-8") for key in PLAYER_NAME_EVENTS for marker in (PATTERN_GATES[key][1][-1:] or PATTERN_GATES[key][0]))
+
+# Parser attributes that make up the state of a parse, saved to and restored from the ParseCache (see Parser.get_parse_state). Only the
+# finished aggregates, not the EventStore they were made from, which would only be needed to aggregate them again.
+PARSE_STATE = ("line_count", "combat_session_data", "no_hitroll_ability_list", "session_count", "session_name_count", "last_session_base_name",
+               "session_number_maxima", "frozen_session_bases", "combat_session_live", "in_combat", "global_combat_duration", "EXP_VALUE",
+               "INF_VALUE", "GOBAL_START_TIME", "GLOBAL_CURRENT_TIME", "user_session_name", "PLAYER_NAME")
+
+def ignore_callback(*args):
+    '''Default for the Parser callbacks that haven't been set'''
+
+
+class Parser:
     '''
     This class handles parsing the combat log file, either live or from an existing file. It will iterate through a given log file, setting up combat sessions and organizing data as it goes.
+
+    It is pure Python and doesn't need Qt: its settings come from a ParserConfig, and its results and progress are delivered through the
+    callbacks given to set_callbacks. The UI runs it through ui.QtParser, which turns the callbacks into signals and drives live monitoring
+    with Qt timers. Without an event loop, follow_live_log monitors the log by polling it.
     '''
 
     LOG_FILE_PATH = ""
@@ -25,36 +60,66 @@ class Parser(QObject):
     monitoring_live = False # Flag to indicate if the parser is monitoring a live log file
     processing_live = False # Flag to indicate when processing is active (or used to terminate processing)
     combat_session_data = [] # Stores a list of combat sessions
-    combat_mutex = QMutex()
-    sig_finished = pyqtSignal(list)
-    sig_periodic_update = pyqtSignal(list)
-    sig_error = pyqtSignal(str, str)  # Signal for errors (message, title)
+    combat_mutex = threading.Lock()
     parentThread = None
     final_update = False # Flag to indicate if a final update is required
     user_session_name = ""
-    settings = QSettings(Globals.AUTHOR, Globals.APPLICATION_NAME)
-
-    def __init__(self, parent=None):
-        super().__init__()
+    LIVE_UPDATE_INTERVAL = 250 # ms, time between the updates sent while a live combat session is changing
+    LIVE_READ_SIZE = 1024 * 1024 # Maximum bytes read from the live log per monitoring_loop call, keeps each batch short enough to not stall the UI
+    LIVE_POLL_MIN_INTERVAL = 10 # ms, fallback polling interval while the log is actively growing
+    LIVE_POLL_MAX_INTERVAL = 1000 # ms, polling backs off to this while idle, the file watcher wakes us up sooner when it can
+    LIVE_CHECKPOINT_INTERVAL = 300 # Seconds, minimum time between saving the parse state to the ParseCache while monitoring live
+    CHECK_RUNNING_TOTALS = False # Debug/test mode, verifies every session's running totals against a full recalculation when it ends
+    RECORD_EVENTS = False # Records every damage and hit roll event in an EventStore for vectorized aggregations, needs NumPy
+    BYTES_INGESTION = True # Existing logs are read through an mmap and classified as bytes, only the fields of events are decoded
+    PARALLEL_MIN_BYTES = 8 * 1024 * 1024 # Existing logs smaller than this are always parsed in this process, starting workers isn't worth it
+    CHUNKS_PER_WORKER = 4 # Logs are split into more chunks than workers, so a slow chunk doesn't hold up the rest and the UI updates sooner
+    MAX_AUTO_WORKERS = 8
+
+    def __init__(self, config=None, **callbacks):
+        self.config = config if config is not None else ParserConfig()
+        self.set_callbacks(**callbacks)
         self.check_parse_settings()
         print('     Parser Initialize...')
-        if self.CONSOLE_VERBOSITY>= 3: print("Creating interval_timer")
-        self.interval_timer = QTimer(parent) # Handles preriodic UI update events
-        self.interval_timer.timeout.connect(self.live_log_interval_update)
-        self.interval_timer.setInterval(250)
-        self.interval_timedout = False
-        self.monitoring_timer = QTimer(parent)
+        self.interval_updates_active = False # Set while live updates are due every LIVE_UPDATE_INTERVAL, see live_log_interval_update
+        self.poll_interval = self.LIVE_POLL_MIN_INTERVAL # ms, how long live monitoring waits before polling the log again
+        self.classifier = EventClassifier(PATTERNS)
+        self.bytes_classifier = BytesEventClassifier(PATTERNS)
+        self.ingest_lock = MutexWaitTimer(self.combat_mutex) # Taken while log lines are processed
+        self.publish_lock = MutexWaitTimer(self.combat_mutex) # Taken while snapshots are published for the UI
         self.clean_variables()
         self.check_parse_settings()
 
+    def set_callbacks(self, on_finished=None, on_periodic_update=None, on_delta_update=None, on_error=None, on_progress=None,
+                      on_session_ended=None):
+        '''Sets the functions the parser delivers its results through, any that aren't given are ignored. They are called from the thread
+        doing the parsing, without the combat_mutex held:
+            on_finished(snapshots): processing has finished or been stopped, with the SessionSnapshot list of every session
+            on_periodic_update(snapshots): the sessions so far, while an existing log is being processed
+            on_delta_update(changes): the ChangeSet of what was touched since the last update, while monitoring live
+            on_error(message, title): the log file could not be read, live monitoring has stopped
+            on_progress(): called regularly while processing an existing log, processing stops once it returns if processing_live is cleared
+            on_session_ended(session): a CombatSession has ended (with the combat_mutex held), it won't be changed or renamed after this.
+                Not called for sessions parsed by worker processes or loaded from the ParseCache, nor for the session still live at the
+                end of an existing log unless time_out_session is called for it'''
+        self.on_finished = on_finished or ignore_callback
+        self.on_periodic_update = on_periodic_update or ignore_callback
+        self.on_delta_update = on_delta_update or ignore_callback
+        self.on_error = on_error or ignore_callback
+        self.on_progress = on_progress or ignore_callback
+        self.on_session_ended = on_session_ended or ignore_callback
+
     def clean_variables(self):
         '''Resets all the parser variables to their default values. This is called when a new log file is loaded or when the parser is reset'''
         self.line_count = 0
+        self.parsed_offset = 0 # Byte offset of the end of the last line parsed by process_existing_log
         self.combat_session_data = [] # Stores a list of combat sessions
         self.no_hitroll_ability_list = {} # Stores a list of abilities that have no hit roll events (ie. were discovered and added using a damage event)
         self.session_count = 0 # Stores the number of combat sessions and also acts as a key to which combat session within the combat_session array is active
         self.session_name_count = 0 # For counting the number of sessions with the same name
         self.last_session_base_name = "" # Stores the base name (without number) of the last session for increment reset logic
+        self.session_number_maxima = {} # Base name -> running maximum of the number suffixes of the sessions before the current one
+        self.frozen_session_bases = [] # Base name of each session before the current one, or None if its name has no number suffix
         self.combat_session_live = False # Flag to indicate if a combat session is active
         self.in_combat = False # Flag to indicate that the player is/has dealing damage
         self.global_combat_duration = 0 # Stores the total durations of all combat sessions
@@ -68,6 +133,29 @@ class Parser(QObject):
         self.GLOBAL_CURRENT_TIME = 0 # Stores the latest timestamp as an int
         self.final_update = False # Flag to indicate if a final update is required
         self.user_session_name = ""
+        self.changes = ChangeSet() # What has been touched since the last snapshots were published
+        self.snapshots = [] # The last published SessionSnapshot list, this list is never modified once it has been sent to the UI
+        self.snapshot_version = 0
+        self.event_store = None # EventStore of every damage and hit roll event when RECORD_EVENTS is set
+        if self.RECORD_EVENTS:
+            if is_event_store_available():
+                self.event_store = EventStore()
+            elif self.CONSOLE_VERBOSITY >= 1:
+                print('WARNING     NumPy is not installed, events will not be recorded')
+        self.ingest_lock.reset()
+        self.publish_lock.reset()
+
+        # Live monitoring lag metrics, see get_live_lag_metrics()
+        self.live_partial_line = b"" # Trailing bytes of a line that hasn't been completely written yet
+        self.live_bytes_behind = 0
+        self.live_batch_lines = 0
+        self.live_max_batch_lines = 0
+        self.live_batch_count = 0
+        self.live_wakeups = 0
+        self.live_empty_wakeups = 0
+        self.live_cpu_start = time.process_time()
+        self.live_checkpoints = False # Set while live monitoring carries on from an existing log pass, see checkpoint_live_log
+        self.events_since_update = False # Set when live events arrive, cleared when the UI has been sent an update
 
         if self.CONSOLE_VERBOSITY >= 2: print('          Parser variables cleaned...')
 
@@ -87,11 +175,15 @@ class Parser(QObject):
         '''Extracts data from a log line using regex patterns, returns a string for the log entry type and a dict of the extracted data.'''
         # Use self.PATTERNS if it exists (updated with player name), otherwise fall back to module PATTERNS
         patterns = getattr(self, 'PATTERNS', PATTERNS)
-        for key, regex in patterns.items():
-            match = regex.match(log_line)
-            if match:
-                return (key, match.groupdict())
-        return '',[]
+        if self.classifier.patterns is not patterns: # Player name changed, rebuild the dispatch table
+            self.classifier = EventClassifier(patterns)
+        return self.classifier.classify(log_line)
+    def extract_from_raw_line(self, log_line):
+        '''Same as extract_from_line for a raw log line (bytes without the line ending), the extracted data is decoded'''
+        patterns = getattr(self, 'PATTERNS', PATTERNS)
+        if self.bytes_classifier.patterns is not patterns:
+            self.bytes_classifier = BytesEventClassifier(patterns)
+        return self.bytes_classifier.classify(log_line)
     def extract_datetime_from_line(self, log_line):
         '''Faster version of extract_from_line that only extracts the datetime from the log line (for use in live monitoring updates)'''
         for key, regex in PATTERN_DATETIME.items():
@@ -127,6 +219,10 @@ class Parser(QObject):
         :param current_session_index: Index of current session to exclude (if updating existing session)
         :return: The highest number used, or 0 if not found
         '''
+        if current_session_index is not None and current_session_index == len(self.combat_session_data) - 1:
+            maxima = self.session_number_maxima.get(base_name)
+            return max(maxima[-1], 0) if maxima else 0
+
         max_number = 0
         for i, sess in enumerate(self.combat_session_data):
             # Skip the current session if we're updating it
@@ -147,6 +243,28 @@ class Parser(QObject):
 
         return max_number
 
+    def freeze_session_name(self, session):
+        '''Records the number suffix of a session that is no longer the current one, only the current session is ever renamed.
+        This keeps get_last_session_number_for_base_name from having to look through every session each time the current one is renamed'''
+        base_name = None
+        parts = session.get_name().rsplit(" ", 1)
+        if len(parts) == 2:
+            try:
+                number = int(parts[1])
+                base_name = parts[0]
+            except ValueError:
+                pass  # Not a number suffix
+        if base_name is not None:
+            maxima = self.session_number_maxima.setdefault(base_name, [])
+            maxima.append(max(number, maxima[-1]) if maxima else number)
+        self.frozen_session_bases.append(base_name)
+
+    def thaw_session_name(self):
+        '''Reverses freeze_session_name once the session after it has been removed, it becomes the current session again'''
+        base_name = self.frozen_session_bases.pop()
+        if base_name is not None:
+            self.session_number_maxima[base_name].pop()
+
     def generate_session_name(self, session, is_new_session=False):
         '''Generates a session name based on the current naming mode setting
 
@@ -160,6 +278,15 @@ class Parser(QObject):
         if base_name is None:
             base_name = self.COMBAT_SESSION_NAME
 
+        return self.number_session_name(base_name, is_new_session)
+
+    def number_session_name(self, base_name, is_new_session=False):
+        '''Adds the numerical suffix to a session base name, keeping count of how many sessions in a row have used it
+
+        :param base_name: The base name from get_session_base_name (or the fallback name)
+        :param is_new_session: True if this is a brand new session being created
+        :return: The base name with numerical suffix
+        '''
         # Determine the session number
         if is_new_session:
             # For new sessions, check last session's base name
@@ -181,6 +308,7 @@ class Parser(QObject):
         self.session_count += 1
         # Create session and generate initial name
         new_session = CombatSession(timestamp, "")
+        if self.combat_session_data: self.freeze_session_name(self.combat_session_data[-1])
         self.combat_session_data.append(new_session)
 
         # Generate the name based on naming mode (will use fallback if no enemy data yet)
@@ -189,7 +317,7 @@ class Parser(QObject):
 
         self.combat_session_live = True
         self.in_combat = False
-        if self.monitoring_live: self.interval_timer.start() # Begins periodic UI refreshes
+        if self.monitoring_live: self.start_interval_updates() # Begins periodic UI refreshes
         if self.CONSOLE_VERBOSITY >= 2: print ("---------->  Combat Session Started: ", self.session_count, '\n')
         return self.combat_session_data[-1]
     
@@ -217,6 +345,8 @@ class Parser(QObject):
         '''Ends the current combat session, finalizes session naming if necessary, calls one last live_monitoring update'''
         session = self.combat_session_data[-1]
         session.update_duration()
+        self.mark_changed()
+        if self.CHECK_RUNNING_TOTALS: session.verify_totals()
 
         # Final name update for "Highest Enemy Damaged" mode
         if self.user_session_name == "" and self.COMBAT_SESSION_NAMING_MODE == "Highest Enemy Damaged":
@@ -237,16 +367,29 @@ class Parser(QObject):
         self.add_global_combat_duration(session.get_duration())
         if self.CONSOLE_VERBOSITY >= 2: print ("---------->  Ended Combat Session: ", self.session_count, " With a duration of ", session.get_duration(), " seconds \n")
         if self.monitoring_live: self.final_update = True
+        self.on_session_ended(session)
 
         # Emit periodic update when processing existing logs (for UI updates during initial processing)
         # Don't hold mutex while emitting signal to avoid blocking
         if self.processing_live and not self.monitoring_live:
-            self.sig_periodic_update.emit(self.combat_session_data)
+            self.on_periodic_update(self.publish_snapshots().session_data)
     
+    def time_out_session(self):
+        '''Ends the current combat session once it has timed out, or removes it if it had no damage'''
+        if self.combat_session_data[-1].has_no_damage():
+            self.remove_last_session()
+        else:
+            self.end_current_session()
+            self.combat_session_live = False
+            self.print_session_results(self.combat_session_data[-1])
+
     def remove_last_session(self):
         '''Removes the current combat session, usually for instances where the session has no damage-related events'''
         if self.CONSOLE_VERBOSITY >= 2: print ("---------->  Removed Combat Session: ", self.session_count, '\n')
+        self.changes.discard_session(len(self.combat_session_data) - 1)
+        if self.event_store is not None: self.event_store.discard_session(len(self.combat_session_data) - 1)
         self.combat_session_data.pop()
+        if self.combat_session_data: self.thaw_session_name()
         self.session_count -= 1
         self.session_name_count -= 1
         self.combat_session_live = False
@@ -265,68 +408,77 @@ class Parser(QObject):
     def interpret_event(self, event, data):
         '''Interprets the data generated by the extract_from_line function and prepares it for the appropriate handler function.
         This will handle updating the global time, checking for combat session status and calling the event handler functions'''
-        # Check for an active combat session and determine if it is still active
+        with self.ingest_lock:
+            self.process_event(event, data)
 
-        # Update the current time and check combat session status
-        with QMutexLocker(self.combat_mutex):
-            self.update_global_time(self.convert_timestamp(data["date"], data["time"]))
-            timestamp = self.GLOBAL_CURRENT_TIME
-            status = self.check_session(timestamp)
+    def process_event(self, event, data):
+        '''Does the work of interpret_event, this must be called while under the combat_mutex lock so that a batch of lines can share a single lock'''
+        timestamp = self.convert_timestamp(data["date"], data["time"])
 
-            def trigger_session_update(in_combat): # Helper function to call session updates as well as beginning new sessions
-                if status == 0 or status == -1:
-                    self.new_session(timestamp)
-                    self.combat_session_data[-1].update_session_time(timestamp, in_combat)
-                if in_combat:
-                    self.combat_session_data[-1].update_session_time(timestamp, in_combat)
+        # Clean the data of all None types
+        for key in data:
+            if data[key] is None:
+                data[key] = ""
 
+        # Update the current time and check combat session status
+        self.update_global_time(timestamp)
+        status = self.check_session(timestamp)
 
-            if status == -1: # Checking for a timed-out combat session
+        def trigger_session_update(in_combat): # Helper function to call session updates as well as beginning new sessions
+            if status == 0 or status == -1:
+                self.new_session(timestamp)
+                self.combat_session_data[-1].update_session_time(timestamp, in_combat)
+            if in_combat:
+                self.combat_session_data[-1].update_session_time(timestamp, in_combat)
 
-                # Remove the session if it had no damage
-                if self.combat_session_data[-1].has_no_damage():
-                    self.remove_last_session()
-                else:
-                    self.end_current_session()
-                    self.combat_session_live = False
-                    self.print_session_results(self.combat_session_data[-1])
-
-            # Clean the data of all None types
-            for key in data:
-                if data[key] is None:
-                    data[key] = ""
-
-            if event == "player_ability_activate":
-                trigger_session_update(False)
-                self.handle_event_player_power_activate(data)
-                
 
-            if event == "player_hit_roll" or event == "player_pet_hit_roll":
-                trigger_session_update(False)
-                self.handle_event_player_hit_roll(data, event == "player_pet_hit_roll")
-
-            elif event == "player_damage" or event == "player_pet_damage":
-                trigger_session_update(True)
-                self.handle_event_player_damage(data, event == "player_pet_damage")
-
-            elif event == "reward_gain_both" or event == "reward_gain_exp" or event == "reward_gain_inf":
-                if data.get("exp_value") is None:
-                    data["exp_value"] = ""
-                if data.get("inf_value") is None: 
-                    data["inf_value"] = ""
-                self.handle_event_reward_gain(data)
-
-            elif event == "player_name" or event == "player_name_backup": # This catches the welcome message that includes the player name either at the start of the log, or further down should the player log out and back in
-                if self.PLAYER_NAME == "" or self.PLAYER_NAME != data["player_name"]: 
-                    self.set_player_name(data["player_name"])
-                    self.PATTERNS = self.update_regex_player_name(self.PLAYER_NAME)
+        if status == -1: # Checking for a timed-out combat session
+            self.time_out_session()
+
+        if event == "player_ability_activate":
+            trigger_session_update(False)
+            self.handle_event_player_power_activate(data)
             
-            elif event == "command":
-                if self.PLAYER_NAME == "": 
-                    self.set_player_name(self.find_player_name())
-                if data["player"] != self.PLAYER_NAME: # Make sure the command is from the player
-                    return
-                self.handle_event_command(data)
+
+        if event == "player_hit_roll" or event == "player_pet_hit_roll":
+            trigger_session_update(False)
+            self.handle_event_player_hit_roll(data, event == "player_pet_hit_roll")
+
+        elif event == "player_damage" or event == "player_pet_damage":
+            trigger_session_update(True)
+            self.handle_event_player_damage(data, event == "player_pet_damage")
+
+        elif event == "reward_gain_both" or event == "reward_gain_exp" or event == "reward_gain_inf":
+            if data.get("exp_value") is None:
+                data["exp_value"] = ""
+            if data.get("inf_value") is None: 
+                data["inf_value"] = ""
+            self.handle_event_reward_gain(data)
+
+        elif event == "player_name" or event == "player_name_backup": # This catches the welcome message that includes the player name either at the start of the log, or further down should the player log out and back in
+            if self.PLAYER_NAME == "" or self.PLAYER_NAME != data["player_name"]: 
+                self.set_player_name(data["player_name"])
+                self.PATTERNS = self.update_regex_player_name(self.PLAYER_NAME)
+        
+        elif event == "command":
+            if self.PLAYER_NAME == "": 
+                self.set_player_name(self.find_player_name())
+            if data["player"] != self.PLAYER_NAME: # Make sure the command is from the player
+                return
+            self.handle_event_command(data)
+
+        self.mark_changed() # Duration, name or rewards of the current session may have changed
+
+    def mark_changed(self, group=None, character=None, ability=None):
+        '''Records that the current session (or one of its character/ability rows) changed, so that the next published snapshot only
+        copies what was touched, and the next delta update to the UI only redraws it.
+        Rows are only tracked while monitoring live, otherwise a changed session is copied in full when it is published.'''
+        if not self.combat_session_data: return
+        index = len(self.combat_session_data) - 1
+        if group is None:
+            self.changes.touch_session(index, self.monitoring_live)
+        elif self.monitoring_live:
+            self.changes.touch(index, group, character, ability)
 
     def handle_event_player_power_activate(self, data):
         '''Handles power activation events found by the interpret_event function. This function will also create new abilities in the character list if they don't already exist.
@@ -344,12 +496,13 @@ class Parser(QObject):
         player = this_session.chars[player]
         
         if this_ability not in player.abilities: 
-            player.abilities[this_ability] = Ability(this_ability)
+            player.add_ability(this_ability, Ability(this_ability))
             if self.CONSOLE_VERBOSITY >= 3: print("     Added Ability: ", this_ability, " to Character: ", player.get_name(), ' via Power Activation Event')
         
         this_ability = player.abilities[this_ability]
         this_ability.ability_used()
         player.last_ability = this_ability # Setting the active ability here to cover non-damaging abilities with procs attached to them
+        self.mark_changed("chars", player.get_name(), this_ability.get_name())
 
     
     def handle_event_player_hit_roll(self, data, pet=False):
@@ -388,13 +541,16 @@ class Parser(QObject):
             if self.CONSOLE_VERBOSITY >= 2:
                 print(f"     Added Target: {target} to Session: {self.session_count} via Hit Roll Event")
 
+        if self.event_store is not None:
+            self.event_store.append_hit_roll(self.GLOBAL_CURRENT_TIME, len(self.combat_session_data) - 1, caster, target, this_ability, data["outcome"] == "HIT")
+
         caster = this_session.chars[caster]
         target = this_session.targets[target]
 
         # Add the ability information to each character's ability list
         for char in [caster, target]:
             if this_ability not in char.abilities:
-                char.abilities[this_ability] = Ability(this_ability)
+                char.add_ability(this_ability, Ability(this_ability))
                 if self.CONSOLE_VERBOSITY >= 3:
                     print(f"     Added Ability: {this_ability} to Character: {char.get_name()} via Hit Roll Event")
 
@@ -414,6 +570,8 @@ class Parser(QObject):
         # Update the caster's last_ability to ensure procs are associated correctly
         # This is especially important for non-damaging abilities (debuffs, buffs, etc.)
         caster.last_ability = caster.abilities[this_ability]
+        self.mark_changed("chars", caster.get_name(), this_ability)
+        self.mark_changed("targets", target.get_name(), this_ability)
 
 
 
@@ -462,6 +620,10 @@ class Parser(QObject):
         if not check_target:
             if self.CONSOLE_VERBOSITY >= 3: print("     Added New Target: ", this_session.targets[target].get_name(), " to Session: ", self.session_count, ' via Damage Event')
 
+        if self.event_store is not None:
+            self.event_store.append_damage(self.GLOBAL_CURRENT_TIME, len(self.combat_session_data) - 1, caster, target, this_ability,
+                                           data["damage_type"], flair, damage, proc)
+
         # Track first enemy damaged for session naming (only if damage > 0)
         target_name = data["target"]
         if damage > 0:
@@ -469,19 +631,18 @@ class Parser(QObject):
 
             # Update session name if using enemy-based naming and no custom name is set
             if self.user_session_name == "":
-                if self.COMBAT_SESSION_NAMING_MODE in ["First Enemy Damaged", "Highest Enemy Damaged"]:
+                current_name = this_session.get_name()
+                # Check if current name is using the fallback (starts with default session name), before looking for the enemy's name
+                if self.COMBAT_SESSION_NAMING_MODE in ["First Enemy Damaged", "Highest Enemy Damaged"] and current_name.startswith(self.COMBAT_SESSION_NAME + " "):
                     # Get the current base name from the session
                     new_base_name = self.get_session_base_name(this_session)
 
                     # Only update if we now have enemy data (transitioning from fallback)
                     if new_base_name is not None and new_base_name != self.COMBAT_SESSION_NAME:
-                        current_name = this_session.get_name()
-                        # Check if current name is using the fallback (starts with default session name)
-                        if current_name.startswith(self.COMBAT_SESSION_NAME + " "):
-                            new_name = self.generate_session_name(this_session)
-                            this_session.set_name(new_name)
-                            if self.CONSOLE_VERBOSITY >= 3:
-                                print(f"     Session renamed from '{current_name}' to '{new_name}'")
+                        new_name = self.generate_session_name(this_session)
+                        this_session.set_name(new_name)
+                        if self.CONSOLE_VERBOSITY >= 3:
+                            print(f"     Session renamed from '{current_name}' to '{new_name}'")
 
         caster = this_session.chars[caster]
         target = this_session.targets[target]
@@ -493,36 +654,13 @@ class Parser(QObject):
                 proc_name = data["ability"]
 
             if caster.last_ability is not None and self.associating_procs: # We'll check and process procs first
-                # Check if this proc damage component already exists
-                existing_proc = None
-                for component in caster.last_ability.damage:
-                    if component.type == proc_name:
-                        existing_proc = component
-                        break
-
-                if existing_proc is None:
-                    # First time this proc fires - create new component and initialize parent_hits
-                    proc_component = DamageComponent(proc_name, is_proc=True)
-                    proc_component.parent_hits = caster.last_ability.get_hits()
-                    caster.last_ability.add_damage(proc_component, damage)
-                else:
-                    # Proc already exists - just add damage
-                    caster.last_ability.add_damage(DamageComponent(proc_name, is_proc=True), damage)
+                # The first time this proc fires on the ability its component is created, with parent_hits starting from the ability's hits
+                caster.last_ability.accumulate_damage(proc_name, damage, is_proc=True)
+                self.mark_changed("chars", caster.get_name(), caster.last_ability.get_name())
 
                 if target.last_ability is not None:
-                    # Check if this proc damage component already exists for target
-                    existing_target_proc = None
-                    for component in target.last_ability.damage:
-                        if component.type == proc_name:
-                            existing_target_proc = component
-                            break
-
-                    if existing_target_proc is None:
-                        target_proc_component = DamageComponent(proc_name, is_proc=True)
-                        target_proc_component.parent_hits = target.last_ability.get_hits()
-                        target.last_ability.add_damage(target_proc_component, damage)
-                    else:
-                        target.last_ability.add_damage(DamageComponent(proc_name, is_proc=True), damage)
+                    target.last_ability.accumulate_damage(proc_name, damage, is_proc=True)
+                    self.mark_changed("targets", target.get_name(), target.last_ability.get_name())
                 return
             elif damage == 0:
                 if self.CONSOLE_VERBOSITY >= 2: print(f"Ignoring zero-damage proc event: {data['ability']} on {data['target']}")
@@ -537,7 +675,7 @@ class Parser(QObject):
             char_ability = this_ability
 
             if char_ability not in char.abilities:
-                char.abilities[char_ability] = Ability(char_ability, proc=proc)
+                char.add_ability(char_ability, Ability(char_ability, proc=proc))
                 if self.CONSOLE_VERBOSITY >= 2:
                     print(f"     Added Ability: {char_ability} to Character: {char.get_name()} via Damage Event")
 
@@ -546,7 +684,7 @@ class Parser(QObject):
             caster_ability = caster.get_ability(this_ability)
 
 
-            char_ability.add_damage(DamageComponent(type), damage)
+            char_ability.accumulate_damage(type, damage)
             if self.CONSOLE_VERBOSITY >= 3: 
                     print ('         Damage Component Added to ', char.get_name(),': ', char_ability.damage[-1].type, char_ability.damage[-1].get_last_damage(), 'Count: ', char_ability.damage[-1].count)
 
@@ -571,6 +709,7 @@ class Parser(QObject):
                 char_ability.ability_used()
 
             char.last_ability = char_ability
+            self.mark_changed("chars" if current_char == caster else "targets", char.get_name(), char_ability.get_name())
             if current_char == caster: current_char = target # Switch to the target for the second loop
 
 
@@ -594,8 +733,7 @@ class Parser(QObject):
 
     def handle_event_command(self, data):
         if data["command"] == "SET_NAME":
-            self.user_session_name = data["value"]
-            self.last_session_base_name = ""  # Reset to trigger counter reset
+            self.set_user_session_name(data["value"])
             if self.CONSOLE_VERBOSITY >= 2 or self.monitoring_live: print ("          Setting Session Name to: ", self.user_session_name, '\n')
             if self.combat_session_live:
                 new_name = self.generate_session_name(self.combat_session_data[-1])
@@ -610,19 +748,19 @@ class Parser(QObject):
 
 
             if data["value"] != "":
-                self.user_session_name = data["value"]
-                self.last_session_base_name = ""  # Reset to trigger counter reset
+                self.set_user_session_name(data["value"])
 
             self.new_session(self.GLOBAL_CURRENT_TIME)
 
+    def set_user_session_name(self, name):
+        '''Sets the session name given by a chat command, which overrides the naming mode for every session after it'''
+        self.user_session_name = name
+        self.last_session_base_name = ""  # Reset to trigger counter reset
+
     
     def convert_timestamp(self, date, time):
-        '''Converts a timestamp from the log file into a datetime object and returns an int representing the time in seconds'''
-        # Convert the date and time into a datetime object
-        timestamp = datetime.strptime(date + " " + time, "%Y-%m-%d %H:%M:%S")
-        # Convert the datetime object into an int representing the time in seconds
-        timestamp = timestamp.hour * 3600 + timestamp.minute * 60 + timestamp.second
-        return timestamp
+        '''Converts a timestamp from the log file into an int representing the time in seconds since the epoch'''
+        return Timestamp.convert_timestamp(date, time)
     
     def update_global_time(self, timestamp):
         '''Checks if the timestamp is the first event, if it is, set the start time to the timestamp, otherwise update the current time'''
@@ -692,14 +830,16 @@ class Parser(QObject):
         # Check if the log file path is set
         if self.LOG_FILE_PATH == "":
             print('          Cannot find Player Name - Log File Path not set')
-        
-        # Open the log file then read each line from bottom up to match the last player_name pattern
-        with open(self.LOG_FILE_PATH, 'r', encoding='utf-8') as file:
-            for line in list(file):
-                event, data = self.extract_from_line(line)
-                if (event == "player_name" or event == "player_name_backup") and isinstance(data, dict):
-                    print ('          Player Name Located: ', data["player_name"])
-                    return data["player_name"]
+            return "Player"
+
+        # Only the lines containing a marker of the player name patterns are decoded and matched, from the last line of the log upwards
+        patterns = getattr(self, 'PATTERNS', PATTERNS)
+        for offset, line in LogChunks.find_last_lines_containing(self.LOG_FILE_PATH, PLAYER_NAME_MARKERS):
+            for event in PLAYER_NAME_EVENTS:
+                match = patterns[event].match(line)
+                if match:
+                    print ('          Player Name Located: ', match.group("player_name"))
+                    return match.group("player_name")
 
         print('          Unable to find Player Name in log file')
         return "Player"
@@ -710,8 +850,9 @@ class Parser(QObject):
         self.PATTERNS = self.update_regex_player_name(self.PLAYER_NAME)
 
 
-    def process_existing_log(self, file_path):
-        '''Analyses a log file that has already been created. Function will terminate once the bottom of the file is reached'''
+    def process_existing_log(self, file_path, hold_partial_line=False):
+        '''Analyses a log file that has already been created. Function will terminate once the bottom of the file is reached.
+        With hold_partial_line, parsing stops at the end of the last complete line, so that live monitoring can carry on from parsed_offset'''
         
         # Check if the file path is valid
         if not self.is_valid_file_path(file_path):
@@ -720,21 +861,77 @@ class Parser(QObject):
     
         self.clean_variables()
 
-        if self.settings.value("AssociateProcsToPowers", True, bool):
-            self.associating_procs = True
-        else:
-            self.associating_procs = False
+        self.associating_procs = bool(self.get_config().ASSOCIATE_PROCS_TO_POWERS)
 
         print('          Processing Log File: ', self.LOG_FILE_PATH)
         _log_process_start_ = time.time()
         #self.set_player_name(self.find_player_name())
         
+        self.processing_live = True
+        start = self.resume_from_parse_cache()
+        end = self.get_parse_end(hold_partial_line)
+        if start > 0 or not self.process_existing_log_parallel(end):
+            self.process_existing_log_serial(start, end)
+        print('          Log File processed in: ', round(time.time() - _log_process_start_, 2), ' seconds')
+
+        # Only call on_finished if not suppressed (used when processing existing then starting live)
+        if not getattr(self, 'suppress_finished_signal', False):
+            with self.publish_lock:
+                snapshots = self.publish_snapshots().session_data
+            self.on_finished(snapshots)
+
+        # Saved once the UI has the results, not if processing was stopped part way through or nothing new was parsed
+        if self.processing_live and self.parsed_offset != start:
+            self.save_to_parse_cache()
+            self.get_time_index(self.parsed_offset) # Brings the index up to date, so a time range of the log can be parsed straight away
+        return True
+
+    def process_log_range(self, file_path, start_time=None, end_time=None):
+        '''Analyses only the part of an existing log between two timestamps (seconds since the epoch, as from Timestamp.convert_timestamp),
+        either of which can be None for the start or the end of the log. The log's TimeIndex finds where they are in the file, so only
+        that part of it is read. Sessions are made from the lines in the range alone, and the ParseCache isn't used for them.'''
+        if not self.is_valid_file_path(file_path):
+            return False
+        self.set_log_file(file_path)
+        self.clean_variables()
+        self.associating_procs = bool(self.get_config().ASSOCIATE_PROCS_TO_POWERS)
+
+        print('          Processing Log File: ', self.LOG_FILE_PATH, 'from', start_time, 'to', end_time)
+        _log_process_start_ = time.time()
+        self.processing_live = True
+        index = self.get_time_index()
+        start = 0 if start_time is None else index.find_offset(self.LOG_FILE_PATH, start_time)
+        end = index.indexed_offset if end_time is None else index.find_offset(self.LOG_FILE_PATH, end_time)
+        if 0 < start < end: # Carry on with the player name and session name the log had reached by the start of the range
+            player_name, user_session_name = self.get_chunk_entry_states([start])[0]
+            if player_name != "" and player_name != self.PLAYER_NAME: self.set_player_name(player_name)
+            self.user_session_name = user_session_name
+        if start < end:
+            self.process_existing_log_serial(start, end)
+        print('          Log File range processed in: ', round(time.time() - _log_process_start_, 2), ' seconds')
+
+        if not getattr(self, 'suppress_finished_signal', False):
+            with self.publish_lock:
+                snapshots = self.publish_snapshots().session_data
+            self.on_finished(snapshots)
+        return True
+
+    def get_parse_end(self, hold_partial_line=False):
+        '''Returns the byte offset the existing log pass should stop at: the current end of the file, or the end of its last complete line'''
+        end = os.path.getsize(self.LOG_FILE_PATH)
+        if hold_partial_line and end > 0:
+            with open(self.LOG_FILE_PATH, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                end = data.rfind(b"\n", 0, end) + 1
+        return end
+
+    def process_existing_log_serial(self, start, end):
+        '''Parses the log file line by line in this process, between two byte offsets'''
         #Open file and iterate through each line
-        with open(self.LOG_FILE_PATH, 'r', encoding='utf-8') as file:
-            refresher = 0 #just keeps the UI responsive
-            self.processing_live = True
-            for line in file:
-                event, data = self.extract_from_line(line)
+        with open(self.LOG_FILE_PATH, 'rb') as file:
+            refresher = 0 # Calls on_progress regularly, which keeps the UI responsive
+            lines, extract = self.get_line_reader(file, start, end)
+            for line in lines:
+                event, data = extract(line)
                 self.line_count += 1
                 refresher += 1
                 if event != "":
@@ -742,85 +939,417 @@ class Parser(QObject):
                     self.interpret_event(event, data)
                 if refresher > 500:
                     refresher = 0
-                    QCoreApplication.processEvents()
-                    if not self.processing_live: break
-        print('          Log File processed in: ', round(time.time() - _log_process_start_, 2), ' seconds')
+                    self.on_progress()
+                    if not self.processing_live: return
+        self.parsed_offset = end
+
+    def get_line_reader(self, file, start, end):
+        '''Returns the lines between two byte offsets of an existing log, and the function to extract the event from each of them'''
+        if self.BYTES_INGESTION:
+            return LogChunks.read_raw_lines(file, start, end), self.extract_from_raw_line
+        return LogChunks.read_lines(file, start, end), self.extract_from_line
+
+    def get_parse_workers(self):
+        '''Returns the number of worker processes to parse existing logs with, 1 means the log is always parsed serially'''
+        if self.PARSE_WORKERS > 0:
+            return self.PARSE_WORKERS
+        return max(1, min(os.cpu_count() or 1, self.MAX_AUTO_WORKERS))
+
+    def process_existing_log_parallel(self, end):
+        '''Parses a large log file in worker processes. The file is split into chunks at quiet gaps longer than the combat session timeout,
+        so no session spans two chunks, and the chunks are merged back in order as they finish. The results are identical to parsing it serially.
+
+        Returns False without parsing anything if the log should be parsed serially instead: it is too small, only one worker is set,
+        sessions never time out, no gaps were found, or a chunk turned out not to begin with a timed-out session.'''
+        workers = self.get_parse_workers()
+        if workers < 2 or self.COMBAT_SESSION_TIMEOUT <= 0 or end < self.PARALLEL_MIN_BYTES:
+            return False
+        chunks = LogChunks.find_chunk_boundaries(self.LOG_FILE_PATH, self.COMBAT_SESSION_TIMEOUT, workers * self.CHUNKS_PER_WORKER, end,
+                                                 self.get_time_index(end))
+        if len(chunks) < 2:
+            return False
+        states = self.get_chunk_entry_states([start for start, end in chunks])
+        settings = self.get_chunk_settings()
+        if self.CONSOLE_VERBOSITY >= 2: print('          Parsing', len(chunks), 'chunks with', min(workers, len(chunks)), 'workers')
 
-        # Only emit sig_finished if not suppressed (used when processing existing then starting live)
-        if not getattr(self, 'suppress_finished_signal', False):
-            self.sig_finished.emit(self.combat_session_data)
-        return True
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=multiprocessing.get_context("spawn"))
+        try:
+            futures = [executor.submit(parse_log_chunk, self.LOG_FILE_PATH, start, end, settings, player_name, user_session_name, index == len(chunks) - 1)
+                       for index, ((start, end), (player_name, user_session_name)) in enumerate(zip(chunks, states))]
+            pending_end_time = None # End time of a session a chunk ended early, assuming the first event of the next chunk would time it out
+            split_correctly = True
+            for future in futures:
+                while not wait([future], timeout=0.05).done:
+                    self.on_progress()
+                    if not self.processing_live: return True
+                result = future.result()
+                if result["start_time"] != 0: # Chunks without any events don't affect the session that was ended early
+                    if pending_end_time is not None and result["start_time"] - pending_end_time <= self.COMBAT_SESSION_TIMEOUT:
+                        split_correctly = False # The timestamps went backwards across the gap, so the session would have carried on
+                        break
+                    pending_end_time = result["last_end_time"]
+                with self.ingest_lock:
+                    self.merge_chunk_result(result)
+                    snapshots = self.publish_snapshots().session_data
+                self.on_periodic_update(snapshots)
+            if split_correctly and pending_end_time is None:
+                self.parsed_offset = chunks[-1][1]
+                return True
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        print('WARNING     Log could not be split into chunks, parsing it serially')
+        self.clean_variables()
+        self.processing_live = True
+        return False
+
+    def get_chunk_settings(self):
+        '''Returns the parser settings the worker processes need, they can't rely on the config as it may have been changed since'''
+        return {
+            "COMBAT_SESSION_TIMEOUT": self.COMBAT_SESSION_TIMEOUT,
+            "COMBAT_SESSION_NAME": self.COMBAT_SESSION_NAME,
+            "COMBAT_SESSION_NAMING_MODE": self.COMBAT_SESSION_NAMING_MODE,
+            "CONSOLE_VERBOSITY": self.CONSOLE_VERBOSITY,
+            "CHECK_RUNNING_TOTALS": self.CHECK_RUNNING_TOTALS,
+            "RECORD_EVENTS": self.RECORD_EVENTS,
+            "BYTES_INGESTION": self.BYTES_INGESTION,
+            "associating_procs": self.associating_procs,
+        }
+
+    def get_chunk_entry_states(self, starts):
+        '''Returns the (player name, user session name) that parsing would have reached at each of the given byte offsets.
+        Only the lines that could be player name events or chat commands are read, which is a tiny fraction of the log.'''
+        player_name = self.PLAYER_NAME
+        user_session_name = self.user_session_name
+        classifier = EventClassifier(getattr(self, 'PATTERNS', PATTERNS))
+        lines = LogChunks.find_lines_containing(self.LOG_FILE_PATH, STATE_MARKERS)
+        states = []
+        index = 0
+        for start in starts:
+            while index < len(lines) and lines[index][0] < start:
+                event, data = classifier.classify(lines[index][1])
+                index += 1
+                if event == "player_name" or event == "player_name_backup":
+                    if player_name != data["player_name"]:
+                        player_name = data["player_name"]
+                        classifier = EventClassifier(self.update_regex_player_name(player_name))
+                elif event == "command":
+                    if player_name == "":
+                        player_name = self.find_player_name()
+                        classifier = EventClassifier(self.update_regex_player_name(player_name))
+                    if data["player"] != player_name: continue
+                    value = data["value"] or ""
+                    if data["command"] == "SET_NAME" or (data["command"] == "START_SESSION" and value != ""):
+                        user_session_name = value
+            states.append((player_name, user_session_name))
+        return states
+
+    def merge_chunk_result(self, result):
+        '''Adds the sessions and totals parsed from a chunk by a worker process. The sessions are named again here, replaying the
+        worker's naming in order, as the numbering depends on every session before them.'''
+        session_offset = len(self.combat_session_data)
+        for operation in result["naming"]:
+            if operation[0] == "name":
+                base_name, is_new_session, session = operation[1:]
+                if is_new_session:
+                    session.uid = next(CombatSession.uid_counter) # Worker uids aren't unique across processes
+                    if self.combat_session_data: self.freeze_session_name(self.combat_session_data[-1])
+                    self.combat_session_data.append(session)
+                    self.session_count += 1
+                session.set_name(self.number_session_name(base_name, is_new_session))
+                self.mark_changed()
+            elif operation[0] == "remove":
+                self.remove_last_session()
+            elif operation[0] == "reset":
+                self.last_session_base_name = ""
+
+        if self.event_store is not None and result["event_store"] is not None: # Added after the naming, as that removes sessions again
+            self.event_store.extend(result["event_store"], session_offset)
+        self.line_count += result["line_count"]
+        self.add_exp(result["exp"])
+        self.add_inf(result["inf"])
+        self.add_global_combat_duration(result["global_combat_duration"])
+        self.no_hitroll_ability_list.update(result["no_hitroll_ability_list"])
+        if result["start_time"] != 0:
+            self.update_global_time(result["start_time"])
+            self.update_global_time(result["current_time"])
+        self.combat_session_live = result["combat_session_live"]
+        self.in_combat = result["in_combat"]
+        if result["player_name"] != self.PLAYER_NAME:
+            self.set_player_name(result["player_name"])
+        self.user_session_name = result["user_session_name"]
     
-    @pyqtSlot()
-    def process_live_log(self, file_path):
+    def get_aggregation_settings(self):
+        '''Returns the settings that change how the parsed events are grouped into sessions and abilities'''
+        return (self.COMBAT_SESSION_TIMEOUT, self.COMBAT_SESSION_NAME, self.COMBAT_SESSION_NAMING_MODE, self.associating_procs)
+
+    def get_parse_state(self):
+        '''Returns everything parsed so far as a dict of the PARSE_STATE attributes, along with the settings they were parsed under'''
+        state = {key: getattr(self, key) for key in PARSE_STATE}
+        state["settings"] = self.get_aggregation_settings()
+        return state
+
+    def set_parse_state(self, state):
+        '''Carries on from a state returned by get_parse_state. Returns False, without changing anything, if the state was made under
+        other settings or events have to be recorded in an EventStore, which isn't part of it.'''
+        if state["settings"] != self.get_aggregation_settings() or self.RECORD_EVENTS:
+            return False
+        for key in PARSE_STATE:
+            setattr(self, key, state[key])
+        for session in self.combat_session_data:
+            session.uid = next(CombatSession.uid_counter) # The saved uids could clash with the ones given out in this process
+        if self.PLAYER_NAME != "":
+            self.PATTERNS = self.update_regex_player_name(self.PLAYER_NAME)
+        return True
+
+    def get_parse_cache(self):
+        '''Returns the ParseCache for parsed log states, or None if it has been turned off'''
+        if self.PARSE_CACHE_SIZE <= 0:
+            return None
+        return ParseCache(self.PARSE_CACHE_DIR, self.PARSE_CACHE_SIZE * 1024 * 1024)
+
+    def get_time_index(self, end=None):
+        '''Returns the TimeIndex of the log file up to end (the end of the file by default). It is loaded from the ParseCache directory
+        when it has been indexed before, and only what has been appended since is sampled, then it is saved there again'''
+        cache = self.get_parse_cache()
+        entry = cache.load(self.LOG_FILE_PATH, INDEX_EXTENSION) if cache is not None else None
+        index = entry[1] if entry is not None else TimeIndex()
+        if index.update(self.LOG_FILE_PATH, end) and cache is not None:
+            try:
+                cache.store(self.LOG_FILE_PATH, index.indexed_offset, index, INDEX_EXTENSION)
+            except OSError as e:
+                if self.CONSOLE_VERBOSITY >= 1: print('WARNING     Could not save the time index:', e)
+        return index
+
+    def resume_from_parse_cache(self):
+        '''Loads the cached state of the log file if it has been parsed before, returns the byte offset to carry on parsing from (0 if nothing was loaded)'''
+        cache = self.get_parse_cache()
+        if cache is None or self.RECORD_EVENTS: # The cached state has no EventStore
+            return 0
+        entry = cache.load(self.LOG_FILE_PATH, settings=self.get_aggregation_settings())
+        if entry is None or not self.set_parse_state(entry[1]):
+            return 0
+        self.parsed_offset = entry[0]
+        print('          Loaded cached parse, parsing the last', os.path.getsize(self.LOG_FILE_PATH) - self.parsed_offset, 'bytes')
+        return self.parsed_offset
+
+    def save_to_parse_cache(self):
+        '''Saves the state of the parse to the ParseCache, so the log doesn't have to be parsed again from the start next time'''
+        cache = self.get_parse_cache()
+        if cache is None or self.parsed_offset == 0:
+            return
+        with open(self.LOG_FILE_PATH, 'rb') as file:
+            file.seek(self.parsed_offset - 1)
+            if file.read(1) != b"\n": # The last line may still have been being written, it would be parsed twice
+                return
+        try:
+            cache.store(self.LOG_FILE_PATH, self.parsed_offset, self.get_parse_state(), settings=self.get_aggregation_settings())
+        except OSError as e:
+            if self.CONSOLE_VERBOSITY >= 1: print('WARNING     Could not save the parse cache:', e)
+
+    def process_live_log(self, file_path, offset=None):
+        '''Starts monitoring the log file for new lines. By default only lines written from now on are read, given the byte offset an
+        existing log pass finished at (parsed_offset) it carries on from there instead, so no line is missed or read twice.
+        Carrying on from a pass over the whole log also saves checkpoints of the parse state to the ParseCache while monitoring.
+        This only opens the log, monitoring_loop has to be called to read it: see follow_live_log, or ui.QtParser which calls it from timers'''
         if self.CONSOLE_VERBOSITY >= 4: print("Inside method process_live_log, with file_path: ", file_path, '\n')
 
         if not self.is_valid_file_path(file_path):
             return False
         self.set_log_file(file_path)
         self.check_parse_settings() # Call this again in case settings have been adjusted at all
-        self.set_player_name(self.find_player_name())
+        if offset is None or self.PLAYER_NAME == "":
+            self.set_player_name(self.find_player_name())
 
+        self.set_poll_interval(self.LIVE_POLL_MIN_INTERVAL) # Polling is only a fallback, the interval backs off while the log is idle
+        self.start_watching_log_file()
+        self.monitoring_live = True
+        if self.CONSOLE_VERBOSITY >= 3: print("Live monitoring started, polling every", self.poll_interval, "ms")
 
+        self.log_file = open(self.LOG_FILE_PATH, 'rb') # Binary so we can track exact byte offsets and hold back partially written lines
+        if offset is None:
+            self.log_file.seek(0, 2)
+        else:
+            self.log_file.seek(offset)
+        self.live_checkpoints = offset is not None # The parse state only covers the whole log if an existing log pass came first
+        self.last_checkpoint_time = time.time()
+        self.live_partial_line = b""
+        self.live_cpu_start = time.process_time()
+
+    def follow_live_log(self, file_path, offset=None):
+        '''Monitors the log file like process_live_log, without needing an event loop: polls it with monitoring_loop and sends live updates
+        every LIVE_UPDATE_INTERVAL while sessions are changing. Blocks until monitoring is stopped (by stop_monitoring from another thread
+        or a callback, or by an error reading the log), returns False if the file path isn't valid'''
+        if self.process_live_log(file_path, offset) is False:
+            return False
+        next_update = time.monotonic()
+        while self.monitoring_live:
+            self.monitoring_loop()
+            if self.interval_updates_active and time.monotonic() >= next_update:
+                self.live_log_interval_update()
+                next_update = time.monotonic() + self.LIVE_UPDATE_INTERVAL / 1000
+            time.sleep(self.poll_interval / 1000)
+        return True
+
+    def start_watching_log_file(self):
+        '''Called when live monitoring starts, for a subclass to start whatever calls monitoring_loop'''
+
+    def stop_watching_log_file(self):
+        '''Called when live monitoring stops, for a subclass to stop whatever calls monitoring_loop'''
+
+    def set_poll_interval(self, interval):
+        '''Sets how long (in ms) live monitoring waits before polling the log again'''
+        self.poll_interval = interval
+
+    def start_interval_updates(self):
+        '''Starts sending live updates every LIVE_UPDATE_INTERVAL, see live_log_interval_update'''
+        self.interval_updates_active = True
+
+    def stop_interval_updates(self):
+        '''Suspends live updates until start_interval_updates is called again'''
+        self.interval_updates_active = False
 
-        self.monitoring_timer.timeout.connect(self.monitoring_loop)
-        self.monitoring_timer.setInterval(10)
-        self.monitoring_timer.start()  # Adjust the interval (in milliseconds) as needed
-        self.monitoring_live = True
-        if self.CONSOLE_VERBOSITY >= 3: 
-            print("monitoring_log timer started:", self.monitoring_timer.isActive(),"|", self.monitoring_timer.interval(), "ms interval")
-            # print out the status of the event loop to confirm operation
 
-        self.log_file = open(self.LOG_FILE_PATH, 'r', encoding='utf-8')
-        self.log_file.seek(0, 2)
-        
     def monitoring_loop(self):
         '''
-        Reads new lines from the log file and processes them in real-time. This then calls the interpret_event function to handle the extracted data.
+        Reads every complete line appended to the log file since the last call and processes them in real-time, as a single batch under one combat_mutex lock.
+        Any partially written line at the end of the file is held back until the rest of it arrives.
 
-        :param self: Description
+        :param self: Parser instance
         '''
         try:
             file = self.log_file
             if file is None:
                 raise Exception("Cannot read from log file.")
-            line = file.readline()
+            self.live_wakeups += 1
+            chunk = file.read(self.LIVE_READ_SIZE)
+            block = self.live_partial_line + chunk
+            self.live_bytes_behind = os.fstat(file.fileno()).st_size - file.tell()
+            # Lines end at \n, \r\n or a lone \r like in an existing log pass (LogChunks.read_raw_lines), a \r as the very last byte
+            # could still be the first half of a \r\n so it waits for the next read
+            end = max(block.rfind(b"\n"), block.rfind(b"\r", 0, len(block) - 1)) + 1
+            self.live_partial_line = block[end:]
+            lines = [line.decode('utf-8', errors='replace') for line in block[:end].splitlines()]
         except Exception as e:
-            # Stop the monitoring timer to prevent repeated error attempts
-            self.monitoring_timer.stop()
+            # Stop polling to prevent repeated error attempts
+            self.stop_watching_log_file()
             self.monitoring_live = False
 
-            # Emit error signal for UI to display
+            # Report the error for the UI to display
             error_message = f"Cannot read from log file: {str(e)}"
-            self.sig_error.emit(error_message, "Log File Error")
+            self.on_error(error_message, "Log File Error")
 
             if self.CONSOLE_VERBOSITY >= 1:
                 print(f"ERROR     {error_message}")
             return
-        if not line: return
-        event, data = self.extract_from_line(line)
-        self.line_count += 1
-        if event != "":
-            if self.CONSOLE_VERBOSITY == 4: print(event, data)
-            self.interpret_event(event, data)
-        else:
-            event, data = self.extract_datetime_from_line(line)
-            if event != "":
-                self.interpret_event(event, data)
+        # Back off the polling interval while nothing is being written, and go straight back to fast polling when it is
+        if not chunk:
+            self.live_empty_wakeups += 1
+            self.checkpoint_live_log() # Only while the log is idle, so saving never delays new lines
+            if self.poll_interval < self.LIVE_POLL_MAX_INTERVAL:
+                self.set_poll_interval(min(self.poll_interval * 2, self.LIVE_POLL_MAX_INTERVAL))
+            return
+        if self.poll_interval != self.LIVE_POLL_MIN_INTERVAL:
+            self.set_poll_interval(self.LIVE_POLL_MIN_INTERVAL)
+
+        if not lines: return
+        self.live_batch_lines = len(lines)
+        self.live_batch_count += 1
+        if self.live_batch_lines > self.live_max_batch_lines: self.live_max_batch_lines = self.live_batch_lines
+
+        with self.ingest_lock:
+            for line in lines:
+                event, data = self.extract_from_line(line)
+                self.line_count += 1
+                if event != "":
+                    if self.CONSOLE_VERBOSITY == 4: print(event, data)
+                    self.process_event(event, data)
+                    self.events_since_update = True
+                else:
+                    event, data = self.extract_datetime_from_line(line)
+                    if event != "":
+                        self.process_event(event, data)
+                        self.events_since_update = True # The session start time and timeout still depend on these
+
+        # Resume UI refreshes if they were suspended while idle
+        if (self.events_since_update or self.final_update) and self.monitoring_live and not self.interval_updates_active:
+            self.start_interval_updates()
+
+        if self.CONSOLE_VERBOSITY >= 4: print("Live batch: ", self.live_batch_lines, " lines, ", self.live_bytes_behind, " bytes behind EOF")
+
+    def checkpoint_live_log(self, force=False):
+        '''Saves the parse state up to the last complete line read to the ParseCache, at most every LIVE_CHECKPOINT_INTERVAL seconds unless
+        forced. A crash or restart then carries on from the checkpoint rather than parsing the whole log again'''
+        if not self.live_checkpoints or self.log_file is None or self.log_file.closed:
+            return
+        offset = self.log_file.tell() - len(self.live_partial_line)
+        if offset == self.parsed_offset or (not force and time.time() - self.last_checkpoint_time < self.LIVE_CHECKPOINT_INTERVAL):
+            return
+        self.parsed_offset = offset
+        self.last_checkpoint_time = time.time()
+        with self.ingest_lock:
+            self.save_to_parse_cache()
+        if self.CONSOLE_VERBOSITY >= 2: print('          Checkpoint saved at byte', offset)
+
+    def get_live_lag_metrics(self):
+        '''Returns a dict describing how far live monitoring is behind the log file: bytes still unread after the last batch, lines in the last batch,
+        the largest batch so far and the number of batches processed.
+        Also includes the number of wakeups (and how many found nothing to read), the current polling interval and the process CPU time used since monitoring started'''
+        return {
+            "bytes_behind": self.live_bytes_behind,
+            "batch_lines": self.live_batch_lines,
+            "max_batch_lines": self.live_max_batch_lines,
+            "batches": self.live_batch_count,
+            "wakeups": self.live_wakeups,
+            "empty_wakeups": self.live_empty_wakeups,
+            "poll_interval_ms": self.poll_interval,
+            "cpu_seconds": round(time.process_time() - self.live_cpu_start, 3),
+        }
+
+    def publish_snapshots(self):
+        '''Publishes new immutable snapshots of every session touched since the last call, sessions that haven't changed keep their
+        previous snapshot. Returns the finalized ChangeSet, whose session_data is the new snapshot list.
+        This must be called while under the combat_mutex lock, the UI can then read the snapshots without it'''
+        changes = self.changes
+        self.changes = ChangeSet()
+        self.snapshot_version += 1
+
+        snapshots = self.snapshots[:len(self.combat_session_data)] # A new list, the UI may still be reading the old one
+        for index, session in enumerate(self.combat_session_data):
+            if index >= len(snapshots):
+                snapshots.append(SessionSnapshot(session, self.snapshot_version))
+            elif index in changes.paths or snapshots[index].uid != session.uid:
+                paths = None if index in changes.untracked else changes.paths.get(index)
+                snapshots[index] = SessionSnapshot(session, self.snapshot_version, paths, snapshots[index])
+        self.snapshots = snapshots
+        return changes.finalize(snapshots)
+
+    def get_mutex_wait_metrics(self):
+        '''Returns how long log ingestion and snapshot publishing have waited on the combat_mutex, the UI no longer takes it at all'''
+        return {
+            "ingest": self.ingest_lock.get_metrics(),
+            "publish": self.publish_lock.get_metrics(),
+        }
 
     def live_log_interval_update(self):
-        '''Calls a recalculation of the current combat session data and emits a signal to update the UI. This function is called by the interval_timer'''
+        '''Calls a recalculation of the current combat session data and sends the changes to on_delta_update. This function is called every
+        LIVE_UPDATE_INTERVAL while interval updates are active'''
         # if not CLI_MODE: return
+        if not self.events_since_update and not self.final_update:
+            self.stop_interval_updates() # Nothing has changed, suspend refreshes until monitoring_loop sees new events
+            return
+        self.events_since_update = False
+
         if not (self.monitoring_live and self.combat_session_live):
             if not self.final_update:
                 print('WARNING     No active combat session')
                 return
             else:
                 if self.CONSOLE_VERBOSITY >= 2: print('          Sending last session update...')
-                self.interval_timer.stop()
+                self.stop_interval_updates()
                 self.final_update = False
 
-        with QMutexLocker(self.combat_mutex):
+        with self.publish_lock:
             if self.combat_session_data == []:
                 session = []
             else:
@@ -866,28 +1395,117 @@ class Parser(QObject):
                 except Exception as e:
                     print("ERROR     getting combat session data: ", e)
             
+                self.mark_changed()
 
-            self.sig_periodic_update.emit(self.combat_session_data)
+            # Only send what has changed since the last update, the UI already has everything else
+            self.final_update = False # This update includes any session that ended since the last one
+            changes = self.publish_snapshots()
+        self.on_delta_update(changes)
 
 
-    def check_parse_settings(self):
-        '''Checks for QSettings and sets the parser settings appropriately. If no settings are found, the default settings are used.'''
+    def get_config(self):
+        '''Returns the ParserConfig to parse under, a subclass can override this to read the settings from somewhere else'''
+        return self.config
 
-        if self.settings.value("AssociateProcsToPowers", Globals.DEFAULT_ASSOCIATE_PROCS_TO_POWERS, bool):
-            self.associating_procs = True
-        else:
-            self.associating_procs = False
-        
-        self.CONSOLE_VERBOSITY = self.settings.value("ConsoleVerbosity", Globals.DEFAULT_CONSOLE_VERBOSITY, int)
-        self.COMBAT_SESSION_TIMEOUT = self.settings.value("CombatSessionTimeout", Globals.DEFAULT_COMBAT_SESSION_TIMEOUT, int)
-        self.COMBAT_SESSION_NAME = self.settings.value("CombatSessionName", Globals.DEFAULT_COMBAT_SESSION_NAME, str)
-        self.COMBAT_SESSION_NAMING_MODE = self.settings.value("CombatSessionNamingMode", Globals.DEFAULT_COMBAT_SESSION_NAMING_MODE, str)
-
-    def on_sig_stop_monitoring(self):
-        '''Stops monitoring the log file'''
-        self.monitoring_timer.stop()
+    def check_parse_settings(self):
+        '''Sets the parser settings from get_config(), this is called again before each parse in case the settings have been adjusted'''
+        config = self.get_config()
+        self.associating_procs = bool(config.ASSOCIATE_PROCS_TO_POWERS)
+        self.CONSOLE_VERBOSITY = config.CONSOLE_VERBOSITY
+        self.COMBAT_SESSION_TIMEOUT = config.COMBAT_SESSION_TIMEOUT
+        self.COMBAT_SESSION_NAME = config.COMBAT_SESSION_NAME
+        self.COMBAT_SESSION_NAMING_MODE = config.COMBAT_SESSION_NAMING_MODE
+        self.PARSE_WORKERS = config.PARSE_WORKERS
+        self.PARSE_CACHE_SIZE = config.PARSE_CACHE_SIZE
+        self.PARSE_CACHE_DIR = config.PARSE_CACHE_DIR
+
+    def stop_monitoring(self):
+        '''Stops monitoring the log file (or processing an existing one), ends the live session and calls on_finished'''
+        self.stop_watching_log_file()
         print('          Monitoring Ended.')
-        if self.combat_session_live: self.end_current_session()
-        self.monitoring_live = False
-        self.processing_live = False
-        self.sig_finished.emit(self.combat_session_data)
\ No newline at end of file
+        if self.monitoring_live: self.checkpoint_live_log(force=True) # Before the current session is ended, the log may carry on with it
+        with self.publish_lock:
+            if self.combat_session_live: self.end_current_session()
+            self.monitoring_live = False
+            self.processing_live = False
+            snapshots = self.publish_snapshots().session_data
+        if self.CONSOLE_VERBOSITY >= 2: print('          Combat mutex wait: ', self.get_mutex_wait_metrics())
+        self.on_finished(snapshots)
+
+
+class ChunkParser(Parser):
+    '''Parses one chunk of an existing log in a worker process, for Parser.process_existing_log_parallel.
+
+    It starts with the player name and user session name the parser would have had at the start of the chunk, and records every session
+    it names or removes so the main process can replay the naming in order.'''
+
+    def __init__(self, settings, player_name, user_session_name):
+        self.set_callbacks()
+        for key, value in settings.items():
+            setattr(self, key, value)
+        self.PARSE_WORKERS = 1
+        self.classifier = EventClassifier(PATTERNS)
+        self.bytes_classifier = BytesEventClassifier(PATTERNS)
+        self.ingest_lock = MutexWaitTimer(self.combat_mutex)
+        self.publish_lock = MutexWaitTimer(self.combat_mutex)
+        self.clean_variables()
+        self.naming = [] # ("name", base name, is new session, session), ("remove",) or ("reset",) in the order they happened
+        if player_name != "":
+            self.PLAYER_NAME = player_name
+            self.PATTERNS = self.update_regex_player_name(player_name)
+        self.user_session_name = user_session_name
+
+    def number_session_name(self, base_name, is_new_session=False):
+        self.naming.append(("name", base_name, is_new_session, self.combat_session_data[-1]))
+        return super().number_session_name(base_name, is_new_session)
+
+    def remove_last_session(self):
+        self.naming.append(("remove",))
+        super().remove_last_session()
+
+    def set_user_session_name(self, name):
+        self.naming.append(("reset",))
+        super().set_user_session_name(name)
+
+    def parse_chunk(self, file_path, start, end, is_last):
+        '''Parses the lines between two byte offsets and returns the sessions and totals as a dict for Parser.merge_chunk_result.
+        Unless this is the last chunk, a session that is still live at the end is ended, the next chunk starts after a gap longer than the timeout.'''
+        self.LOG_FILE_PATH = file_path
+        with open(file_path, 'rb') as file:
+            lines, extract = self.get_line_reader(file, start, end)
+            for line in lines:
+                event, data = extract(line)
+                self.line_count += 1
+                if event != "":
+                    if self.CONSOLE_VERBOSITY == 4: print(event, data)
+                    self.process_event(event, data)
+
+        last_end_time = None
+        if self.combat_session_live and not is_last:
+            last_end_time = self.combat_session_data[-1].end_time
+            self.time_out_session()
+        return {
+            "naming": self.naming,
+            "line_count": self.line_count,
+            "exp": self.EXP_VALUE,
+            "inf": self.INF_VALUE,
+            "global_combat_duration": self.global_combat_duration,
+            "no_hitroll_ability_list": self.no_hitroll_ability_list,
+            "event_store": self.event_store,
+            "start_time": self.GOBAL_START_TIME,
+            "current_time": self.GLOBAL_CURRENT_TIME,
+            "last_end_time": last_end_time,
+            "combat_session_live": self.combat_session_live,
+            "in_combat": self.in_combat,
+            "player_name": self.PLAYER_NAME,
+            "user_session_name": self.user_session_name,
+        }
+
+
+def parse_log_chunk(file_path, start, end, settings, player_name, user_session_name, is_last):
+    '''Worker process entry point, see ChunkParser.parse_chunk'''
+    parser = ChunkParser(settings, player_name, user_session_name)
+    if parser.CONSOLE_VERBOSITY >= 2:
+        return parser.parse_chunk(file_path, start, end, is_last)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull): # Session names are only numbered within the chunk here
+        return parser.parse_chunk(file_path, start, end, is_last)
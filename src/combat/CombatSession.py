@@ -1,12 +1,17 @@
-from  PyQt5.QtCore import QObject
 from combat.Character import Character
-class CombatSession(QObject):
+import itertools
+import math
+class CombatSession:
     '''The CombatSession class stores data about a combat session, which is a period where damage events are registered.
     CombatSessions will automatically end based on the COMBAT_SESSION_TIMEOUT value to avoid including long downtime periods in the data.
     
     The assumption is that this class will be under a mutex lock when it is being accessed.''' 
+    __slots__ = ("uid", "start_time", "end_time", "duration", "chars", "targets", "exp_value", "inf_value", "name", "first_enemy_damaged",
+                 "total_damage")
+    uid_counter = itertools.count(1) # Gives every session a unique id, so snapshots of the same session can be matched up
+
     def __init__(self, timestamp=0, name=""):
-        super().__init__()
+        self.uid = next(CombatSession.uid_counter)
         self.start_time = timestamp
         self.end_time = timestamp
         self.duration = 0 # Seconds
@@ -16,6 +21,7 @@ class CombatSession(QObject):
         self.inf_value = 0
         self.name = name
         self.first_enemy_damaged = None  # Track the first enemy damaged in the session
+        self.total_damage = 0 # Running total of the chars' damage, kept up to date by Character.update_totals
         
 
     def set_start_time(self, start_time):
@@ -48,11 +54,8 @@ class CombatSession(QObject):
         return len(self.chars)
     
     def get_total_damage(self):
-        '''Calculates the total damage for the session'''
-        sum = 0
-        for char in self.chars:
-            sum += self.chars[char].get_total_damage()
-        return sum  # Return raw value, rounding should only happen at display layer
+        '''Returns the total damage for the session'''
+        return self.total_damage  # Return raw value, rounding should only happen at display layer
     
     def get_average_damage(self):
         '''Calculates the average damage for the session'''
@@ -61,11 +64,23 @@ class CombatSession(QObject):
         return damage
     
     def get_dps(self):
-        '''Calculates the DPS for the session based off of the damage components'''
-        dps = 0
-        for char in self.chars:
-            dps += self.chars[char].get_dps(self.duration)
-        return round(dps,2)
+        '''Calculates the DPS for the session from the running total damage'''
+        if self.duration == 0: return round(self.total_damage, 2)
+        return round(self.total_damage / self.duration, 2)
+
+    def update_totals(self, damage):
+        '''Adds a change in one of the chars' damage to the running total, called by Character.update_totals'''
+        self.total_damage += damage
+
+    def verify_totals(self):
+        '''Consistency check, recalculates every running total in the session and raises an AssertionError if any have drifted'''
+        for group in [self.chars, self.targets]:
+            for char in group.values():
+                char.verify_totals()
+        for char in self.chars.values():
+            assert char.session is self, f"{char.name} was not added to the session with check_in_char or add_character"
+        total = sum(char.total_damage for char in self.chars.values())
+        assert math.isclose(self.total_damage, total, abs_tol=1e-6), f"{self.name}: total damage {self.total_damage} != {total}"
     
     def add_exp(self, exp_value):
         '''Adds the exp value to the total exp'''
@@ -81,7 +96,13 @@ class CombatSession(QObject):
         return self.inf_value
     
     def add_character(self, character):
+        if character.get_name() in self.chars:
+            old = self.chars[character.get_name()]
+            old.session = None
+            self.update_totals(-old.total_damage)
         self.chars[character.get_name()] = character
+        character.session = self
+        self.update_totals(character.total_damage)
     
     def check_in_char(self, name, type) -> bool:
         '''Checks and adds the character to the session if they are not already in it, Returns True if the character was already in the session'''
@@ -95,10 +116,36 @@ class CombatSession(QObject):
             return True
         else:
             if name not in self.chars:
-                self.chars[name] = Character(name, type)
+                self.add_character(Character(name, type))
                 return False
             return True
 
+    def merge(self, other):
+        '''Adds the characters, targets and rewards of another session to this one, as if it had all happened in this session. Returns self.
+
+        The merged session runs from the earliest start time to the latest end time, so merging two halves of a session gives back the
+        whole session, while merging sessions that are far apart includes the time between them in the duration.
+        The first enemy damaged is the one from whichever session started first. Other is left unchanged.'''
+        if other.first_enemy_damaged is not None and (self.first_enemy_damaged is None or other.start_time < self.start_time):
+            self.first_enemy_damaged = other.first_enemy_damaged
+        self.start_time = min(self.start_time, other.start_time)
+        self.end_time = max(self.end_time, other.end_time)
+        self.update_duration()
+        self.add_exp(other.exp_value)
+        self.add_inf(other.inf_value)
+
+        for name, character in other.chars.items():
+            if name in self.chars:
+                self.chars[name].merge(character)
+            else:
+                self.add_character(Character(character.name, character.type).merge(character))
+        for name, character in other.targets.items():
+            if name in self.targets:
+                self.targets[name].merge(character)
+            else:
+                self.targets[name] = Character(character.name, character.type).merge(character)
+        return self
+
     def set_first_enemy_damaged(self, enemy_name):
         '''Sets the first enemy damaged if not already set'''
         if self.first_enemy_damaged is None:
@@ -129,3 +176,12 @@ class CombatSession(QObject):
                 highest_enemy = target_name
 
         return highest_enemy
+
+
+def merge_sessions(sessions, name=""):
+    '''Returns a new CombatSession with every given session merged into it, the sessions themselves are left unchanged'''
+    sessions = list(sessions)
+    merged = CombatSession(sessions[0].start_time if sessions else 0, name)
+    for session in sessions:
+        merged.merge(session)
+    return merged
@@ -1,8 +1,9 @@
-from PyQt5.QtCore import QObject
-class DamageComponent(QObject):
-    '''Stores data about a damage component'''
+class DamageComponent:
+    '''Stores data about a damage component.
+    There is one of these for every damage type of every ability on both the caster and the target, so it is a plain __slots__ class'''
+    __slots__ = ("count", "type", "name", "total_damage", "highest_damage", "lowest_damage", "last_damage", "is_proc", "parent_hits")
+
     def __init__(self, type="", value : float = 0, is_proc=False):
-        super().__init__()
         self.count = 0
         self.type = type
         self.name = type
@@ -55,6 +56,21 @@ class DamageComponent(QObject):
             self.lowest_damage = value
             #print ('         Lowest Damage Updated: ', self.highest_damage)
 
+    def merge(self, other):
+        '''Adds the damage of another component of the same type to this one, as if it had all been added here. Returns self.
+        The result doesn't depend on the order components are merged in, except for last_damage which is taken from other'''
+        self.count += other.count
+        self.total_damage += other.total_damage
+        if other.highest_damage > self.highest_damage:
+            self.highest_damage = other.highest_damage
+        if other.lowest_damage != 0 and (self.lowest_damage == 0 or other.lowest_damage < self.lowest_damage):
+            self.lowest_damage = other.lowest_damage
+        if other.count:
+            self.last_damage = other.last_damage
+        self.is_proc = self.is_proc or other.is_proc
+        self.parent_hits += other.parent_hits
+        return self
+
     def increment_parent_hits(self):
         '''Increments the parent ability hit count (used for proc rate calculation)'''
         self.parent_hits += 1
@@ -0,0 +1,111 @@
+import re
+from data.LogPatterns import PATTERNS, PATTERN_GATES
+
+TIMESTAMP_LENGTH = 20 # "YYYY-MM-DD HH:MM:SS " - every line we care about starts with this
+
+
+class EventClassifier:
+    '''Single-pass replacement for looping through every regex in PATTERNS.
+
+    The timestamp is checked once, then the message is dispatched on its leading token ("You activated", "HIT", "You gain", "[Local]", etc.)
+    to the short list of patterns that could possibly match it.  Each candidate is then screened against its PATTERN_GATES substrings before
+    the regex is run, so chat noise is dropped without running any regex at all.
+
+    Candidates are always tried in PATTERNS order, so the result is identical to the sequential loop.'''
+
+    def __init__(self, patterns=None):
+        self.patterns = PATTERNS if patterns is None else patterns
+
+        # Patterns that don't have a fixed leading token (pets, player name prefixed damage) are candidates for every line
+        unanchored = [key for key in self.patterns if PATTERN_GATES[key][0] is None]
+        tokens = []
+        for key in self.patterns:
+            for token in PATTERN_GATES[key][0] or ():
+                if token not in tokens:
+                    tokens.append(token)
+
+        self.default_candidates = self.build_candidates(unanchored)
+        self.dispatch = {} # First 4 characters of the message -> list of (leading token, candidates)
+        for token in tokens:
+            keys = [key for key in self.patterns if PATTERN_GATES[key][0] is None or token in PATTERN_GATES[key][0]]
+            self.dispatch.setdefault(self.convert(token)[:4], []).append((self.convert(token), self.build_candidates(keys)))
+
+    def convert(self, text):
+        '''Returns a leading token or required substring in the form the lines are classified in'''
+        return text
+
+    def convert_regex(self, regex):
+        '''Returns a pattern compiled for the form the lines are classified in'''
+        return regex
+
+    def build_candidates(self, keys):
+        '''Returns a tuple of (key, required substrings, regex) for the given keys, in PATTERNS order'''
+        return tuple((key, tuple(self.convert(substring) for substring in PATTERN_GATES[key][1]), self.convert_regex(self.patterns[key]))
+                     for key in self.patterns if key in keys)
+
+    def classify(self, log_line):
+        '''Returns a string for the log entry type and a dict of the extracted data, or ('', []) if the line is not an event'''
+        # Validate the fixed-width timestamp separators, the regex will check the digits if a candidate is found
+        if (len(log_line) <= TIMESTAMP_LENGTH or log_line[19] != " " or log_line[10] != " "
+                or log_line[4] != "-" or log_line[7] != "-" or log_line[13] != ":" or log_line[16] != ":"):
+            return '', []
+
+        message = log_line[TIMESTAMP_LENGTH:]
+        candidates = self.default_candidates
+        for token, token_candidates in self.dispatch.get(message[:4], ()):
+            if message.startswith(token):
+                candidates = token_candidates
+                break
+
+        for key, required, regex in candidates:
+            for substring in required:
+                if substring not in message:
+                    break
+            else:
+                match = regex.match(log_line)
+                if match:
+                    return (key, match.groupdict())
+        return '', []
+
+
+class BytesEventClassifier(EventClassifier):
+    '''EventClassifier for raw log lines, bytes without their line ending, as read by LogChunks.read_raw_lines.
+
+    Each line is viewed as Latin-1, which maps every byte to one character, so it can never fail and costs no more than decoding ASCII.
+    The patterns and gates are converted to match the UTF-8 bytes in that view, with \\d, \\s and the like only matching ASCII the same as
+    in bytes regexes. Only the fields captured from an event are decoded as UTF-8, and only when the line isn't plain ASCII, with invalid
+    bytes replaced rather than raised. (Classifying with bytes regexes directly is slower, bytes substring searches cost several times more
+    than str ones.)'''
+
+    def convert(self, text):
+        return text.encode("utf-8").decode("latin-1")
+
+    def convert_regex(self, regex):
+        return re.compile(self.convert(regex.pattern), (regex.flags & ~re.UNICODE) | re.ASCII)
+
+    def classify(self, log_line):
+        '''Returns a string for the log entry type and a dict of the decoded data, or ('', []) if the line is not an event'''
+        line = log_line.decode("latin-1") # Same as EventClassifier.classify from here, written out again to save a call on every line
+        if (len(line) <= TIMESTAMP_LENGTH or line[19] != " " or line[10] != " "
+                or line[4] != "-" or line[7] != "-" or line[13] != ":" or line[16] != ":"):
+            return '', []
+
+        message = line[TIMESTAMP_LENGTH:]
+        candidates = self.default_candidates
+        for token, token_candidates in self.dispatch.get(message[:4], ()):
+            if message.startswith(token):
+                candidates = token_candidates
+                break
+
+        for key, required, regex in candidates:
+            for substring in required:
+                if substring not in message:
+                    break
+            else:
+                match = regex.match(line)
+                if match:
+                    data = match.groupdict()
+                    if not log_line.isascii():
+                        data = {name: value if value is None else value.encode("latin-1").decode("utf-8", "replace") for name, value in data.items()}
+                    return (key, data)
+        return '', []
@@ -0,0 +1,193 @@
+try:
+    import numpy as np
+except ImportError: # NumPy is optional, the parser works without it but can't record events
+    np = None
+
+DAMAGE = 0
+HIT_ROLL = 1
+
+MISS = 0
+HIT = 1
+NO_OUTCOME = -1 # Damage rows don't have a hit roll outcome
+
+FLUSH_ROWS = 4096 # Rows are buffered in a list and copied into the arrays in blocks, which is much cheaper than setting them one at a time
+
+# Column name -> dtype, about 43 bytes per event
+COLUMNS = (
+    ("timestamp", "int64"),
+    ("kind", "int8"), # DAMAGE or HIT_ROLL
+    ("session", "int32"), # Index of the session in Parser.combat_session_data
+    ("caster", "int32"), # Id in the names table
+    ("target", "int32"), # Id in the names table
+    ("ability", "int32"), # Id in the abilities table
+    ("damage_type", "int32"), # Id in the damage_types table, without the flair
+    ("flair", "int32"), # Id in the flairs table, "" when there is none
+    ("value", "float64"), # Damage, 0 for hit rolls
+    ("outcome", "int8"), # HIT, MISS or NO_OUTCOME
+    ("is_proc", "bool"),
+)
+
+
+def is_available():
+    '''Returns True if NumPy is installed, which the event store needs'''
+    return np is not None
+
+
+class StringTable:
+    '''Interns strings as consecutive integer ids, so the columns only have to store the ids'''
+    __slots__ = ("ids", "strings")
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def intern(self, string):
+        id = self.ids.get(string)
+        if id is None:
+            id = len(self.strings)
+            self.ids[string] = id
+            self.strings.append(string)
+        return id
+
+    def __getitem__(self, id):
+        return self.strings[id]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class EventStore:
+    '''Columnar record of every damage and hit roll event the parser has handled, kept in growable NumPy arrays with the strings interned.
+
+    The combat model only keeps running totals, so any statistic it doesn't already have would need the log to be read again. With the
+    events recorded, new aggregations (per ability, per target, DPS over time, etc.) are a vectorized bincount/reduceat over the columns.
+    Each damage event is stored once, with both the caster and the target, rather than once for each like the combat model.
+
+    Rows are stored in session order. The assumption is that this class will be under a mutex lock when it is being accessed.'''
+
+    def __init__(self, capacity=65536):
+        if np is None:
+            raise ImportError("NumPy is required for the event store")
+        self.names = StringTable() # Casters and targets
+        self.abilities = StringTable()
+        self.damage_types = StringTable()
+        self.flairs = StringTable()
+        self.flairs.intern("")
+        self.size = 0
+        self.pending = [] # Row tuples not copied into the arrays yet
+        self.arrays = {name: np.empty(capacity, dtype=dtype) for name, dtype in COLUMNS}
+
+    def append_damage(self, timestamp, session, caster, target, ability, damage_type, flair, value, is_proc):
+        self.pending.append((timestamp, DAMAGE, session, self.names.intern(caster), self.names.intern(target), self.abilities.intern(ability),
+                             self.damage_types.intern(damage_type), self.flairs.intern(flair), value, NO_OUTCOME, is_proc))
+        if len(self.pending) >= FLUSH_ROWS: self.flush()
+
+    def append_hit_roll(self, timestamp, session, caster, target, ability, hit):
+        self.pending.append((timestamp, HIT_ROLL, session, self.names.intern(caster), self.names.intern(target), self.abilities.intern(ability),
+                             -1, 0, 0.0, HIT if hit else MISS, False))
+        if len(self.pending) >= FLUSH_ROWS: self.flush()
+
+    def reserve(self, rows):
+        '''Grows the arrays (doubling their capacity) until there is room for the given number of extra rows'''
+        capacity = len(self.arrays["timestamp"])
+        if self.size + rows <= capacity: return
+        while capacity < self.size + rows:
+            capacity *= 2
+        for name, array in self.arrays.items():
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            self.arrays[name] = grown
+
+    def flush(self):
+        '''Copies the buffered rows into the arrays'''
+        if not self.pending: return
+        rows = len(self.pending)
+        self.reserve(rows)
+        for (name, dtype), values in zip(COLUMNS, zip(*self.pending)):
+            self.arrays[name][self.size:self.size + rows] = values
+        self.size += rows
+        self.pending = []
+
+    def __len__(self):
+        return self.size + len(self.pending)
+
+    def column(self, name):
+        '''Returns a read-only view of one column, every recorded row included'''
+        self.flush()
+        view = self.arrays[name][:self.size]
+        view.flags.writeable = False
+        return view
+
+    def nbytes(self):
+        '''Returns the memory used by the recorded rows (not the spare capacity)'''
+        return sum(np.dtype(dtype).itemsize for name, dtype in COLUMNS) * len(self)
+
+    def discard_session(self, session):
+        '''Removes the rows of a session that was removed, they are always the last rows'''
+        self.flush()
+        self.size = int(np.searchsorted(self.arrays["session"][:self.size], session))
+
+    def extend(self, other, session_offset=0):
+        '''Appends every row of another store (e.g. one recorded by a worker process), adding session_offset to its session indexes'''
+        other.flush()
+        self.flush()
+        rows = other.size
+        if rows == 0: return
+        self.reserve(rows)
+        tables = {"caster": (self.names, other.names), "target": (self.names, other.names), "ability": (self.abilities, other.abilities),
+                  "flair": (self.flairs, other.flairs)}
+        for name, dtype in COLUMNS:
+            values = other.arrays[name][:rows]
+            if name in tables:
+                mine, theirs = tables[name]
+                values = np.array([mine.intern(string) for string in theirs.strings], dtype=dtype)[values]
+            elif name == "damage_type": # Hit rolls don't have a damage type
+                mapping = np.array([self.damage_types.intern(string) for string in other.damage_types.strings] + [-1], dtype=dtype)
+                values = mapping[values]
+            elif name == "session":
+                values = values + session_offset
+            self.arrays[name][self.size:self.size + rows] = values
+        self.size += rows
+
+    def select(self, kind, session=None, caster=None):
+        '''Returns a boolean mask of the rows of the given kind, optionally only those of one session index and/or caster name'''
+        mask = self.column("kind") == kind
+        if session is not None:
+            mask &= self.column("session") == session
+        if caster is not None:
+            mask &= self.column("caster") == self.names.ids.get(caster, -1)
+        return mask
+
+    def damage_totals(self, by, session=None, caster=None):
+        '''Returns {name: total damage} grouped by the "ability", "target", "caster" or "damage_type" column'''
+        table = {"ability": self.abilities, "target": self.names, "caster": self.names, "damage_type": self.damage_types}[by]
+        mask = self.select(DAMAGE, session, caster)
+        ids = self.column(by)[mask]
+        totals = np.bincount(ids, weights=self.column("value")[mask], minlength=len(table))
+        counts = np.bincount(ids, minlength=len(table))
+        return {table[id]: float(totals[id]) for id in np.flatnonzero(counts)}
+
+    def hit_rolls(self, session=None, caster=None):
+        '''Returns {ability name: (hits, tries)} from the hit roll rows'''
+        mask = self.select(HIT_ROLL, session, caster)
+        ids = self.column("ability")[mask]
+        hits = np.bincount(ids, weights=self.column("outcome")[mask] == HIT, minlength=len(self.abilities))
+        tries = np.bincount(ids, minlength=len(self.abilities))
+        return {self.abilities[id]: (int(hits[id]), int(tries[id])) for id in np.flatnonzero(tries)}
+
+    def session_totals(self):
+        '''Returns {session index: total damage}, summing each session's run of damage rows with reduceat'''
+        mask = self.select(DAMAGE)
+        sessions = self.column("session")[mask]
+        if len(sessions) == 0: return {}
+        starts = np.flatnonzero(np.concatenate(([True], sessions[1:] != sessions[:-1])))
+        totals = np.add.reduceat(self.column("value")[mask], starts)
+        return dict(zip(sessions[starts].tolist(), totals.tolist()))
+
+    def dps_over_time(self, session=None, interval=1, caster=None):
+        '''Returns an array of the DPS in each interval (seconds) from the first damage event of the selection'''
+        mask = self.select(DAMAGE, session, caster)
+        times = self.column("timestamp")[mask]
+        if len(times) == 0: return np.zeros(0)
+        buckets = (times - times.min()) // interval
+        return np.bincount(buckets, weights=self.column("value")[mask]) / interval
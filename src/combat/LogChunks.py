@@ -0,0 +1,164 @@
+import io
+import mmap
+import os
+from combat import Timestamp
+
+SCAN_WINDOW = 64 * 1024 # Bytes read at a time while looking for a quiet gap
+READ_BLOCK = 1024 * 1024 # Bytes read at a time by read_lines and read_raw_lines
+RELEASE_PAGES = hasattr(mmap, "MADV_DONTNEED") # Not available on Windows, which trims the working set of a mapping by itself
+REVERSE_BLOCK = 64 * 1024 # Bytes searched at a time by find_last_lines_containing, working up from the bottom of the file
+
+
+def line_timestamp(line):
+    '''Returns the timestamp of a raw log line (bytes) in seconds since the epoch, or None if the line doesn't start with one'''
+    if (len(line) < 20 or line[19] != 32 or line[10] != 32 or line[4] != 45 or line[7] != 45 or line[13] != 58 or line[16] != 58):
+        return None
+    try:
+        return Timestamp.convert_timestamp(line[0:10].decode("ascii"), line[11:19].decode("ascii"))
+    except ValueError:
+        return None
+
+
+def read_lines(file, start, end):
+    '''Yields the decoded lines between two byte offsets of a file opened in binary mode, split the same way as reading it in text mode.
+    Each block is cut after its last \n, so a \r\n is never split in two and neither is a multi-byte character.'''
+    file.seek(start)
+    remaining = end - start
+    partial = b""
+    while remaining > 0:
+        block = file.read(min(READ_BLOCK, remaining))
+        if not block: break
+        remaining -= len(block)
+        block = partial + block
+        cut = block.rfind(b"\n") + 1 if remaining > 0 else len(block)
+        partial = block[cut:]
+        if cut:
+            yield from io.TextIOWrapper(io.BytesIO(block[:cut]), encoding="utf-8")
+    if partial:
+        yield from io.TextIOWrapper(io.BytesIO(partial), encoding="utf-8")
+
+
+def read_raw_lines(file, start, end):
+    '''Yields the lines between two byte offsets of a file opened in binary mode as bytes, without their line endings, through an mmap
+    of the file. Lines are split the same way as reading it in text mode (at \n, \r\n and a lone \r), but nothing is decoded.
+    Pages that have been read are released as it goes, so the resident memory doesn't grow with the size of the log.'''
+    if end <= start:
+        return
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        end = min(end, len(data))
+        position = start
+        released = start - start % mmap.PAGESIZE
+        while position < end:
+            block_end = min(position + READ_BLOCK, end)
+            if block_end < end:
+                cut = data.rfind(b"\n", position, block_end) + 1 # Never splits a \r\n in two
+                if cut: block_end = cut
+                else: block_end = data.find(b"\n", block_end, end) + 1 or end # A line longer than the block
+            yield from data[position:block_end].splitlines()
+            position = block_end
+            if RELEASE_PAGES and position - released >= READ_BLOCK:
+                page = position - position % mmap.PAGESIZE
+                data.madvise(mmap.MADV_DONTNEED, released, page - released)
+                released = page
+
+
+def find_quiet_gap(file, offset, timeout):
+    '''Returns the byte offset of the first line at or after offset whose timestamp is more than timeout seconds after the previous
+    timestamped line, or None if the end of the file is reached first.
+
+    No combat session can last across a gap like that, so the log can be split there and each side parsed on its own.'''
+    file.seek(offset)
+    partial = b""
+    position = offset # Byte offset of the start of partial
+    skip_first = offset > 0 # The first line is probably only the tail of a line, so it can't be trusted
+    previous = None
+    while True:
+        block = file.read(SCAN_WINDOW)
+        lines = (partial + block).splitlines(keepends=True) # Same line endings as reading the file in text mode
+        if block and lines:
+            partial = lines.pop() # May not be complete yet
+        else:
+            partial = b""
+        for line in lines:
+            if skip_first:
+                skip_first = False
+            else:
+                timestamp = line_timestamp(line)
+                if timestamp is not None:
+                    if previous is not None and timestamp - previous > timeout:
+                        return position
+                    previous = timestamp
+            position += len(line)
+        if not block:
+            return None
+
+
+def find_chunk_boundaries(file_path, timeout, chunks, size=None, time_index=None):
+    '''Splits the first size bytes of a log file (all of it by default) into at most the given number of (start, end) byte ranges of
+    roughly equal size. Every range after the first starts at a line that comes more than timeout seconds after the line before it.
+    Given the log's TimeIndex, the stretches of the log that can't have a gap that long aren't read.'''
+    if size is None:
+        size = os.path.getsize(file_path)
+    boundaries = [0]
+    with open(file_path, "rb") as file:
+        for index in range(1, chunks):
+            offset = max(size * index // chunks, boundaries[-1])
+            if time_index is not None: offset = time_index.find_gap_search_start(offset, timeout)
+            boundary = find_quiet_gap(file, offset, timeout)
+            if boundary is None or boundary >= size: break
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def find_last_lines_containing(file_path, substrings):
+    '''Yields (byte offset, line) for every line of the file that contains any of the given substrings (bytes), starting from the bottom
+    of the file and working up a block at a time, so a caller looking for the latest such line can stop at the first one that suits it
+    without reading the rest of the file. The lines are decoded (invalid bytes replaced) and end with a newline, the same as in
+    find_lines_containing.'''
+    if os.path.getsize(file_path) == 0:
+        return
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        end = len(data)
+        while end > 0:
+            # Extend the block back to the start of the line it begins in, so it only holds whole lines
+            start = data.rfind(b"\n", 0, max(0, end - REVERSE_BLOCK)) + 1
+            lines = {}
+            for substring in substrings:
+                position = data.find(substring, start, end)
+                while position != -1:
+                    line_start = data.rfind(b"\n", start, position) + 1 or start
+                    line_start = max(line_start, data.rfind(b"\r", line_start, position) + 1)
+                    line_end = data.find(b"\n", position, end)
+                    if line_end == -1: line_end = end
+                    carriage_return = data.find(b"\r", position, line_end)
+                    if carriage_return != -1: line_end = carriage_return
+                    lines[line_start] = line_end
+                    position = data.find(substring, line_end, end)
+            for line_start in sorted(lines, reverse=True):
+                yield line_start, data[line_start:lines[line_start]].decode("utf-8", errors="replace") + "\n"
+            end = start
+
+
+def find_lines_containing(file_path, substrings):
+    '''Returns a sorted list of (byte offset, line) for every line of the file that contains any of the given substrings (bytes).
+    The lines are decoded and end with a newline, the same as when the file is read in text mode.'''
+    if os.path.getsize(file_path) == 0:
+        return []
+    lines = {}
+    with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for substring in substrings:
+            position = data.find(substring)
+            while position != -1:
+                # Lines can also end with a lone \r in text mode, only look for one between the substring and the nearest \n
+                start = data.rfind(b"\n", 0, position) + 1
+                start = max(start, data.rfind(b"\r", start, position) + 1)
+                end = data.find(b"\n", position)
+                if end == -1: end = len(data)
+                carriage_return = data.find(b"\r", position, end)
+                if carriage_return != -1: end = carriage_return
+                if start not in lines:
+                    lines[start] = data[start:end].decode("utf-8", errors="replace") + "\n"
+                position = data.find(substring, end)
+    return sorted(lines.items())
@@ -0,0 +1,44 @@
+import time
+
+
+class MutexWaitTimer:
+    '''Context manager for a threading.Lock (like QMutexLocker for a QMutex) that also records how long the caller waited to acquire it.
+
+    Create one per caller (e.g. one for log ingestion, one for publishing updates) and use it as a context manager:
+        with self.ingest_lock:
+            ...
+    It is not re-entrant, same as the Lock it wraps.'''
+
+    def __init__(self, mutex):
+        self.mutex = mutex
+        self.reset()
+
+    def reset(self):
+        self.locks = 0
+        self.contended = 0 # Number of times the mutex was already held by someone else
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def __enter__(self):
+        self.locks += 1
+        if self.mutex.acquire(blocking=False): return self
+        start = time.perf_counter()
+        self.mutex.acquire()
+        wait = time.perf_counter() - start
+        self.contended += 1
+        self.wait_seconds += wait
+        if wait > self.max_wait_seconds: self.max_wait_seconds = wait
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.mutex.release()
+        return False
+
+    def get_metrics(self):
+        '''Returns a dict of the wait time recorded so far'''
+        return {
+            "locks": self.locks,
+            "contended": self.contended,
+            "wait_ms": round(self.wait_seconds * 1000, 3),
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+        }
@@ -0,0 +1,135 @@
+import contextlib
+import gc
+import hashlib
+import os
+import pickle
+import zlib
+
+CACHE_VERSION = 3 # Bump whenever the parse state or the combat model classes change, entries from other versions are ignored
+CHECK_BYTES = 4096 # Bytes hashed at the start of a log and just before the cached offset, to tell an appended log from a replaced one
+COMPRESSION_LEVEL = 1 # zlib level of the pickled states, the fastest level already makes them a quarter of the size
+ENTRY_EXTENSION = ".parse"
+INDEX_EXTENSION = ".index" # TimeIndex of a log, kept alongside its parse state
+SUMMARY_EXTENSION = ".summary" # Compact LogSummary of a whole log, for the batch analysis of a directory of logs
+EXTENSIONS = (ENTRY_EXTENSION, INDEX_EXTENSION, SUMMARY_EXTENSION)
+
+
+def hash_bytes(file, offset, length):
+    '''Returns the hash of length bytes of a file (opened in binary mode) starting at offset'''
+    file.seek(offset)
+    return hashlib.sha1(file.read(length)).hexdigest()
+
+
+@contextlib.contextmanager
+def gc_paused():
+    '''Turns off the cyclic garbage collector for the duration, it would otherwise run over and over while a state of a few hundred
+    thousand objects is pickled or unpickled, which takes longer than the pickling itself'''
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled: gc.enable()
+
+
+class ParseCache:
+    '''On-disk cache of parse states, one entry for each log file, so a log that has been parsed before only needs what has been appended
+    to it since parsing. Entries are keyed by the log's path, and are only used while the log's size, modification time and the hash of
+    its first few KB (and of the few KB before the cached offset) show it has only been appended to since. The same goes for the much
+    smaller TimeIndex entries, stored with INDEX_EXTENSION, and the LogSummary entries stored with SUMMARY_EXTENSION.
+
+    The total size of the entries is bounded, the least recently used entries are removed first. An entry is only read past its small
+    header once the log and the settings it was made under have been checked, so a stale entry costs next to nothing.'''
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def get_entry_path(self, log_path, extension=ENTRY_EXTENSION):
+        '''Returns the path of the cache entry for a log file'''
+        key = hashlib.sha1(os.path.normcase(os.path.abspath(log_path)).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key + extension)
+
+    def get_identity(self, log_path, offset):
+        '''Returns what identifies the first offset bytes of a log file: its path and the hashes of its first and last few KB'''
+        with open(log_path, "rb") as file:
+            head = hash_bytes(file, 0, min(CHECK_BYTES, offset))
+            tail = hash_bytes(file, max(0, offset - CHECK_BYTES), min(CHECK_BYTES, offset))
+        return {"version": CACHE_VERSION, "path": os.path.abspath(log_path), "offset": offset, "head": head, "tail": tail}
+
+    def load(self, log_path, extension=ENTRY_EXTENSION, settings=None):
+        '''Returns (offset, state) from the cache entry of a log file, or None if it has no entry, it was stored under other settings or
+        the log has been truncated or replaced since. The log only needs to be parsed from the offset onwards.'''
+        entry_path = self.get_entry_path(log_path, extension)
+        try:
+            with open(entry_path, "rb") as file:
+                header = pickle.load(file)
+                valid = self.is_valid(header, log_path)
+                if valid and header["settings"] != settings:
+                    return None # Replaced once the log has been parsed under these settings
+                if valid:
+                    with gc_paused():
+                        state = pickle.loads(zlib.decompress(file.read()))
+        except FileNotFoundError:
+            return None
+        except Exception as e: # Unreadable, e.g. the combat model classes have changed since it was written
+            print('WARNING     Ignoring unreadable parse cache entry:', e)
+            valid = False
+        if not valid:
+            self.remove(entry_path) # Truncated, replaced or from another version of the parser
+            return None
+        os.utime(entry_path) # Most recently used
+        return header["offset"], state
+
+    def is_valid(self, header, log_path):
+        '''Returns True if the log file still starts with the bytes the cache entry with the given header was parsed from'''
+        if header.get("version") != CACHE_VERSION or not os.path.isfile(log_path):
+            return False
+        stat = os.stat(log_path)
+        offset = header["offset"]
+        if stat.st_size < offset or (stat.st_size == offset and stat.st_mtime_ns != header["mtime"]):
+            return False
+        return {key: value for key, value in header.items() if key not in ("mtime", "settings")} == self.get_identity(log_path, offset)
+
+    def store(self, log_path, offset, state, extension=ENTRY_EXTENSION, settings=None):
+        '''Writes the parse state of the first offset bytes of a log file, made under the given settings, to its cache entry, then removes
+        the least recently used entries until the cache fits in its size limit again. A state too large for the cache on its own isn't
+        written, and the log's old entry is removed.'''
+        entry_path = self.get_entry_path(log_path, extension)
+        header = self.get_identity(log_path, offset)
+        header["mtime"] = os.stat(log_path).st_mtime_ns
+        header["settings"] = settings
+        header = pickle.dumps(header, protocol=pickle.HIGHEST_PROTOCOL) # Checked on its own before the much larger state is loaded
+        with gc_paused():
+            body = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), COMPRESSION_LEVEL)
+        if len(header) + len(body) > self.max_bytes:
+            self.remove(entry_path)
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        temporary_path = entry_path + ".tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(header)
+            file.write(body)
+        os.replace(temporary_path, entry_path) # Never leaves a half written entry behind
+        self.evict(os.path.basename(entry_path))
+
+    def evict(self, keep=None):
+        '''Removes the least recently used entries, other than the one named keep, until the total size is within max_bytes'''
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(EXTENSIONS) and name != keep:
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for mtime, size, name in entries)
+        if keep is not None and os.path.exists(os.path.join(self.directory, keep)):
+            total += os.path.getsize(os.path.join(self.directory, keep))
+        for mtime, size, name in sorted(entries):
+            if total <= self.max_bytes: break
+            self.remove(os.path.join(self.directory, name))
+            total -= size
+
+    def remove(self, entry_path):
+        try:
+            os.remove(entry_path)
+        except OSError:
+            pass
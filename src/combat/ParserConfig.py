@@ -0,0 +1,38 @@
+from data.Globals import Globals
+
+
+class ParserConfig:
+    '''The settings a Parser works under, as a plain object so the parsing engine doesn't depend on where they are stored.
+
+    Every setting defaults to its value in Globals. The UI builds one from its QSettings (see ui.QtParser.load_parser_config), scripts can
+    create one directly, e.g. ParserConfig(COMBAT_SESSION_TIMEOUT=60, PARSE_WORKERS=4). The attribute names are the ones the Parser
+    has, except ASSOCIATE_PROCS_TO_POWERS which the Parser keeps as associating_procs.'''
+
+    KEYS = ("COMBAT_SESSION_TIMEOUT", "COMBAT_SESSION_NAME", "COMBAT_SESSION_NAMING_MODE", "ASSOCIATE_PROCS_TO_POWERS", "CONSOLE_VERBOSITY",
+            "PARSE_WORKERS", "PARSE_CACHE_SIZE", "PARSE_CACHE_DIR")
+
+    def __init__(self, **settings):
+        self.COMBAT_SESSION_TIMEOUT = Globals.DEFAULT_COMBAT_SESSION_TIMEOUT # Seconds without activity before a combat session ends, 0 = never
+        self.COMBAT_SESSION_NAME = Globals.DEFAULT_COMBAT_SESSION_NAME
+        self.COMBAT_SESSION_NAMING_MODE = Globals.DEFAULT_COMBAT_SESSION_NAMING_MODE
+        self.ASSOCIATE_PROCS_TO_POWERS = Globals.DEFAULT_ASSOCIATE_PROCS_TO_POWERS
+        self.CONSOLE_VERBOSITY = Globals.DEFAULT_CONSOLE_VERBOSITY
+        self.PARSE_WORKERS = Globals.DEFAULT_PARSE_WORKERS
+        self.PARSE_CACHE_SIZE = Globals.DEFAULT_PARSE_CACHE_SIZE
+        self.PARSE_CACHE_DIR = Globals.PARSE_CACHE_DIR
+        for key, value in settings.items():
+            if key not in self.KEYS:
+                raise TypeError("Unknown parser setting: " + key)
+            setattr(self, key, value)
+
+    def copy(self, **settings):
+        '''Returns a copy of the config with some of the settings changed'''
+        values = {key: getattr(self, key) for key in self.KEYS}
+        values.update(settings)
+        return ParserConfig(**values)
+
+    def __eq__(self, other):
+        return isinstance(other, ParserConfig) and all(getattr(self, key) == getattr(other, key) for key in self.KEYS)
+
+    def __repr__(self):
+        return "ParserConfig(" + ", ".join(key + "=" + repr(getattr(self, key)) for key in self.KEYS) + ")"
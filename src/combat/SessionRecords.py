@@ -0,0 +1,41 @@
+from combat.Timestamp import format_timestamp
+
+RECORD_TYPES = ("session", "character", "ability", "damage_type")
+
+# Every field a record can have, in the order they are written. The columns of a CSV file, records leave the ones they don't have empty.
+COLUMNS = ("record", "file", "session", "start_time", "end_time", "character", "pet", "ability", "damage_type", "proc", "duration",
+           "damage", "dps", "count", "hits", "tries", "accuracy", "max_damage", "average_damage", "exp", "inf")
+
+
+def get_session_records(session, file_path="", types=RECORD_TYPES):
+    '''Returns the stats of an ended CombatSession as a list of flat dicts, one for the session and one for each of its characters (the
+    player and their pets), their abilities and the damage types of those, in that order. Only the record types given are included.
+    Damage is rounded to 2 decimal places, the same as it is shown in the UI.'''
+    records = []
+    duration = session.get_duration()
+    common = {"file": file_path, "session": session.get_name(), "start_time": format_timestamp(session.start_time),
+              "end_time": format_timestamp(session.end_time)}
+    if "session" in types:
+        records.append(dict(record="session", **common, duration=duration, damage=round(session.get_total_damage(), 2), dps=session.get_dps(),
+                            count=session.get_count(), exp=session.get_exp(), inf=session.get_inf()))
+    for character in session.chars.values():
+        pet = character.get_type() == "pet"
+        if "character" in types:
+            records.append(dict(record="character", **common, character=character.get_name(), pet=pet, duration=duration,
+                                damage=round(character.get_total_damage(), 2), dps=character.get_dps(duration), count=character.get_count(),
+                                hits=character.get_hits(), tries=character.get_tries(), accuracy=character.get_accuracy(),
+                                average_damage=character.get_average_damage()))
+        for ability in character.abilities.values():
+            if "ability" in types:
+                records.append(dict(record="ability", **common, character=character.get_name(), pet=pet, ability=ability.get_name(),
+                                    proc=bool(ability.proc), duration=duration, damage=round(ability.get_total_damage(), 2),
+                                    dps=ability.get_dps(duration), count=ability.get_count(), hits=ability.get_hits(),
+                                    tries=ability.get_tries(), accuracy=ability.get_accuracy(), max_damage=round(ability.get_max_damage(), 2),
+                                    average_damage=ability.get_average_damage()))
+            if "damage_type" in types:
+                for component in ability.damage:
+                    records.append(dict(record="damage_type", **common, character=character.get_name(), pet=pet, ability=ability.get_name(),
+                                        damage_type=component.type, proc=bool(component.is_proc), duration=duration,
+                                        damage=round(component.get_damage(), 2), dps=component.get_dps(duration), count=component.get_count(),
+                                        max_damage=round(component.get_highest_damage(), 2), average_damage=component.get_average_damage()))
+    return records
@@ -0,0 +1,155 @@
+from combat.CombatSession import CombatSession
+from combat.Character import Character
+from combat.Ability import Ability
+from combat.DamageComponent import DamageComponent
+
+
+class DamageSnapshot:
+    '''Read-only copy of a DamageComponent, the getters are shared with DamageComponent so the numbers are always identical'''
+    __slots__ = ("name", "type", "count", "total_damage", "highest_damage", "lowest_damage", "last_damage", "is_proc", "parent_hits")
+
+    def __init__(self, component):
+        self.name = component.name
+        self.type = component.type
+        self.count = component.count
+        self.total_damage = component.total_damage
+        self.highest_damage = component.highest_damage
+        self.lowest_damage = component.lowest_damage
+        self.last_damage = component.last_damage
+        self.is_proc = component.is_proc
+        self.parent_hits = component.parent_hits
+
+    get_dps = DamageComponent.get_dps
+    get_average_damage = DamageComponent.get_average_damage
+    get_highest_damage = DamageComponent.get_highest_damage
+    get_lowest_damage = DamageComponent.get_lowest_damage
+    get_damage = DamageComponent.get_damage
+    get_last_damage = DamageComponent.get_last_damage
+    get_count = DamageComponent.get_count
+    get_proc_rate = DamageComponent.get_proc_rate
+
+
+class AbilitySnapshot:
+    '''Read-only copy of an Ability and its damage components'''
+    __slots__ = ("name", "count", "tries", "hits", "damage", "proc", "pet", "pet_name", "total_damage", "max_damage", "average_damage")
+
+    def __init__(self, ability):
+        self.name = ability.name
+        self.count = ability.count
+        self.tries = ability.tries
+        self.hits = ability.hits
+        self.damage = tuple(DamageSnapshot(component) for component in ability.damage)
+        self.proc = ability.proc
+        self.pet = ability.pet
+        self.pet_name = ability.pet_name
+        self.total_damage = ability.total_damage
+        self.max_damage = ability.max_damage
+        self.average_damage = ability.average_damage
+
+    get_name = Ability.get_name
+    get_total_damage = Ability.get_total_damage
+    get_max_damage = Ability.get_max_damage
+    get_min_damage = Ability.get_min_damage
+    get_average_damage = Ability.get_average_damage
+    get_accuracy = Ability.get_accuracy
+    get_count = Ability.get_count
+    get_dps = Ability.get_dps
+    get_hits = Ability.get_hits
+    get_tries = Ability.get_tries
+
+
+class CharacterSnapshot:
+    '''Read-only copy of a Character.
+    When a previous snapshot of the same character is given, only the abilities named in touched are copied again, the rest are shared.'''
+    __slots__ = ("name", "type", "abilities", "total_damage", "hits", "tries", "count", "average_sum")
+
+    def __init__(self, character, touched=None, previous=None):
+        self.name = character.name
+        self.type = character.type
+        self.total_damage = character.total_damage
+        self.hits = character.hits
+        self.tries = character.tries
+        self.count = character.count
+        self.average_sum = character.average_sum
+        self.abilities = {}
+        for name, ability in character.abilities.items():
+            old = None if previous is None else previous.abilities.get(name)
+            if old is None or (touched is None or name in touched):
+                self.abilities[name] = AbilitySnapshot(ability)
+            else:
+                self.abilities[name] = old
+
+    get_name = Character.get_name
+    get_type = Character.get_type
+    get_total_damage = Character.get_total_damage
+    get_average_damage = Character.get_average_damage
+    get_accuracy = Character.get_accuracy
+    get_hits = Character.get_hits
+    get_tries = Character.get_tries
+    get_dps = Character.get_dps
+    get_count = Character.get_count
+
+
+def snapshot_characters(characters, group, paths, previous):
+    '''Copies a dict of characters, sharing the snapshots of any character that has no touched paths in the given group'''
+    touched = {} # Character name -> set of touched ability names, or None if the whole character was touched
+    for path_group, character, ability, damage in paths:
+        if path_group != group: continue
+        if ability is None:
+            touched[character] = None
+        elif touched.get(character, ()) is not None:
+            touched.setdefault(character, set()).add(ability)
+
+    snapshots = {}
+    for name, character in characters.items():
+        old = previous.get(name)
+        if old is None:
+            snapshots[name] = CharacterSnapshot(character)
+        elif name in touched:
+            snapshots[name] = CharacterSnapshot(character, touched[name], old)
+        else:
+            snapshots[name] = old
+    return snapshots
+
+
+class SessionSnapshot:
+    '''Immutable, versioned copy of a CombatSession that the UI can read without holding the combat mutex.
+
+    Snapshots are copy-on-write: when a session changes, only the characters and abilities the ChangeSet says were touched are copied
+    again and everything else is shared with the previous snapshot.  Nothing in a published snapshot is ever modified, so the parser
+    and the UI never have to lock each other out to use them.  Creating one must be done under the combat mutex lock.'''
+    __slots__ = ("uid", "version", "name", "start_time", "end_time", "duration", "exp_value", "inf_value", "first_enemy_damaged",
+                 "total_damage", "chars", "targets")
+
+    def __init__(self, session, version, paths=None, previous=None):
+        '''Copies the whole session, unless a previous snapshot of the same session and the set of touched paths since then are given'''
+        self.uid = session.uid
+        self.version = version
+        self.name = session.name
+        self.start_time = session.start_time
+        self.end_time = session.end_time
+        self.duration = session.duration
+        self.exp_value = session.exp_value
+        self.inf_value = session.inf_value
+        self.first_enemy_damaged = session.first_enemy_damaged
+        self.total_damage = session.total_damage
+
+        if previous is None or paths is None or previous.uid != session.uid:
+            self.chars = {name: CharacterSnapshot(character) for name, character in session.chars.items()}
+            self.targets = {name: CharacterSnapshot(character) for name, character in session.targets.items()}
+        else:
+            self.chars = snapshot_characters(session.chars, "chars", paths, previous.chars)
+            self.targets = snapshot_characters(session.targets, "targets", paths, previous.targets)
+
+    def get_duration(self):
+        return self.duration
+
+    get_name = CombatSession.get_name
+    get_count = CombatSession.get_count
+    get_total_damage = CombatSession.get_total_damage
+    get_average_damage = CombatSession.get_average_damage
+    get_dps = CombatSession.get_dps
+    get_exp = CombatSession.get_exp
+    get_inf = CombatSession.get_inf
+    get_first_enemy_damaged = CombatSession.get_first_enemy_damaged
+    get_highest_damaged_enemy = CombatSession.get_highest_damaged_enemy
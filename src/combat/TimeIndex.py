@@ -0,0 +1,77 @@
+import bisect
+import mmap
+import os
+from combat import LogChunks
+
+INDEX_SPACING = 64 * 1024 # Bytes of log between samples, bounds how far finding a time has to scan on from the nearest sample
+
+
+class TimeIndex:
+    '''Sparse index from the timestamps of a log file to byte offsets, so part of a huge log can be found without reading it from the start.
+
+    Every INDEX_SPACING bytes, it samples the offset of the next line that starts with a timestamp, along with that timestamp. Sampling
+    reads one line for every 64 KB of log, so the index is cheap to bring up to date (only what has been appended is sampled) and is
+    kept in the ParseCache directory next to the parse state. Logs are written in time order, so finding a time takes a binary search of
+    the samples and a scan of at most INDEX_SPACING bytes. Timestamps are seconds since the epoch, as from Timestamp.convert_timestamp.'''
+
+    def __init__(self):
+        self.timestamps = []
+        self.offsets = []
+        self.indexed_offset = 0 # Bytes of the log the samples cover
+
+    def update(self, file_path, end=None):
+        '''Samples the log from where the index stopped up to end (the end of the file by default), returns True if the index has changed'''
+        if end is None:
+            end = os.path.getsize(file_path)
+        if end <= self.indexed_offset:
+            return False
+        with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            end = min(end, len(data))
+            sample = self.indexed_offset
+            while sample < end:
+                position = sample
+                if position > 0 and data[position - 1] != 10: # Part way through a line, sample the next one
+                    position = data.find(b"\n", position, end) + 1 or end
+                sample += INDEX_SPACING
+                while position < min(sample, end):
+                    line_end = data.find(b"\n", position, end) + 1 or end
+                    timestamp = LogChunks.line_timestamp(data[position:min(position + 20, line_end)])
+                    if timestamp is not None:
+                        if not self.offsets or position > self.offsets[-1]:
+                            self.timestamps.append(timestamp)
+                            self.offsets.append(position)
+                        break
+                    position = line_end
+        self.indexed_offset = end
+        return True
+
+    def find_offset(self, file_path, timestamp):
+        '''Returns the byte offset of the first line with a timestamp at or after the given one, or the end of the indexed part of the log'''
+        index = bisect.bisect_left(self.timestamps, timestamp) # The lines before the sample at index are all earlier
+        position = self.offsets[index - 1] if index > 0 else 0
+        limit = self.offsets[index] if index < len(self.offsets) else self.indexed_offset
+        if position >= limit:
+            return limit
+        with open(file_path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            while position < limit:
+                line_end = data.find(b"\n", position, limit) + 1 or limit
+                line_timestamp = LogChunks.line_timestamp(data[position:min(position + 20, line_end)])
+                if line_timestamp is not None and line_timestamp >= timestamp:
+                    return position
+                position = line_end
+        return limit
+
+    def find_gap_search_start(self, offset, timeout):
+        '''Returns the offset at or after the given one that LogChunks.find_quiet_gap can start searching for a gap longer than timeout
+        seconds from, and find the same gap. Two samples no more than timeout seconds apart can't have a gap like that between them,
+        so those stretches of the log are skipped.'''
+        index = bisect.bisect_right(self.offsets, offset) - 1 # The sample at or before offset
+        if index < 0:
+            return offset
+        while index + 1 < len(self.offsets) and self.timestamps[index + 1] - self.timestamps[index] <= timeout:
+            index += 1
+        # find_quiet_gap skips the line it starts in, start in the newline before the sample so its line is still compared with the next
+        return max(offset, self.offsets[index] - 1)
+
+    def __len__(self):
+        return len(self.offsets)
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+
+EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+SECONDS_PER_DAY = 86400
+
+day_offsets = {} # Caches the epoch offset (in seconds) of each date string seen in the log, there's normally only one or two per log file
+
+
+def get_day_offset(date):
+    '''Returns the number of seconds between the epoch and midnight of the given "YYYY-MM-DD" date string, cached per date'''
+    offset = day_offsets.get(date)
+    if offset is None:
+        # Slicing the fixed-width fields is much cheaper than strptime, datetime() still validates the date itself
+        offset = (datetime(int(date[0:4]), int(date[5:7]), int(date[8:10])).toordinal() - EPOCH_ORDINAL) * SECONDS_PER_DAY
+        day_offsets[date] = offset
+    return offset
+
+
+def convert_timestamp(date, time):
+    '''Converts a "YYYY-MM-DD" date and "HH:MM:SS" time from the log file into seconds since the epoch.
+    The value keeps increasing across midnight, so sessions that span two days have the correct duration.'''
+    return get_day_offset(date) + int(time[0:2]) * 3600 + int(time[3:5]) * 60 + int(time[6:8])
+
+
+def format_timestamp(timestamp):
+    '''Converts seconds since the epoch, as from convert_timestamp, back to the "YYYY-MM-DD HH:MM:SS" time of the log'''
+    return (datetime(1970, 1, 1) + timedelta(seconds=timestamp)).strftime("%Y-%m-%d %H:%M:%S")
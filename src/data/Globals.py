@@ -14,4 +14,7 @@ class Globals:
     DEFAULT_COMBAT_SESSION_NAMING_MODE = "Custom Name"  # Options: "First Enemy Damaged", "Highest Enemy Damaged", "Custom Name"
     DEFAULT_ASSOCIATE_PROCS_TO_POWERS = True
     DEFAULT_CONSOLE_VERBOSITY = 1
-    DEFAULT_AUTO_UPDATE_LOG_FILE = True
\ No newline at end of file
+    DEFAULT_AUTO_UPDATE_LOG_FILE = True
+    DEFAULT_PARSE_WORKERS = 0 # Worker processes for parsing large existing logs, 0 = one per CPU core (up to 8), 1 = no workers
+    DEFAULT_PARSE_CACHE_SIZE = 512 # MB of parsed log states kept on disk, so reopening a log only parses what was appended to it, 0 = off
+    PARSE_CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache"), APPLICATION_NAME, "parse_cache")
@@ -54,6 +54,24 @@ PATTERNS = {
     ),
 }
 
+# Cheap, necessary conditions for each pattern above, used by the EventClassifier to skip regexes that cannot possibly match.
+# Each entry is (leading tokens the message must start with, or None if it can start with anything, substrings the message must contain).
+# The message is the log line with the 20 character timestamp removed.  These MUST be kept in sync with PATTERNS - a gate that is
+# stricter than its regex will silently drop events.
+PATTERN_GATES = {
+    "player_ability_activate": (("You activated the ",), (" power.",)),
+    "player_hit_roll": (("HIT ", "MISS"), ("! Your ", " power ")),
+    "player_pet_hit_roll": (None, ("! Your ", " power ")),  # Starts with the pet name
+    "player_damage": (None, (" with your ", " points of ")),  # May start with the player name
+    "player_pet_damage": (None, ("You hit ", " with your ", " points of ")),  # Starts with the pet name
+    "reward_gain_both": (("You gain ",), (" experience and ",)),
+    "reward_gain_exp": (("You gain ",), (" experience.",)),
+    "reward_gain_inf": (("You gain ",), ()),
+    "player_name": (("Welcome to City of ", "Now entering the Rogue Isles"), ()),
+    "player_name_backup": (("HIT ", "MISS"), ("! Your ", " power is autohit")),
+    "command": (("[Local] ", "[SuperGroup] "), ("##",)),
+}
+
 # This pattern was intended to be used to quickly grab the data and time from the line without having to loop through the whole list of patterns.  It is not currently used.
 PATTERN_DATETIME = {
     "date_time": re.compile(
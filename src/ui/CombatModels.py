@@ -0,0 +1,334 @@
+from PyQt5.QtCore import Qt, QAbstractItemModel, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QColor, QFont
+from combat.ChangeSet import session_aggregates
+
+SORT_ROLE = Qt.UserRole + 1 # Raw values, so columns displayed with thousands separators or % signs still sort numerically
+FETCH_BATCH = 200 # Number of rows materialized per fetchMore call, keeps huge enemy lists cheap until they're scrolled to
+
+ABILITY_COLUMNS = ["Name", "DPS", "Acc %", "Avg Per Hit", "Count", "Max", "Min", "Total", "Hits", "Tries"]
+SESSION_COLUMNS = ["Session", "Duration", "DPS", "EXP", "Inf"]
+
+CHARACTER_FONT = QFont("Fira Sans Medium", 11, QFont.Bold)
+CHARACTER_BACKGROUND = QColor(25, 25, 25)
+
+
+class TreeNode:
+    '''A row in the AbilityTreeModel, wrapping a Character (level 1), Ability (level 2) or DamageComponent (level 3)'''
+    def __init__(self, key, source=None, parent=None, row=0):
+        self.key = key
+        self.source = source
+        self.parent = parent
+        self.row = row
+        self.level = 0 if parent is None else parent.level + 1
+        self.uid = key if self.level <= 1 else parent.uid + key # Matches the ids the QTreeWidget version stored under Qt.UserRole
+        self.children = []
+        self.child_keys = {} # key -> child node
+        self.fetch_limit = 0 # How many children the view has asked for so far
+        self.display = ()
+        self.sort = ()
+
+    def source_children(self, group):
+        '''Returns a dict of key -> source object for this node's children in the combat data'''
+        if self.level == 0: return getattr(self.source, group)
+        if self.level == 1: return self.source.abilities
+        if self.level == 2: return {component.name: component for component in self.source.damage}
+        return {}
+
+    def source_child_count(self, group):
+        if self.level == 0: return len(getattr(self.source, group))
+        if self.level == 1: return len(self.source.abilities)
+        if self.level == 2: return len(self.source.damage)
+        return 0
+
+
+def character_values(character, duration):
+    '''Returns the (display, sort) column values for a character row'''
+    dps = character.get_dps(duration)
+    accuracy = character.get_accuracy()
+    average = character.get_average_damage()
+    count = character.get_count()
+    total = character.get_total_damage()
+    hits = character.get_hits()
+    tries = character.get_tries()
+    display = (character.get_name(), dps, "{:,}%".format(accuracy), average, count, None, None, "{:,}".format(int(total)), hits, tries)
+    return display, (character.get_name(), dps, accuracy, average, count, 0, 0, total, hits, tries)
+
+
+def ability_values(ability, duration):
+    '''Returns the (display, sort) column values for an ability row'''
+    dps = ability.get_dps(duration)
+    accuracy = ability.get_accuracy()
+    average = ability.get_average_damage()
+    count = ability.get_count()
+    highest = round(ability.get_max_damage(), 2)
+    lowest = round(ability.get_min_damage(), 2)
+    total = ability.get_total_damage()
+    hits = ability.get_hits()
+    tries = ability.get_tries()
+    display = (ability.get_name(), dps, accuracy, average, count, highest, lowest, "{:,}".format(int(total)), hits, tries)
+    return display, (ability.get_name(), dps, accuracy, average, count, highest, lowest, total, hits, tries)
+
+
+def damage_values(component, duration):
+    '''Returns the (display, sort) column values for a damage component row, procs show their proc rate in curly brackets'''
+    dps = component.get_dps(duration)
+    proc_rate = component.get_proc_rate() if component.is_proc else 0
+    average = component.get_average_damage()
+    count = component.get_count()
+    highest = round(component.get_highest_damage(), 2)
+    lowest = round(component.get_lowest_damage(), 2)
+    total = component.get_damage()
+    display = (component.name, dps, "{" + str(proc_rate) + "}" if component.is_proc else "", average, count, highest, lowest, "{:,}".format(int(total)), None, None)
+    return display, (component.name, dps, proc_rate, average, count, highest, lowest, total, 0, 0)
+
+
+class AbilityTreeModel(QAbstractItemModel):
+    '''Tree model of Character -> Ability -> DamageComponent for one side of a CombatSession (the "chars" or the "targets").
+
+    Rows are matched to the combat data by name, so refresh() only emits dataChanged for rows whose numbers changed and keeps the
+    view's expansion and selection. Children are only materialized when the view asks for them through fetchMore, so a collapsed
+    enemy with hundreds of abilities costs nothing to refresh.
+
+    The sessions are the immutable SessionSnapshots published by the parser, so the model reads them without taking the combat mutex.'''
+
+    def __init__(self, group, parent=None):
+        super().__init__(parent)
+        self.group = group
+        self.root = TreeNode("")
+        self.root.fetch_limit = FETCH_BATCH
+        self.duration = 0
+
+    def set_session(self, session):
+        '''Points the model at a different session (or None to clear it) and refreshes it'''
+        if session is None:
+            self.beginResetModel()
+            self.root = TreeNode("")
+            self.root.fetch_limit = FETCH_BATCH
+            self.endResetModel()
+            return
+        self.root.source = session
+        self.refresh()
+
+    def refresh(self):
+        '''Syncs the materialized rows against the combat data'''
+        if self.root.source is None: return
+        self.duration = self.root.source.duration
+        self.sync_children(self.root, QModelIndex())
+
+    def sync_children(self, node, parent_index):
+        source = node.source_children(self.group)
+
+        # Remove rows that no longer exist (only happens when switching sessions)
+        for child in reversed(node.children):
+            if child.key not in source:
+                self.beginRemoveRows(parent_index, child.row, child.row)
+                del node.children[child.row]
+                del node.child_keys[child.key]
+                for sibling in node.children[child.row:]:
+                    sibling.row -= 1
+                self.endRemoveRows()
+
+        # Update existing rows, only notifying the view about the ones that changed
+        last_column = len(ABILITY_COLUMNS) - 1
+        for child in node.children:
+            child.source = source[child.key]
+            if self.update_values(child):
+                self.dataChanged.emit(self.createIndex(child.row, 1, child), self.createIndex(child.row, last_column, child))
+            if child.fetch_limit:
+                self.sync_children(child, self.createIndex(child.row, 0, child))
+
+        # Add new rows, up to however many the view has fetched
+        if len(node.children) < node.fetch_limit and len(node.children) < len(source):
+            self.add_children(node, parent_index, source, node.fetch_limit)
+
+    def apply_changes(self, session, paths):
+        '''Refreshes only the rows touched by a ChangeSet, along with their parents and any fetched children.
+        Falls back to a full refresh when the session or its duration changed, as that changes the DPS of every row.
+        Untouched rows keep pointing at their old snapshots, which are shared with the new session snapshot anyway.'''
+        if self.root.source is None or session.uid != self.root.source.uid or session.duration != self.duration:
+            self.set_session(session)
+            return
+        self.root.source = session
+
+        refreshed = set()
+        last_column = len(ABILITY_COLUMNS) - 1
+        for path in paths:
+            if path[0] != self.group: continue
+            node, index = self.root, QModelIndex()
+            for key in path[1:]:
+                if key is None: break
+                child = node.child_keys.get(key)
+                if child is None:
+                    # New row, added if the view has fetched this far
+                    source = node.source_children(self.group)
+                    if len(node.children) < node.fetch_limit and key in source:
+                        self.add_children(node, index, source, node.fetch_limit)
+                    child = node.child_keys.get(key)
+                    if child is None: break
+                elif child not in refreshed:
+                    refreshed.add(child)
+                    child.source = node.source_children(self.group)[key]
+                    if self.update_values(child):
+                        self.dataChanged.emit(self.createIndex(child.row, 1, child), self.createIndex(child.row, last_column, child))
+                node, index = child, self.createIndex(child.row, 0, child)
+            if node is not self.root and node.fetch_limit:
+                self.sync_children(node, index)
+
+    def add_children(self, node, parent_index, source, limit):
+        new_keys = []
+        for key in source:
+            if len(node.children) + len(new_keys) >= limit: break
+            if key not in node.child_keys: new_keys.append(key)
+        if not new_keys: return
+
+        first = len(node.children)
+        self.beginInsertRows(parent_index, first, first + len(new_keys) - 1)
+        for key in new_keys:
+            child = TreeNode(key, source[key], node, len(node.children))
+            self.update_values(child)
+            node.children.append(child)
+            node.child_keys[key] = child
+        self.endInsertRows()
+
+    def update_values(self, node):
+        '''Recalculates a node's column values, returns True if the displayed values changed'''
+        if node.level == 1: display, sort = character_values(node.source, self.duration)
+        elif node.level == 2: display, sort = ability_values(node.source, self.duration)
+        else: display, sort = damage_values(node.source, self.duration)
+        node.sort = sort
+        if display == node.display: return False
+        node.display = display
+        return True
+
+    def node_from_index(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self.node_from_index(parent)
+        if row < 0 or row >= len(node.children) or column < 0 or column >= len(ABILITY_COLUMNS):
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid(): return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self.root: return QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() and parent.column() != 0: return 0
+        return len(self.node_from_index(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(ABILITY_COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.node_from_index(parent)
+        if node.source is None: return False
+        return node.source_child_count(self.group) > 0
+
+    def canFetchMore(self, parent):
+        node = self.node_from_index(parent)
+        if node.source is None: return False
+        return len(node.children) < node.source_child_count(self.group)
+
+    def fetchMore(self, parent):
+        node = self.node_from_index(parent)
+        if node.source is None: return
+        node.fetch_limit = max(node.fetch_limit, len(node.children)) + FETCH_BATCH
+        self.add_children(node, parent, node.source_children(self.group), node.fetch_limit)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        node = index.internalPointer()
+        column = index.column()
+        if role == Qt.DisplayRole: return node.display[column]
+        if role == SORT_ROLE: return node.sort[column]
+        if role == Qt.UserRole and column == 0: return node.uid
+        if role == Qt.TextAlignmentRole:
+            if 2 <= column <= (7 if node.level == 3 else 8): return Qt.AlignCenter
+            return None
+        if node.level == 1:
+            if role == Qt.FontRole: return CHARACTER_FONT
+            if role == Qt.BackgroundRole: return CHARACTER_BACKGROUND
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return ABILITY_COLUMNS[section]
+        return None
+
+
+class SessionListModel(QAbstractTableModel):
+    '''Flat model of the combat sessions list, row N is combat_session_data[N].
+    Like the ability trees, it reads the parser's immutable SessionSnapshots and doesn't need the combat mutex.'''
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.sessions = []
+        self.rows = [] # Cached display values for each session
+
+    def session_values(self, session):
+        return self.format_values(session_aggregates(session))
+
+    def format_values(self, aggregates):
+        '''Turns the (name, duration, dps, exp, inf) aggregates of a session into display values'''
+        name, duration, dps, exp, inf = aggregates
+        return (name, str(duration) + "s", dps, "{:,}".format(exp), "{:,}".format(inf))
+
+    def set_sessions(self, sessions):
+        '''Syncs the rows against a list of combat sessions, only notifying the view about rows that were added, removed or changed'''
+        self.sessions = sessions
+        if len(sessions) < len(self.rows):
+            self.beginRemoveRows(QModelIndex(), len(sessions), len(self.rows) - 1)
+            del self.rows[len(sessions):]
+            self.endRemoveRows()
+
+        for row in range(len(self.rows)):
+            values = self.session_values(sessions[row])
+            if values != self.rows[row]:
+                self.rows[row] = values
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(SESSION_COLUMNS) - 1))
+
+        if len(sessions) > len(self.rows):
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(sessions) - 1)
+            self.rows.extend(self.session_values(session) for session in sessions[len(self.rows):])
+            self.endInsertRows()
+
+    def apply_changes(self, changes):
+        '''Applies a ChangeSet from the parser, only the sessions it touched are recalculated'''
+        self.sessions = changes.session_data
+        if changes.session_count < len(self.rows):
+            self.beginRemoveRows(QModelIndex(), changes.session_count, len(self.rows) - 1)
+            del self.rows[changes.session_count:]
+            self.endRemoveRows()
+
+        for row, aggregates in changes.session_values.items():
+            if row >= len(self.rows): continue
+            values = self.format_values(aggregates)
+            if values != self.rows[row]:
+                self.rows[row] = values
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(SESSION_COLUMNS) - 1))
+
+        if changes.session_count > len(self.rows):
+            self.beginInsertRows(QModelIndex(), len(self.rows), changes.session_count - 1)
+            for row in range(len(self.rows), changes.session_count):
+                aggregates = changes.session_values.get(row)
+                self.rows.append(self.format_values(aggregates) if aggregates else self.session_values(self.sessions[row]))
+            self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(SESSION_COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        if role == Qt.DisplayRole: return self.rows[index.row()][index.column()]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return SESSION_COLUMNS[section]
+        return None
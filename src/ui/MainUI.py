@@ -1,11 +1,13 @@
 import sys
-from PyQt5.QtWidgets import QMessageBox, QSizePolicy, QApplication, QMainWindow, QLabel, QLineEdit, QPushButton, QTreeWidget, QTreeWidgetItem, QVBoxLayout, QWidget, QFileDialog, QHBoxLayout, QTreeWidgetItemIterator, QTabWidget
-from PyQt5.QtGui import QColor, QFont
-from PyQt5.QtCore import Qt, QThread, pyqtSlot, QMutex, QMutexLocker, pyqtSignal, QSettings
-from combat.CombatParser import Parser, CombatSession, Character, Ability, DamageComponent
+from PyQt5.QtWidgets import QMessageBox, QSizePolicy, QApplication, QMainWindow, QLabel, QLineEdit, QPushButton, QTreeView, QAbstractItemView, QVBoxLayout, QWidget, QFileDialog, QHBoxLayout, QTabWidget, QCheckBox, QDateTimeEdit
+from PyQt5.QtCore import Qt, QThread, pyqtSlot, pyqtSignal, QSettings, QSortFilterProxyModel, QDateTime
+from combat.CombatParser import CombatSession, Character, Ability, DamageComponent
+from combat import Timestamp
 from data.Globals import Globals
 import random
 from ui.Settings import SettingsWindow
+from ui.QtParser import QtParser
+from ui.CombatModels import AbilityTreeModel, SessionListModel, SORT_ROLE
 from ui.style.Theme import apply_stylesheet, apply_header_style_fix
 import os
 from pathlib import Path
@@ -14,37 +16,45 @@ class ParserThread(QThread):
     sig_process_live_log = pyqtSignal(str)
     sig_process_existing_log = pyqtSignal(str)
     sig_process_existing_then_live = pyqtSignal(str)
+    sig_process_log_range = pyqtSignal(str)
 
-    def __init__(self, file_path : str, live: bool, process_existing_first: bool = False):
+    def __init__(self, file_path : str, live: bool, process_existing_first: bool = False, time_range: tuple = None):
         super().__init__()
         self.settings = QSettings(Globals.AUTHOR, Globals.APPLICATION_NAME)
         self.file_path = file_path
         self.live = live
         self.process_existing_first = process_existing_first
-        self.parser = Parser(self)
+        self.time_range = time_range # (start, end) timestamps to only process that part of an existing log
+        self.parser = QtParser(self)
         self.stored_finished_callback = None  # Store the finished callback for reconnection
         if self.settings.value("ConsoleVerbosity", 1, int) >= 2: print("Parser Initialized")
         self.sig_process_live_log.connect(lambda: self.parser.process_live_log(self.file_path))
         self.sig_process_existing_log.connect(lambda: self.parser.process_existing_log(self.file_path))
         self.sig_process_existing_then_live.connect(lambda: self.process_existing_then_live_handler(self.file_path))
+        self.sig_process_log_range.connect(lambda: self.parser.process_log_range(self.file_path, *self.time_range))
 
     def process_existing_then_live_handler(self, file_path):
-        """Process existing log entries first, then start live monitoring."""
+        """Process existing log entries first, then start live monitoring from the exact byte offset the existing pass finished at."""
         # Set a flag to suppress sig_finished emission during existing log processing
         self.parser.suppress_finished_signal = True
 
-        # Process all existing entries (sig_finished will be suppressed)
-        self.parser.process_existing_log(file_path)
+        # Process all existing entries (sig_finished will be suppressed), up to the last complete line
+        self.parser.process_existing_log(file_path, hold_partial_line=True)
+        if not self.parser.processing_live: # Stopped while processing, sig_finished has already been sent
+            self.parser.suppress_finished_signal = False
+            return
 
         # Emit a final update to ensure UI is fully synchronized before starting live monitoring
         # Don't hold mutex while emitting signal to avoid blocking
-        self.parser.sig_periodic_update.emit(self.parser.combat_session_data)
+        with self.parser.publish_lock:
+            snapshots = self.parser.publish_snapshots().session_data
+        self.parser.sig_periodic_update.emit(snapshots)
 
         # Remove the suppression flag
         self.parser.suppress_finished_signal = False
 
-        # Start live monitoring
-        self.parser.process_live_log(file_path)
+        # Start live monitoring where the existing pass stopped, lines written since then are read straight away
+        self.parser.process_live_log(file_path, self.parser.parsed_offset)
 
     def run(self):
         if self.live and self.process_existing_first:
@@ -53,6 +63,9 @@ class ParserThread(QThread):
         elif self.live:
             self.sig_process_live_log.emit(self.file_path)
             ("Emitted Signal: Processing Live Log, with file path: ", self.file_path)
+        elif self.time_range is not None:
+            self.sig_process_log_range.emit(self.file_path)
+            print("Emitted Signal: Process Existing Log Time Range")
         else:
             self.sig_process_existing_log.emit(self.file_path)
             print("Emitted Signal: Process Existing Log")
@@ -67,7 +80,6 @@ class MainUI(QMainWindow):
     sig_stop_monitoring = pyqtSignal()
     sig_run = pyqtSignal(str)
     sig_run_live = pyqtSignal(str)
-    combat_mutex = QMutex() # the lock for interacting with combat session data
     # sig_terminate_processing = pyqtSignal()
     settings = QSettings(Globals.AUTHOR, Globals.APPLICATION_NAME)
     last_file_path = settings.value("last_file_path", "", type=str)
@@ -98,42 +110,54 @@ class MainUI(QMainWindow):
             self.start_stop_button = QPushButton("Start Log", clicked=self.start_stop_log)
             self.process_button = QPushButton("Process Existing Log", clicked=self.process_existing_log)
 
+            # Only process the part of the existing log between two times, e.g. last night's task force
+            self.time_range_check = QCheckBox("Time Range:", toggled=self.on_time_range_toggled)
+            self.time_range_start = QDateTimeEdit(QDateTime.currentDateTime().addDays(-1), calendarPopup=True, displayFormat="yyyy-MM-dd HH:mm:ss")
+            self.time_range_end = QDateTimeEdit(QDateTime.currentDateTime(), calendarPopup=True, displayFormat="yyyy-MM-dd HH:mm:ss")
+            self.time_range_to_label = QLabel("to")
+            self.on_time_range_toggled(False)
+
             # Run Test button to add test data to the Treeview
             self.run_test_button = QPushButton("Run Test", clicked=self.run_test_log)
 
 
         def define_combat_session_tree():
             # Combat Session Tree
-            self.combat_session_tree = QTreeWidget()
-            self.combat_session_tree.setHeaderLabels(["Session", "Duration", "DPS", "EXP", "Inf"])
+            self.session_list_model = SessionListModel()
+            self.combat_session_tree = QTreeView()
+            self.combat_session_tree.setModel(self.session_list_model)
+            self.combat_session_tree.setRootIsDecorated(False)
             apply_header_style_fix(self.combat_session_tree)
             self.combat_session_tree.setColumnWidth(0, 150)
             self.combat_session_tree.setColumnWidth(1, 75)
             self.combat_session_tree.setColumnWidth(2, 75)
             self.combat_session_tree.setColumnWidth(3, 80)
             self.combat_session_tree.setColumnWidth(4, 80)
-            self.combat_session_tree.setSelectionMode(QTreeWidget.SingleSelection)
+            self.combat_session_tree.setSelectionMode(QAbstractItemView.SingleSelection)
             self.combat_session_tree.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
             self.combat_session_tree.setMinimumWidth(250)
             self.combat_session_tree.setMaximumWidth(500)
 
-            self.combat_session_tree.itemSelectionChanged.connect(self.on_session_selection_change)
+            self.combat_session_tree.selectionModel().selectionChanged.connect(self.on_session_selection_change)
 
         def define_ability_tree_tabs():
             # Set up view tabs for the ability tree
             self.view_tabs = QTabWidget()
 
-            # Create two separate ability tree displays for player and enemies
-            self.ability_tree_display_player = QTreeWidget()
-            self.ability_tree_display_enemies = QTreeWidget()
+            # Create two separate ability tree displays for player and enemies, each backed by a model of one side of the selected session
+            self.ability_tree_display_player = QTreeView()
+            self.ability_tree_display_enemies = QTreeView()
+            self.player_tree_model = AbilityTreeModel("chars")
+            self.enemies_tree_model = AbilityTreeModel("targets")
 
             # Configure the columns for both trees (assuming they have the same structure)
-            for tree_widget in [self.ability_tree_display_player, self.ability_tree_display_enemies]:
+            for tree_widget, model in [(self.ability_tree_display_player, self.player_tree_model), (self.ability_tree_display_enemies, self.enemies_tree_model)]:
+                # The proxy handles sorting, so the model never has to reorder its rows
+                proxy = QSortFilterProxyModel(tree_widget)
+                proxy.setSourceModel(model)
+                proxy.setSortRole(SORT_ROLE)
+                tree_widget.setModel(proxy)
                 tree_widget.setSortingEnabled(True)
-                tree_widget.setHeaderLabels([
-                    "Name", "DPS", "Acc %", "Avg Per Hit", "Count",
-                    "Max", "Min", "Total", "Hits", "Tries"
-                ])
                 apply_header_style_fix(tree_widget)
 
                 tree_widget.setColumnWidth(0, 275)
@@ -151,6 +175,9 @@ class MainUI(QMainWindow):
                 # Set the default sort column to DPS
                 tree_widget.sortByColumn(1, Qt.DescendingOrder)
 
+            # Player characters are expanded by default
+            self.ability_tree_display_player.model().rowsInserted.connect(self.on_player_rows_inserted)
+
             # Add ability trees to the view tabs
             self.view_tabs.addTab(self.ability_tree_display_player, "Player")
             self.view_tabs.addTab(self.ability_tree_display_enemies, "Enemies")
@@ -166,6 +193,10 @@ class MainUI(QMainWindow):
             button_layout = QHBoxLayout()
             button_layout.addWidget(self.start_stop_button)
             button_layout.addWidget(self.process_button)
+            button_layout.addWidget(self.time_range_check)
+            button_layout.addWidget(self.time_range_start)
+            button_layout.addWidget(self.time_range_to_label)
+            button_layout.addWidget(self.time_range_end)
             #button_layout.addWidget(self.run_test_button)
 
             combat_tree_layout = QHBoxLayout()
@@ -194,12 +225,13 @@ class MainUI(QMainWindow):
         print("Done.")
 
 
-    def start_worker_thread(self, file_path: str, live: bool, process_existing_first: bool = False):
+    def start_worker_thread(self, file_path: str, live: bool, process_existing_first: bool = False, time_range: tuple = None):
 
         if self.CONSOLE_VERBOSITY >= 2: print("Starting Worker Thread...")
-        self.WorkerThread = ParserThread(file_path, live, process_existing_first)
+        self.WorkerThread = ParserThread(file_path, live, process_existing_first, time_range)
         self.WorkerThread.parser.sig_finished.connect(self.on_worker_finished)
-        self.WorkerThread.parser.sig_periodic_update.connect(lambda: self.on_sig_periodic_update(self.WorkerThread.parser.combat_session_data))
+        self.WorkerThread.parser.sig_periodic_update.connect(self.on_sig_periodic_update)
+        self.WorkerThread.parser.sig_delta_update.connect(self.on_sig_delta_update)
         self.WorkerThread.parser.sig_error.connect(self.on_parser_error)
         self.sig_stop_monitoring.connect(self.WorkerThread.parser.on_sig_stop_monitoring)
         self.WorkerThread.start()
@@ -223,9 +255,8 @@ class MainUI(QMainWindow):
             process_existing_first = self.settings.value("ProcessLogBeforeStarting", False, bool)
 
             self.start_worker_thread(file_path, True, process_existing_first)
-            self.ability_tree_display_player.clear()
-            self.ability_tree_display_enemies.clear()
-            self.combat_session_tree.clear()
+            self.clear_ability_trees()
+            self.session_list_model.set_sessions([])
 
         else:
             self.unlock_ui()
@@ -246,10 +277,9 @@ class MainUI(QMainWindow):
             #Lock UI
             self.process_button.setText("Stop Processing")
             self.lock_ui()
-            self.start_worker_thread(file_path, False)
-            self.ability_tree_display_player.clear()
-            self.ability_tree_display_enemies.clear()
-            self.combat_session_tree.clear()
+            self.start_worker_thread(file_path, False, time_range=self.get_time_range())
+            self.clear_ability_trees()
+            self.session_list_model.set_sessions([])
             self.process_button.setEnabled(True)
 
         else:
@@ -259,36 +289,73 @@ class MainUI(QMainWindow):
             self.process_button.setText("Process Existing Log")
 
 
+    def on_time_range_toggled(self, checked):
+        self.time_range_start.setEnabled(checked)
+        self.time_range_end.setEnabled(checked)
+
+    def get_time_range(self):
+        '''Returns the (start, end) timestamps of the part of the log to process, in the parser's seconds since the epoch, or None for all of it'''
+        if not self.time_range_check.isChecked():
+            return None
+        return tuple(Timestamp.convert_timestamp(edit.dateTime().toString("yyyy-MM-dd"), edit.dateTime().toString("HH:mm:ss"))
+                     for edit in (self.time_range_start, self.time_range_end))
+
     def on_worker_finished(self, data):
-        with QMutexLocker(self.combat_mutex):
-            self.combat_session_data = data
-            self.sig_run.disconnect
-            self.WorkerThread.parser.sig_finished.disconnect
-            self.WorkerThread.parser.sig_periodic_update.disconnect
-            self.WorkerThread.quit()
-            if self.CONSOLE_VERBOSITY >= 2: print("Worker Thread Quit")
-            self.unlock_ui()
-            self.process_button.setText("Process Existing Log")
-            if self.combat_session_data != []:
-                self.selected_session = self.combat_session_data[-1]
-                self.repopulate_sessions(self.combat_session_data)
-                self.repopulate(self.selected_session)
+        '''Receives the final list of SessionSnapshots from the parser, like the periodic updates no lock is needed to read them'''
+        self.combat_session_data = data
+        self.sig_run.disconnect
+        self.WorkerThread.parser.sig_finished.disconnect
+        self.WorkerThread.parser.sig_periodic_update.disconnect
+        self.WorkerThread.parser.sig_delta_update.disconnect
+        self.WorkerThread.quit()
+        if self.CONSOLE_VERBOSITY >= 2: print("Worker Thread Quit")
+        self.unlock_ui()
+        self.process_button.setText("Process Existing Log")
+        if self.combat_session_data != []:
+            self.selected_session = self.combat_session_data[-1]
+            self.repopulate_sessions(self.combat_session_data)
+            self.repopulate(self.selected_session)
 
-    @pyqtSlot()
+    @pyqtSlot(list)
     def on_sig_periodic_update(self, data):
-        '''Signal to update the UI with the latest data from the parser thread'''
-        with QMutexLocker(self.combat_mutex):
-
-            self.combat_session_data = data
-            if data == [] or self.combat_session_data is None:
-                self.selected_session = []
-            #check if user has selected a session, if they have, keep it selected
+        '''Signal to update the UI with the latest SessionSnapshots from the parser thread, snapshots are immutable so no lock is needed'''
+        self.combat_session_data = data
+        if data == [] or self.combat_session_data is None:
+            self.selected_session = []
+        #check if user has selected a session, if they have, keep it selected
+        else:
+            selected_rows = self.combat_session_tree.selectionModel().selectedRows()
+            if selected_rows and selected_rows[0].row() < len(self.combat_session_data):
+                self.selected_session = self.combat_session_data[selected_rows[0].row()]
             else:
                 self.selected_session = self.combat_session_data[-1]
 
-            self.repopulate_sessions(self.combat_session_data)
+        self.repopulate_sessions(self.combat_session_data)
+        self.repopulate(self.selected_session)
+
+    def on_sig_delta_update(self, changes):
+        '''Signal to apply the changes made by the parser thread since the last update during live monitoring'''
+        self.combat_session_data = changes.session_data
+        self.session_list_model.apply_changes(changes)
+        if self.combat_session_data == []:
+            self.selected_session = []
             self.repopulate(self.selected_session)
-            self
+            return
+
+        selected_rows = self.combat_session_tree.selectionModel().selectedRows()
+        if selected_rows and selected_rows[0].row() < len(self.combat_session_data):
+            index = selected_rows[0].row()
+        else:
+            index = len(self.combat_session_data) - 1
+        session = self.combat_session_data[index]
+
+        # Only walk the ability trees if the shown session was touched or a different session is now shown.
+        # Untouched sessions keep the same snapshot object from one update to the next.
+        if index in changes.paths or session is not self.selected_session:
+            self.selected_session = session
+            paths = changes.paths.get(index, set())
+            self.player_tree_model.apply_changes(session, paths)
+            self.enemies_tree_model.apply_changes(session, paths)
 
     @pyqtSlot(str, str)
     def on_parser_error(self, message: str, title: str):
@@ -301,232 +368,44 @@ class MainUI(QMainWindow):
         # Display error dialog
         self.error(message, title)
 
-    def on_session_selection_change(self):
-        '''Handles the event when a combat session is selected in the treeWidget'''
-        if self.combat_session_tree.selectedItems():
-            with QMutexLocker(self.combat_mutex):
-                selected_index = self.combat_session_tree.selectedIndexes()[0].row()
-                self.selected_session = self.combat_session_data[selected_index]
-                self.repopulate(self.selected_session)
-    
-
-
-    def update_or_create_item(tree_widget, parent_item, text_list, unique_key):
-        """Update an existing item or create a new one if it doesn't exist."""
-        items = tree_widget.findItems(unique_key, Qt.MatchExactly | Qt.MatchRecursive, 0)
-        if items:
-            item = items[0]
-        else:
-            item = QTreeWidgetItem(parent_item, text_list)
-            item.setText(0, unique_key)
-        for i, text in enumerate(text_list):
-            item.setText(i, text)
-        return item
-
-    def repopulate_sessions(self, combat_session_list: list):
-        '''Populates the treeWidget with data from the provided list of combat sessions. This should only be called while under a mutex lock'''
-        assert not(self.combat_mutex.tryLock()), "UI Repopulation mutex not acquired"
+    def on_session_selection_change(self, selected=None, deselected=None):
+        '''Handles the event when a combat session is selected in the session list'''
+        selected_rows = self.combat_session_tree.selectionModel().selectedRows()
+        if selected_rows:
+            selected_index = selected_rows[0].row()
+            self.selected_session = self.combat_session_data[selected_index]
+            self.repopulate(self.selected_session)
 
+    def on_player_rows_inserted(self, parent, first, last):
+        '''Expands new character rows in the player tree'''
+        if parent.isValid(): return
+        proxy = self.ability_tree_display_player.model()
+        for row in range(first, last + 1):
+            self.ability_tree_display_player.expand(proxy.index(row, 0))
 
-        # Clear the treeWidget and rebuild
-        self.combat_session_tree.clear()
-        if combat_session_list == []: return
-        for session, combat_session in enumerate(combat_session_list, start=1):
-            session_name = combat_session_list[session-1].get_name()
-            session_item = QTreeWidgetItem(self.combat_session_tree, [session_name])
-            session_item.setText(1, str(combat_session.duration) + "s")
-            session_item.setText(2, str(combat_session.get_dps()))
-            session_item.setText(3, "{:,}".format(combat_session.get_exp()))
-            session_item.setText(4, "{:,}".format(combat_session.get_inf()))
+    def repopulate_sessions(self, combat_session_list: list):
+        '''Updates the session list with data from the provided list of SessionSnapshots'''
+        self.session_list_model.set_sessions(combat_session_list)
 
 
     def repopulate(self, session):
-        '''This is the main function to update the ability tree with data from the provided combat session. This should only be called while under a mutex lock
-        Optimized to update existing items in-place rather than clearing and rebuilding the entire tree.'''
-
-        def set_styling(item, font_size=10, is_bold=False, background_color=None):
-            for i in range(10):
-                item.setFont(i, QFont("Fira Sans Medium", font_size, QFont.Bold if is_bold else QFont.Normal))
-                if background_color:
-                    item.setBackground(i, background_color)
-
-        def update_character_item(character_item, character_name, duration, is_new=False):
-            """Update or initialize a character item with current data."""
-            if is_new:
-                set_styling(character_item, font_size=11, is_bold=True, background_color=QColor(25, 25, 25))
-                character_item.setData(0, Qt.UserRole, character_name)
-                character_item.setText(0, character_name)
-                # Set text alignment on creation
-                for col in [2, 3, 4, 5, 6, 7, 8]:
-                    character_item.setTextAlignment(col, Qt.AlignCenter)
-
-            # Update data (always)
-            character_item.setData(1, Qt.DisplayRole, character.get_dps(duration))
-            character_item.setData(2, Qt.DisplayRole, "{:,}%".format(character.get_accuracy()))
-            character_item.setData(3, Qt.DisplayRole, character.get_average_damage())
-            character_item.setData(4, Qt.DisplayRole, character.get_count())
-            character_item.setData(7, Qt.DisplayRole, "{:,}".format(int(character.get_total_damage())))
-            character_item.setData(8, Qt.DisplayRole, character.get_hits())
-            character_item.setData(9, Qt.DisplayRole, character.get_tries())
-
-        def update_ability_item(ability_item, parent_item, ability_name, duration, is_new=False):
-            """Update or initialize an ability item with current data."""
-            if is_new:
-                ability_item.setData(0, Qt.UserRole, str(parent_item.data(0,Qt.UserRole)+ability_name))
-                ability_item.setText(0, ability_name)
-                # Set text alignment on creation
-                for col in [2, 3, 4, 5, 6, 7, 8]:
-                    ability_item.setTextAlignment(col, Qt.AlignCenter)
-
-            # Update data (always)
-            ability_item.setData(1, Qt.DisplayRole, ability.get_dps(duration))
-            ability_item.setData(2, Qt.DisplayRole, ability.get_accuracy())
-            ability_item.setData(3, Qt.DisplayRole, ability.get_average_damage())
-            ability_item.setData(4, Qt.DisplayRole, ability.get_count())
-            ability_item.setData(5, Qt.DisplayRole, round(ability.get_max_damage(), 2))
-            ability_item.setData(6, Qt.DisplayRole, round(ability.get_min_damage(), 2))
-            ability_item.setData(7, Qt.DisplayRole, "{:,}".format(int(ability.get_total_damage())))
-            ability_item.setData(8, Qt.DisplayRole, ability.get_hits())
-            ability_item.setData(9, Qt.DisplayRole, ability.get_tries())
-
-        def update_damage_item(damage_item, parent_item, damage_name, duration, is_new=False):
-            """Update or initialize a damage item with current data."""
-            if is_new:
-                damage_item.setData(0, Qt.UserRole, str(parent_item.data(0,Qt.UserRole)+damage_name.name))
-                damage_item.setText(0, damage_name.name)
-                # Set text alignment on creation
-                for col in [2, 3, 4, 5, 6, 7]:
-                    damage_item.setTextAlignment(col, Qt.AlignCenter)
-
-            # Update data (always)
-            damage_item.setData(1, Qt.DisplayRole, damage_name.get_dps(duration))
-
-            # For proc damage components, display proc rate in curly brackets
-            if damage_name.is_proc:
-                proc_rate = damage_name.get_proc_rate()
-                damage_item.setData(2, Qt.DisplayRole, "{" + str(proc_rate) + "}")
-            else:
-                damage_item.setData(2, Qt.DisplayRole, "")
-
-            damage_item.setData(3, Qt.DisplayRole, damage_name.get_average_damage())
-            damage_item.setData(4, Qt.DisplayRole, damage_name.get_count())
-            damage_item.setData(5, Qt.DisplayRole, round(damage_name.get_highest_damage(), 2))
-            damage_item.setData(6, Qt.DisplayRole, round(damage_name.get_lowest_damage(), 2))
-            damage_item.setData(7, Qt.DisplayRole, "{:,}".format(int(damage_name.get_damage())))
-
-        # asset mutex lock is in place
-        assert not(self.combat_mutex.tryLock()), "UI Repopulation mutex not acquired"
+        '''This is the main function to update the ability trees with data from the provided SessionSnapshot.
+        Snapshots are never modified after the parser publishes them, so this doesn't need the combat mutex.
+        The models only notify the views about rows that were added or whose numbers changed, and only for rows the views have fetched.'''
 
         # If no session data, clear trees and return
         if session is None or session == []:
-            self.ability_tree_display_player.clear()
-            self.ability_tree_display_enemies.clear()
+            self.clear_ability_trees()
             return
 
-        for tree_widget in [self.ability_tree_display_player, self.ability_tree_display_enemies]:
-            # Block signals during update to prevent flickering
-            tree_widget.blockSignals(True)
+        for model in [self.player_tree_model, self.enemies_tree_model]:
+            model.set_session(session)
 
-            if tree_widget == self.ability_tree_display_player:
-                char_list = session.chars
-            else:
-                char_list = session.targets
-
-            duration = session.duration
-            visited_items = set()
-
-            # Update or create character items
-            for character_name, character in char_list.items():
-                # Find or create character item
-                char_id = character_name
-                character_item = None
-
-                # Search for existing character item
-                for i in range(tree_widget.topLevelItemCount()):
-                    item = tree_widget.topLevelItem(i)
-                    if item.data(0, Qt.UserRole) == char_id:
-                        character_item = item
-                        break
-
-                # Create new character item if not found
-                is_new_char = character_item is None
-                if is_new_char:
-                    character_item = QTreeWidgetItem(tree_widget, [character_name])
-                    # Set default expansion for player tree
-                    if tree_widget == self.ability_tree_display_player:
-                        character_item.setExpanded(True)
-
-                update_character_item(character_item, character_name, duration, is_new_char)
-                visited_items.add(char_id)
-
-                # Track visited ability items for this character
-                ability_ids_in_data = set()
-
-                # Update or create ability items
-                for ability_name, ability in character.abilities.items():
-                    ability_id = str(char_id + ability_name)
-                    ability_ids_in_data.add(ability_id)
-                    ability_item = None
-
-                    # Search for existing ability item
-                    for i in range(character_item.childCount()):
-                        child = character_item.child(i)
-                        if child.data(0, Qt.UserRole) == ability_id:
-                            ability_item = child
-                            break
-
-                    # Create new ability item if not found
-                    is_new_ability = ability_item is None
-                    if is_new_ability:
-                        ability_item = QTreeWidgetItem(character_item, [ability_name])
-
-                    update_ability_item(ability_item, character_item, ability_name, duration, is_new_ability)
-
-                    # Track visited damage items for this ability
-                    damage_ids_in_data = set()
-
-                    # Update or create damage items
-                    for damage_name in ability.damage:
-                        damage_id = str(ability_id + damage_name.name)
-                        damage_ids_in_data.add(damage_id)
-                        damage_item = None
-
-                        # Search for existing damage item
-                        for i in range(ability_item.childCount()):
-                            child = ability_item.child(i)
-                            if child.data(0, Qt.UserRole) == damage_id:
-                                damage_item = child
-                                break
-
-                        # Create new damage item if not found
-                        is_new_damage = damage_item is None
-                        if is_new_damage:
-                            damage_item = QTreeWidgetItem(ability_item, [damage_name.name])
-
-                        update_damage_item(damage_item, ability_item, damage_name, duration, is_new_damage)
-
-                    # Remove damage items that no longer exist
-                    for i in range(ability_item.childCount() - 1, -1, -1):
-                        child = ability_item.child(i)
-                        if child.data(0, Qt.UserRole) not in damage_ids_in_data:
-                            ability_item.removeChild(child)
-
-                # Remove ability items that no longer exist
-                for i in range(character_item.childCount() - 1, -1, -1):
-                    child = character_item.child(i)
-                    if child.data(0, Qt.UserRole) not in ability_ids_in_data:
-                        character_item.removeChild(child)
-
-            # Remove character items that no longer exist
-            for i in range(tree_widget.topLevelItemCount() - 1, -1, -1):
-                item = tree_widget.topLevelItem(i)
-                if item.data(0, Qt.UserRole) not in visited_items:
-                    tree_widget.takeTopLevelItem(i)
-
-            # Unblock signals
-            tree_widget.blockSignals(False)
-            
 
+    def clear_ability_trees(self):
+        '''Clears both ability trees'''
+        for model in [self.player_tree_model, self.enemies_tree_model]:
+            model.set_session(None)
 
     def browse_file(self):
         self.lock_ui()
@@ -566,8 +445,25 @@ class MainUI(QMainWindow):
         return str(most_recent_file)
 
     def open_settings_window(self):
+        aggregation_settings = self.get_aggregation_settings()
         self.settings_window = SettingsWindow()
         self.settings_window.exec_()
+        if self.get_aggregation_settings() != aggregation_settings:
+            self.reprocess_log()
+
+    def get_aggregation_settings(self):
+        '''Returns the values of the settings that change how the parsed events are grouped into sessions and abilities'''
+        return [self.settings.value(key) for key in ("CombatSessionTimeout", "CombatSessionName", "CombatSessionNamingMode", "AssociateProcsToPowers")]
+
+    def reprocess_log(self):
+        '''Applies changed settings to the last parsed log by processing it again in a new worker thread'''
+        if self.WorkerThread is None or self.WorkerThread.isRunning() or self.monitoring_live: return
+        self.process_button.setText("Stop Processing")
+        self.lock_ui()
+        self.start_worker_thread(self.WorkerThread.file_path, False, time_range=self.WorkerThread.time_range)
+        self.clear_ability_trees()
+        self.session_list_model.set_sessions([])
+        self.process_button.setEnabled(True)
 
     def error(self, message, title = "Error"):
         error_box = QMessageBox()
@@ -585,6 +481,8 @@ class MainUI(QMainWindow):
         self.browse_button.setEnabled(False)
         self.run_test_button.setEnabled(False)
         self.settings_button.setEnabled(False)
+        self.time_range_check.setEnabled(False)
+        self.on_time_range_toggled(False)
     def unlock_ui(self):
         self.start_stop_button.setEnabled(True)
         self.process_button.setEnabled(True)
@@ -592,6 +490,8 @@ class MainUI(QMainWindow):
         self.browse_button.setEnabled(True)
         self.run_test_button.setEnabled(True)
         self.settings_button.setEnabled(True)
+        self.time_range_check.setEnabled(True)
+        self.on_time_range_toggled(self.time_range_check.isChecked())
     def check_file_path_valid(self, file_path: str) -> bool:
         file_path = self.file_path_var.text()
         if file_path == "":
@@ -605,9 +505,8 @@ class MainUI(QMainWindow):
     def run_test_log(self):
         # Create a list of test data
         test_sessions = []
-        self.ability_tree_display_player.clear()
-        self.ability_tree_display_enemies.clear()
-        self.combat_session_tree.clear()
+        self.clear_ability_trees()
+        self.session_list_model.set_sessions([])
 
         def pick_random_type():
             damage_types = ["Smashing", "Lethal", "Fire", "Cold", "Energy", "Negative", "Toxic", "Psionic"]
@@ -652,25 +551,23 @@ class MainUI(QMainWindow):
                     ability.ability_hit(hit)
                     if hit:
                         damage = random.choice(list(ability.damage))
-                        damage.add_damage(damage,random.randint(0, 100))
+                        ability.add_damage(damage,random.randint(0, 100))
             print("Test Data Created")
 
 
         # Call the function to set up test data
         setup_test_data()
-        self.combat_session_tree.clear()
-        self.ability_tree_display_player.clear()
-        self.ability_tree_display_enemies.clear()
+        self.session_list_model.set_sessions([])
+        self.clear_ability_trees()
         self.combat_session_tree.conn
-        with QMutexLocker(self.combat_mutex):
-            self.combat_session_data = test_sessions
-            # Populate the tree with test data
-            # self.repopulate_sessions(self.combat_session_data)
+        self.combat_session_data = test_sessions
+        # Populate the tree with test data
+        # self.repopulate_sessions(self.combat_session_data)
 
 
 if __name__ == "__main__":
     # Create the UI
     app = QApplication(sys.argv)
-    ui = MainUI(parser=Parser())
+    ui = MainUI(parser=QtParser())
     ui.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,85 @@
+import os.path
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot, QTimer, QCoreApplication, QSettings, QFileSystemWatcher
+from combat.CombatParser import Parser
+from combat.ParserConfig import ParserConfig
+from data.Globals import Globals
+
+
+def load_parser_config(settings):
+    '''Returns a ParserConfig of the parser settings saved in QSettings, the defaults are used for any that haven't been saved'''
+    return ParserConfig(
+        COMBAT_SESSION_TIMEOUT=settings.value("CombatSessionTimeout", Globals.DEFAULT_COMBAT_SESSION_TIMEOUT, int),
+        COMBAT_SESSION_NAME=settings.value("CombatSessionName", Globals.DEFAULT_COMBAT_SESSION_NAME, str),
+        COMBAT_SESSION_NAMING_MODE=settings.value("CombatSessionNamingMode", Globals.DEFAULT_COMBAT_SESSION_NAMING_MODE, str),
+        ASSOCIATE_PROCS_TO_POWERS=settings.value("AssociateProcsToPowers", Globals.DEFAULT_ASSOCIATE_PROCS_TO_POWERS, bool),
+        CONSOLE_VERBOSITY=settings.value("ConsoleVerbosity", Globals.DEFAULT_CONSOLE_VERBOSITY, int),
+        PARSE_WORKERS=settings.value("ParseWorkers", Globals.DEFAULT_PARSE_WORKERS, int),
+        PARSE_CACHE_SIZE=settings.value("ParseCacheSize", Globals.DEFAULT_PARSE_CACHE_SIZE, int),
+    )
+
+
+class QtParser(QObject, Parser):
+    '''
+    Qt adapter for the Parser, used by the UI's ParserThread. The Parser callbacks are emitted as signals, its settings are read from
+    QSettings each time it checks them, the UI is kept responsive while existing logs are processed, and live monitoring is driven by
+    Qt timers, with a file watcher reading new lines as soon as they are written.
+    '''
+
+    sig_finished = pyqtSignal(list)
+    sig_periodic_update = pyqtSignal(list)
+    sig_delta_update = pyqtSignal(object) # Sends a ChangeSet of what was touched since the last update during live monitoring
+    sig_error = pyqtSignal(str, str)  # Signal for errors (message, title)
+    settings = QSettings(Globals.AUTHOR, Globals.APPLICATION_NAME)
+
+    def __init__(self, parent=None):
+        QObject.__init__(self)
+        self.interval_timer = QTimer(parent) # Handles preriodic UI update events
+        self.interval_timer.timeout.connect(self.live_log_interval_update)
+        self.interval_timer.setInterval(self.LIVE_UPDATE_INTERVAL)
+        self.monitoring_timer = QTimer(parent)
+        self.monitoring_timer.timeout.connect(self.monitoring_loop)
+        self.file_watcher = QFileSystemWatcher(parent) # Wakes monitoring_loop as soon as the log file changes (inotify on Linux)
+        self.file_watcher.fileChanged.connect(self.on_log_file_changed)
+        Parser.__init__(self, load_parser_config(self.settings), on_finished=self.sig_finished.emit,
+                        on_periodic_update=self.sig_periodic_update.emit, on_delta_update=self.sig_delta_update.emit,
+                        on_error=self.sig_error.emit, on_progress=QCoreApplication.processEvents)
+
+    def get_config(self):
+        self.config = load_parser_config(self.settings)
+        return self.config
+
+    @pyqtSlot()
+    def process_live_log(self, file_path, offset=None):
+        return Parser.process_live_log(self, file_path, offset)
+
+    def start_watching_log_file(self):
+        self.monitoring_timer.start()
+        self.file_watcher.addPath(self.LOG_FILE_PATH)
+
+    def stop_watching_log_file(self):
+        self.monitoring_timer.stop()
+        if self.file_watcher.files():
+            self.file_watcher.removePaths(self.file_watcher.files())
+
+    def on_log_file_changed(self, path):
+        '''Called by the file watcher when the log file is written to, reads the new lines straight away rather than waiting for the next poll'''
+        if not self.monitoring_live: return
+        if path not in self.file_watcher.files() and os.path.isfile(path):
+            self.file_watcher.addPath(path) # Some platforms stop watching a file that has been replaced
+        self.monitoring_loop()
+
+    def set_poll_interval(self, interval):
+        Parser.set_poll_interval(self, interval)
+        self.monitoring_timer.setInterval(interval)
+
+    def start_interval_updates(self):
+        Parser.start_interval_updates(self)
+        self.interval_timer.start()
+
+    def stop_interval_updates(self):
+        Parser.stop_interval_updates(self)
+        self.interval_timer.stop()
+
+    def on_sig_stop_monitoring(self):
+        '''Stops monitoring the log file'''
+        self.stop_monitoring()
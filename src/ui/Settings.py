@@ -109,6 +109,34 @@ class SettingsWindow(QDialog):
         process_before_start_layout.addWidget(process_before_start_checkbox)
         layout.addLayout(process_before_start_layout)
 
+        # Parse Workers
+        tooltip = "The number of processes used to parse large existing log files, 0 uses one per CPU core and 1 parses them without any extra processes"
+        workers_label = QLabel("Log Parsing Processes:")
+        workers_label.setToolTip(tooltip)
+        layout.addWidget(workers_label)
+
+        workers_spinbox = QSpinBox()
+        workers_spinbox.setToolTip(tooltip)
+        workers_spinbox.setMinimum(0)
+        workers_spinbox.setMaximum(64)
+        workers_spinbox.setValue(self.settings.value("ParseWorkers", Globals.DEFAULT_PARSE_WORKERS, int))
+        workers_spinbox.valueChanged.connect(self.save_parse_workers)
+        layout.addWidget(workers_spinbox)
+
+        # Parse Cache Size
+        tooltip = "The disk space in MB used to remember parsed log files, so reopening a log only parses what has been added to it since, 0 turns this off"
+        cache_label = QLabel("Parse Cache Size (MB):")
+        cache_label.setToolTip(tooltip)
+        layout.addWidget(cache_label)
+
+        cache_spinbox = QSpinBox()
+        cache_spinbox.setToolTip(tooltip)
+        cache_spinbox.setMinimum(0)
+        cache_spinbox.setMaximum(100000)
+        cache_spinbox.setValue(self.settings.value("ParseCacheSize", Globals.DEFAULT_PARSE_CACHE_SIZE, int))
+        cache_spinbox.valueChanged.connect(self.save_parse_cache_size)
+        layout.addWidget(cache_spinbox)
+
         # Console Verbosity
         tooltip = "The amount of information to display in the console - For Debug purposes only, this WILL impact performance"
         verbosity_label = QLabel("Console Verbosity:")
@@ -164,6 +192,12 @@ class SettingsWindow(QDialog):
     def save_combat_session_naming_mode(self, text):
         self.settings.setValue("CombatSessionNamingMode", text)
 
+    def save_parse_workers(self, value):
+        self.settings.setValue("ParseWorkers", value)
+
+    def save_parse_cache_size(self, value):
+        self.settings.setValue("ParseCacheSize", value)
+
     def save_console_verbosity(self, value):
         self.settings.setValue("ConsoleVerbosity", value)
 
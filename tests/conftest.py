@@ -0,0 +1,27 @@
+import contextlib
+import io
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, "src"))
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks")) # For log_generator, which writes the synthetic logs the tests parse
+
+from combat.CombatParser import Parser
+
+
+def new_parser():
+    '''Returns a quiet Parser that parses in this process without the parse cache'''
+    parser = Parser()
+    parser.PARSE_CACHE_SIZE = 0
+    parser.PARSE_WORKERS = 1
+    parser.CONSOLE_VERBOSITY = 0
+    return parser
+
+
+def parse_existing(path):
+    '''Parses the whole log at path with a new_parser(), returns the parser'''
+    parser = new_parser()
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser.process_existing_log(str(path))
+    return parser
@@ -0,0 +1,33 @@
+import contextlib
+import io
+
+import pytest
+
+from combat.CombatParser import Parser
+from combat.CombatSession import merge_sessions
+from combat.ParserConfig import ParserConfig
+from log_generator import write_log
+
+
+def verify_all(sessions):
+    '''Checks the running totals of every session, character and ability against a full recalculation'''
+    for session in sessions:
+        session.verify_totals()
+        for character in list(session.chars.values()) + list(session.targets.values()):
+            character.verify_totals()
+            for ability in character.abilities.values():
+                ability.verify_totals()
+
+
+@pytest.mark.parametrize("associate_procs", [True, False])
+def test_running_totals_of_a_parsed_log(tmp_path, associate_procs):
+    path = str(tmp_path / "chatlog.txt")
+    write_log(path, 1000000, seed=9)
+    parser = Parser(ParserConfig(PARSE_WORKERS=1, PARSE_CACHE_SIZE=0, ASSOCIATE_PROCS_TO_POWERS=associate_procs))
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser.process_existing_log(path)
+    sessions = parser.combat_session_data
+    assert len(sessions) > 1
+    assert any(ability.damage for session in sessions for character in session.chars.values() for ability in character.abilities.values())
+    verify_all(sessions)
+    verify_all([merge_sessions(sessions)]) # Merging keeps them up to date as well
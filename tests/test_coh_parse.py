@@ -0,0 +1,25 @@
+import json
+
+import coh_parse
+from log_generator import write_log
+
+
+def write_logs(directory, count=2, size=200000):
+    for index in range(count):
+        write_log(str(directory / f"chatlog {index}.txt"), size, seed=index)
+
+
+def test_report_of_a_directory(tmp_path, capsys):
+    write_logs(tmp_path)
+    assert coh_parse.main(["--report", str(tmp_path), "--cache-size", "0", "--workers", "1", "-q"]) == 0
+    report = capsys.readouterr().out
+    assert report.startswith("2 logs, ")
+    assert "Abilities" in report and "DPS per day" in report
+
+
+def test_report_as_json(tmp_path, capsys):
+    write_logs(tmp_path)
+    assert coh_parse.main(["--report", "--report-format", "json", str(tmp_path), "--cache-size", "0", "--workers", "1", "-q"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["totals"]["files"] == 2
+    assert report["totals"]["sessions"] > 0
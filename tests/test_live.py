@@ -0,0 +1,36 @@
+import contextlib
+import io
+
+from bench_parallel import summarize
+from conftest import new_parser, parse_existing
+from log_generator import write_log
+
+
+def test_live_lines_are_read_like_an_existing_log(tmp_path):
+    '''Invalid UTF-8 doesn't stop live monitoring, and lone \\r line endings split the same way as in an existing log pass'''
+    path = tmp_path / "chatlog.txt"
+    write_log(str(path), 200000, seed=3)
+    lines = path.read_bytes().splitlines(keepends=True)
+    head, tail = lines[:len(lines) // 2], lines[len(lines) // 2:]
+    tail = [line.rstrip(b"\r\n") + b"\r" if index % 3 == 0 else line for index, line in enumerate(tail)]
+    tail.insert(5, b"2024-01-01 12:00:00 [Local] Someone: caf\xe9 \xff\xfe\r\n")
+    path.write_bytes(b"".join(head))
+
+    parser = new_parser()
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser.process_existing_log(str(path), hold_partial_line=True)
+        parser.process_live_log(str(path), parser.parsed_offset)
+        with open(path, "ab") as log:
+            for index in range(0, len(tail), 50):
+                log.write(b"".join(tail[index:index + 50]))
+                log.flush()
+                parser.monitoring_loop()
+        parser.monitoring_loop()
+        assert parser.monitoring_live
+        parser.stop_monitoring()
+
+    sessions, totals = summarize(parser)
+    expected_sessions, expected_totals = summarize(parse_existing(path))
+    assert sessions == expected_sessions
+    # Except the global combat duration (totals[3]), which ending live monitoring counts up to the end of the live session
+    assert totals[:3] + totals[4:] == expected_totals[:3] + expected_totals[4:]
@@ -0,0 +1,49 @@
+import random
+
+from combat.CombatSession import merge_sessions
+from combat import LogChunks
+from bench_memory import write_synthetic_log
+from bench_merge import parse, write_parts
+
+
+def summarize(session):
+    '''Returns the statistics merge() has to preserve as plain values, with floats rounded so summing in a different order doesn't matter.
+    Component order and last_damage are left out as they depend on the order things were merged in.'''
+    def characters(group):
+        values = []
+        for name, character in sorted(group.items()):
+            abilities = []
+            for ability_name, ability in sorted(character.abilities.items()):
+                components = sorted((component.type, component.count, round(component.total_damage, 6), component.highest_damage,
+                                     component.lowest_damage, component.is_proc, component.parent_hits) for component in ability.damage)
+                abilities.append((ability_name, ability.count, ability.hits, ability.tries, round(ability.total_damage, 6),
+                                  round(ability.max_damage, 6), ability.proc, ability.pet, components))
+            values.append((name, character.type, round(character.total_damage, 6), character.hits, character.tries,
+                           character.count, abilities))
+        return values
+
+    return (session.start_time, session.end_time, session.duration, session.exp_value, session.inf_value, session.first_enemy_damaged,
+            round(session.total_damage, 6), characters(session.chars), characters(session.targets))
+
+
+def test_merging_parts_is_the_same_as_parsing_the_whole_log(tmp_path):
+    '''merge(parse(A), parse(B)) == parse(A + B) for logs split at random session boundaries (gaps longer than the session timeout),
+    whatever order the parts are merged in and however they are grouped'''
+    rng = random.Random(13)
+    log_path = str(tmp_path / "chatlog.txt")
+    write_synthetic_log(log_path, 10000)
+    whole = parse(log_path, "")
+    expected = summarize(merge_sessions(whole.combat_session_data))
+    boundaries = [start for start, end in LogChunks.find_chunk_boundaries(log_path, whole.COMBAT_SESSION_TIMEOUT, 64)][1:]
+    assert len(boundaries) > 6
+
+    for trial in range(5):
+        offsets = sorted(rng.sample(boundaries, rng.randint(1, 6)))
+        parts = [parse(path, whole.PLAYER_NAME) for path in write_parts(log_path, offsets, str(tmp_path))]
+        assert sum(part.line_count for part in parts) == whole.line_count
+        aggregates = [merge_sessions(part.combat_session_data) for part in parts]
+
+        rng.shuffle(aggregates) # Commutative
+        assert summarize(merge_sessions(aggregates)) == expected
+        split = rng.randint(1, len(aggregates) - 1) # Associative, merging two groups of parts separately first
+        assert summarize(merge_sessions([merge_sessions(aggregates[:split]), merge_sessions(aggregates[split:])])) == expected
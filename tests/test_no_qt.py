@@ -0,0 +1,55 @@
+import glob
+import json
+import os
+import subprocess
+import sys
+
+from conftest import REPO_DIR
+
+SRC_DIR = os.path.join(REPO_DIR, "src")
+QT_MODULES = ("PyQt5", "PyQt6", "PySide2", "PySide6", "sip")
+HEADLESS_MODULES = ("coh_parse",) # Modules outside the packages that have to run without Qt
+
+# Run in a fresh interpreter, as the other tests may have loaded anything: imports the modules, parses a small log with a Parser made from
+# a ParserConfig and callbacks, then prints the sessions delivered to on_finished and every Qt module that has been loaded
+CHILD = '''
+import contextlib, importlib, io, json, os, sys, tempfile
+sys.path[:0] = [{src!r}, {benchmarks!r}]
+for module in {modules!r}:
+    importlib.import_module(module)
+from combat.CombatParser import Parser
+from combat.ParserConfig import ParserConfig
+from log_generator import write_log
+
+finished = []
+with tempfile.TemporaryDirectory() as directory:
+    log_path = os.path.join(directory, "chatlog.txt")
+    write_log(log_path, 100000, seed=0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        Parser(ParserConfig(PARSE_WORKERS=1, PARSE_CACHE_SIZE=0), on_finished=finished.append).process_existing_log(log_path)
+print(json.dumps({{"sessions": len(finished[0]) if finished else 0,
+                  "qt": sorted(name for name in sys.modules if name.split(".")[0] in {qt!r})}}))
+'''
+
+
+def get_core_modules():
+    '''Returns the names of every module in the combat and data packages, and the HEADLESS_MODULES'''
+    modules = []
+    for package in ("combat", "data"):
+        for path in sorted(glob.glob(os.path.join(SRC_DIR, package, "*.py"))):
+            name = os.path.splitext(os.path.basename(path))[0]
+            if name != "__init__":
+                modules.append(package + "." + name)
+    return modules + list(HEADLESS_MODULES)
+
+
+def test_parsing_does_not_load_qt():
+    '''The parsing engine and the command line tool are pure Python, worker processes for parallel parsing only import these modules too'''
+    modules = get_core_modules()
+    assert "combat.CombatParser" in modules and "data.Globals" in modules
+    code = CHILD.format(src=SRC_DIR, benchmarks=os.path.join(REPO_DIR, "benchmarks"), modules=modules, qt=QT_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=REPO_DIR)
+    assert output.returncode == 0, output.stderr
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    assert result["qt"] == []
+    assert result["sessions"] > 0
@@ -0,0 +1,33 @@
+from combat import Timestamp
+from bench_timestamp import strptime_convert_timestamp
+from conftest import parse_existing
+
+
+def test_same_day_matches_strptime():
+    '''Every second of a day gives the same time of day as the old strptime conversion'''
+    date = "2024-03-02"
+    midnight = Timestamp.convert_timestamp(date, "00:00:00")
+    for second in range(Timestamp.SECONDS_PER_DAY):
+        time = "{:02}:{:02}:{:02}".format(second // 3600, second // 60 % 60, second % 60)
+        assert Timestamp.convert_timestamp(date, time) - midnight == strptime_convert_timestamp(date, time), time
+
+
+def test_crossing_midnight_keeps_counting_up():
+    assert Timestamp.convert_timestamp("2024-03-03", "00:00:05") - Timestamp.convert_timestamp("2024-03-02", "23:59:50") == 15
+    assert Timestamp.convert_timestamp("2024-12-31", "23:59:59") + 1 == Timestamp.convert_timestamp("2025-01-01", "00:00:00")
+    assert Timestamp.format_timestamp(Timestamp.convert_timestamp("2024-02-29", "13:04:05")) == "2024-02-29 13:04:05"
+
+
+def test_session_crossing_midnight(tmp_path):
+    '''A fight that starts before midnight and finishes after it stays one session, with its duration counted across midnight'''
+    path = tmp_path / "chatlog.txt"
+    path.write_text("2024-03-02 23:59:48 Welcome to City of Heroes, Tenkay!\n"
+                    "2024-03-02 23:59:50 You hit Hellion Blaster with your Blaze for 112.40 points of Fire damage.\n"
+                    "2024-03-02 23:59:58 You hit Hellion Blaster with your Blaze for 100 points of Fire damage.\n"
+                    "2024-03-03 00:00:05 You hit Hellion Blaster with your Blaze for 50.5 points of Fire damage.\n")
+    parser = parse_existing(path)
+    assert len(parser.combat_session_data) == 1
+    session = parser.combat_session_data[0]
+    assert session.get_duration() == 15
+    assert session.end_time - session.start_time == 15
+    assert round(session.total_damage, 2) == 262.9